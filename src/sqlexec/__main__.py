@@ -1,13 +1,18 @@
 import sys
 import logging
-from PySide6.QtWidgets import QApplication
-from sqlexec.ui.main_window import MainWindow
-from sqlexec.config.config_manager import ConfigManager
 from sqlexec.utils.logger import setup_logger
 
 
 def main() -> None:
-    """应用程序入口"""
+    """应用程序入口，第一个参数为 cli 时以命令行模式运行"""
+    if len(sys.argv) > 1 and sys.argv[1] == "cli":
+        # 命令行模式不导入 PySide6
+        from sqlexec.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[2:]))
+
+    from PySide6.QtWidgets import QApplication
+    from sqlexec.ui.main_window import MainWindow
+
     # 初始化日志系统
     setup_logger()
 
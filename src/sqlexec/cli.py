@@ -0,0 +1,295 @@
+"""SQL Exec 命令行模式
+
+在不启动图形界面的情况下，对配置中的组或连接批量执行 SQL 文件，
+适合在定时任务和持续集成中使用。本模块不导入 PySide6。
+
+示例::
+
+    python -m sqlexec cli -g 生产库 -f report.sql -o out.csv --merge
+    sqlexec-cli -c db1 -c db2 -e "SELECT COUNT(*) FROM orders" --format jsonl
+    sqlexec-cli -g 生产库 -e "INSERT INTO t (a, b) VALUES (:a, :b)" --params rows.csv
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlexec.config.config_manager import ConfigManager
+from sqlexec.utils.logger import setup_logger
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1  # 有连接执行或导出失败
+EXIT_USAGE = 2  # 参数或配置错误
+EXIT_INTERRUPTED = 130
+
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+class UsageError(Exception):
+    """参数或配置错误"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="sqlexec-cli",
+        description="在多个数据库连接上批量执行 SQL，不启动图形界面"
+    )
+    target = parser.add_argument_group("执行目标")
+    target.add_argument("-g", "--group", action="append", default=[],
+                        help="在组内所有连接上执行，可以重复指定")
+    target.add_argument("-c", "--connection", action="append", default=[],
+                        help="在指定别名的连接上执行，可以重复指定")
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-f", "--file",
+                        help="SQL 文件，- 表示从标准输入读取；多条语句按顺序执行，输出最后一条语句的结果")
+    source.add_argument("-e", "--execute", help="直接执行的 SQL 语句")
+
+    output = parser.add_argument_group("输出")
+    output.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="输出格式（默认 csv）")
+    output.add_argument("-o", "--output",
+                        help="输出位置：合并时为文件，否则为目录（每个连接一个文件）；"
+                             "省略时合并输出到标准输出")
+    output.add_argument("--merge", action="store_true",
+                        help="所有连接的结果合并为一个文件，增加 _source 来源列")
+
+    execution = parser.add_argument_group("执行")
+    execution.add_argument("-w", "--workers", type=int,
+                           help="最大并发连接数（默认使用配置中的 max_workers）")
+    execution.add_argument("--batch-size", type=int, default=1000,
+                           help="每批读取和写入的行数（默认 1000）")
+    execution.add_argument("--params",
+                           help="带表头的 CSV 参数文件（- 表示标准输入），语句以 :列名 引用参数，"
+                                "在每个连接上批量执行，空字段作为 NULL")
+    execution.add_argument("--chunk-size", type=int,
+                           help="批量执行时每个事务提交的参数行数（默认使用配置中的 bulk_chunk_size）")
+    execution.add_argument("--continue-on-error", action="store_true",
+                           help="某个连接失败时继续执行其他连接")
+    execution.add_argument("--config", help="配置文件路径（默认 ~/.sqlexec/config.toml）")
+
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出执行摘要")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    return parser
+
+
+def read_query(args: argparse.Namespace) -> str:
+    """读取要执行的 SQL"""
+    if args.execute is not None:
+        query = args.execute
+    elif args.file == "-":
+        query = sys.stdin.read()
+    else:
+        try:
+            query = Path(args.file).read_text(encoding="utf-8-sig")
+        except OSError as e:
+            raise UsageError(f"无法读取 SQL 文件: {e}") from None
+    query = query.strip()
+    if not query:
+        raise UsageError("SQL 为空")
+    return query
+
+
+def resolve_connections(settings, groups: List[str], connections: List[str]) -> List[str]:
+    """
+    将组和连接别名解析为去重后的连接列表
+
+    Args:
+        settings: 设置
+        groups: 组名
+        connections: 连接别名
+
+    Returns:
+        List[str]: 连接别名，按指定顺序去重
+
+    Raises:
+        UsageError: 组或连接不存在，或者没有指定任何连接
+    """
+    aliases: List[str] = []
+    for name in groups:
+        if name not in settings.groups:
+            raise UsageError(f"组不存在: {name}")
+        aliases.extend(settings.get_group_connections(name))
+    for alias in connections:
+        if alias not in settings.connections:
+            raise UsageError(f"连接不存在: {alias}")
+        aliases.append(alias)
+    aliases = list(dict.fromkeys(aliases))
+    if not aliases:
+        raise UsageError("没有可执行的连接，请使用 --group 或 --connection 指定")
+    return aliases
+
+
+def create_db_manager(settings):
+    """创建数据库管理器并加载配置中的连接"""
+    from sqlexec.core.db_manager import DatabaseManager
+    db_manager = DatabaseManager()
+    db_manager.sync_connections(settings.get_connection_configs())
+    execution = settings.execution
+    db_manager.configure_spill(execution.memory_budget_mb, execution.spill_directory)
+    db_manager.configure_resilience(
+        execution.retry_attempts, execution.retry_base_delay, execution.retry_max_delay,
+        execution.circuit_failure_threshold, execution.circuit_reset_timeout)
+    db_manager.configure_shared_pools(execution.share_server_pools)
+    db_manager.configure_metrics(execution.metrics_format, execution.metrics_directory)
+    return db_manager
+
+
+def fanout_limits(settings) -> Dict[str, int]:
+    """组和数据库服务器的并发上限，键为 ``group:组名`` 和 ``host:主机:端口``"""
+    from sqlexec.core.fanout import build_limits
+    return build_limits(settings.get_group_worker_limits(), settings.get_host_limits())
+
+
+def fanout_keys(settings, alias: str) -> List[str]:
+    """连接所属组和服务器的限流键"""
+    from sqlexec.core.fanout import limit_keys
+    return limit_keys({"groups": settings.get_connection_groups(alias),
+                       "host": settings.get_connection_host(alias)})
+
+
+def run_bulk(args: argparse.Namespace, settings, statement: str, aliases: List[str]) -> int:
+    """
+    使用参数文件在各连接上批量执行同一条语句
+
+    Args:
+        args: 解析后的参数
+        settings: 设置
+        statement: 使用 ``:name`` 命名参数的SQL语句
+        aliases: 连接别名
+
+    Returns:
+        int: 退出码
+    """
+    if args.params == "-" and args.file == "-":
+        raise UsageError("SQL 和参数文件不能同时从标准输入读取")
+    from sqlexec.core.bulk import BulkExecutor, read_csv_params
+    try:
+        params = read_csv_params(args.params)
+    except (OSError, ValueError) as e:
+        raise UsageError(f"无法读取参数文件: {e}") from None
+
+    execution = settings.execution
+    db_manager = create_db_manager(settings)
+    executor = BulkExecutor(
+        db_manager,
+        chunk_size=args.chunk_size or execution.bulk_chunk_size,
+        max_workers=args.workers or execution.max_workers,
+        limits=fanout_limits(settings)
+    )
+    try:
+        results = executor.run(
+            aliases, statement, params,
+            keys_of=lambda alias: fanout_keys(settings, alias),
+            stop_on_error=not args.continue_on_error
+        )
+    finally:
+        db_manager.clear_all_connections()
+
+    failed = [result for result in results if not result.ok]
+    for result in results:
+        if not result.ok or not args.quiet:
+            print(result.summary(), file=sys.stderr)
+    skipped = len(aliases) - len(results)
+    if skipped:
+        print(f"有 {skipped} 个连接未执行", file=sys.stderr)
+    return EXIT_FAILED if failed or skipped else EXIT_OK
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    执行命令
+
+    Args:
+        args: 解析后的参数
+
+    Returns:
+        int: 退出码
+    """
+    logger = logging.getLogger(__name__)
+    config_file = Path(args.config) if args.config else None
+    if config_file is not None and not config_file.exists():
+        raise UsageError(f"配置文件不存在: {config_file}")
+    settings = ConfigManager(config_file).settings
+
+    query = read_query(args)
+    aliases = resolve_connections(settings, args.group, args.connection)
+    if args.params:
+        return run_bulk(args, settings, query, aliases)
+
+    merge = args.merge or args.output is None
+    target = args.output or "-"
+    if target == "-" and args.format == "parquet":
+        raise UsageError("Parquet 格式需要使用 --output 指定输出文件")
+
+    # 数据库相关模块在参数检查通过后才导入
+    from sqlexec.core.export import ExportStopped, ResultExporter
+    from sqlexec.core.metrics import run_summary
+
+    db_manager = create_db_manager(settings)
+    execution = settings.execution
+
+    try:
+        exporter = ResultExporter(
+            db_manager,
+            args.format,
+            batch_size=args.batch_size,
+            max_workers=args.workers or execution.max_workers,
+            limits=fanout_limits(settings)
+        )
+    except (ValueError, RuntimeError) as e:
+        raise UsageError(str(e)) from None
+
+    last_progress = []
+    logger.info(f"在 {len(aliases)} 个连接上执行: {query}")
+    try:
+        paths = exporter.export(
+            aliases, query, target, merge,
+            on_progress=last_progress.append if not args.quiet else None,
+            keys_of=lambda alias: fanout_keys(settings, alias),
+            stop_on_error=not args.continue_on_error
+        )
+    except (ExportStopped, RuntimeError) as e:
+        print(str(e), file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        db_manager.clear_all_connections()
+
+    if not args.quiet:
+        if last_progress:
+            print(last_progress[-1].summary(), file=sys.stderr)
+        summary = run_summary(exporter.metrics[alias] for alias in aliases if alias in exporter.metrics)
+        if summary:
+            print(f"执行统计: {summary}", file=sys.stderr)
+        for path in paths:
+            if path != "-":
+                print(f"已写入: {path}", file=sys.stderr)
+    return EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数，默认使用 sys.argv[1:]
+
+    Returns:
+        int: 退出码
+    """
+    args = build_parser().parse_args(argv)
+    setup_logger(console_level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        return run(args)
+    except UsageError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
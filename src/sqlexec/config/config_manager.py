@@ -8,10 +8,20 @@ from sqlexec.config.settings import Settings
 
 
 class ConfigManager:
-    def __init__(self):
+    def __init__(self, config_file: Optional[Path] = None):
+        """
+        初始化配置管理器
+
+        Args:
+            config_file: 配置文件路径，默认为 ~/.sqlexec/config.toml
+        """
         self.logger = logging.getLogger(__name__)
-        self.config_dir = Path.home() / ".sqlexec"
-        self.config_file = self.config_dir / "config.toml"
+        if config_file is None:
+            self.config_dir = Path.home() / ".sqlexec"
+            self.config_file = self.config_dir / "config.toml"
+        else:
+            self.config_file = Path(config_file)
+            self.config_dir = self.config_file.parent
         self.default_config_file = Path(
             __file__).parent / "default_config.toml"
         self._settings: Optional[Settings] = None
@@ -1,5 +1,18 @@
 from dataclasses import dataclass
 from typing import List, Dict
+from urllib.parse import unquote
+import re
+
+# 与 SQLAlchemy 相同的 URL 格式：驱动://用户名:密码@主机:端口/数据库?参数
+_URL_PATTERN = re.compile(
+    r"(?:[^:/]*://)?"
+    r"(?:[^:/]*(?::[^@]*)?@)?"
+    r"(?:\[(?P<ipv6host>[^/?]+)\]|(?P<host>[^/:?]+))?"
+    r"(?::(?P<port>[^/?]*))?"
+    r"(?:/[^?]*)?"
+    r"(?:\?(?P<query>.*))?$",
+    re.DOTALL
+)
 
 
 @dataclass
@@ -97,3 +110,44 @@ def build_connection_string(db_type: str, params: dict) -> str:
         p.name == k and p.required for p in db_type_info.parameters)}
 
     return db_type_info.connection_string_template.format(**clean_params)
+
+
+def parse_host(db_type: str, connection_string: str) -> str:
+    """
+    从连接字符串中解析数据库服务器地址
+
+    连接字符串可以省略驱动前缀；没有端口时使用数据库类型的默认端口。
+    PostgreSQL 也可以在 ``?host=`` 参数中指定主机。
+
+    Args:
+        db_type: 数据库类型
+        connection_string: 连接字符串
+
+    Returns:
+        str: 小写的 ``主机:端口``，SQLite 等本地数据库或无法解析时为空字符串
+    """
+    db_type_info = get_db_type(db_type.lower())
+    if not db_type_info or not any(p.name == "host" for p in db_type_info.parameters):
+        return ""
+    match = _URL_PATTERN.match(connection_string.strip())
+    if not match:
+        return ""
+    host = match.group("ipv6host") or match.group("host") or ""
+    port = match.group("port") or ""
+    if not host and match.group("query"):
+        for item in match.group("query").split("&"):
+            key, _, value = item.partition("=")
+            if key == "host":
+                host = value
+            elif key == "port" and not port:
+                port = value
+    # PostgreSQL 的多主机写法取第一个主机
+    host = unquote(host).split(",")[0].strip().lower()
+    port = port.split(",")[0].strip()
+    if not host:
+        return ""
+    if match.group("ipv6host"):
+        host = f"[{host}]"
+    if not port:
+        port = next((p.default for p in db_type_info.parameters if p.name == "port"), "")
+    return f"{host}:{port}" if port else host
@@ -1,18 +1,50 @@
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 from typing import List, Dict, Optional, Set
 from pathlib import Path
 import logging
 from .enums import Theme, Language, CloseAction
+from .db_types import parse_host
 
 logger = logging.getLogger(__name__)
 
 
+def _known_fields(cls, data: dict) -> dict:
+    """只保留数据类中存在的字段，忽略拼写错误或其他版本写入的未知字段"""
+    names = {f.name for f in fields(cls)}
+    unknown = sorted(key for key in data if key not in names)
+    if unknown:
+        logger.warning(f"忽略未知的{cls.__name__}设置项: {', '.join(unknown)}")
+    return {key: value for key, value in data.items() if key in names}
+
+
+@dataclass
+class PoolSettings:
+    """连接池设置"""
+    pool_size: int = 5  # 连接池保持的连接数
+    max_overflow: int = 10  # 连接池满后最多额外建立的连接数
+    pool_timeout: float = 30  # 等待空闲连接的超时（秒）
+    pool_recycle: int = 3600  # 连接使用超过该时间（秒）后重新建立，-1表示不回收
+    pre_ping: bool = True  # 使用连接前检测连接是否已断开
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional['PoolSettings']:
+        """从字典创建连接池设置，没有设置时返回None"""
+        if not data:
+            return None
+        return cls(**_known_fields(cls, data))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
 @dataclass
 class DatabaseConnection:
     name: str
     alias: str
     type: str
     connection_string: str
+    statement_timeout: float = 0  # 语句超时（秒），0表示使用所属组的设置
+    pool: Optional[PoolSettings] = None  # 连接池设置，None表示使用所属组的设置
 
 
 @dataclass
@@ -20,6 +52,10 @@ class GroupInfo:
     name: str
     description: str
     connections: Set[str] = field(default_factory=set)  # 存储连接的alias
+    max_workers: int = 0  # 组内最大并发数，0表示不限制
+    warm_up: bool = False  # 启动时在后台预热组内连接
+    statement_timeout: float = 0  # 组内连接的语句超时（秒），0表示不限制
+    pool: Optional[PoolSettings] = None  # 组内连接默认的连接池设置，None表示使用默认值
 
 
 @dataclass
@@ -29,12 +65,40 @@ class GeneralSettings:
     show_system_tray: bool = True
     enable_notifications: bool = True
     close_action: CloseAction = CloseAction.ASK
+    history_enabled: bool = True  # 是否保存查询历史
+    history_max_entries: int = 10000  # 最多保留的历史记录数，0表示不限制
+    history_retention_days: int = 90  # 历史记录保留的天数，0表示不限制
+
+
+@dataclass
+class ExecutionSettings:
+    max_workers: int = 8  # 查询最大并发数，1表示逐个执行
+    warm_up_workers: int = 4  # 后台预热连接的线程数
+    health_check_timeout: float = 5.0  # 健康检查单个连接的超时（秒）
+    health_check_samples: int = 5  # 健康检查往返延迟的采样次数
+    cache_enabled: bool = False  # 是否缓存只读查询的结果
+    cache_ttl: int = 300  # 缓存有效期（秒）
+    cache_max_mb: int = 256  # 缓存最大内存（MB）
+    memory_budget_mb: int = 1024  # 查询结果的内存预算（MB），超出后写入临时文件，0表示不限制
+    spill_directory: str = ""  # 临时文件目录，为空时使用系统临时目录
+    bulk_chunk_size: int = 1000  # 批量执行时每个事务提交的参数行数
+    retry_attempts: int = 3  # 查询遇到暂时性错误时最多执行的次数，1表示不重试
+    retry_base_delay: float = 0.2  # 第一次重试前的基准等待时间（秒），之后按指数增长
+    retry_max_delay: float = 5.0  # 重试等待时间的上限（秒）
+    circuit_failure_threshold: int = 3  # 连续连接失败多少次后暂停使用该连接，0表示不熔断
+    circuit_reset_timeout: float = 30.0  # 暂停使用后多少秒再次尝试连接
+    max_per_host: int = 4  # 同一数据库服务器（主机:端口）上同时执行的连接数，0表示不限制
+    host_limits: Dict[str, int] = field(default_factory=dict)  # 单独设置的服务器并发上限
+    share_server_pools: bool = False  # 同一 SQL Server/MySQL 服务器上的数据库共享连接池
+    metrics_format: str = "none"  # 执行统计的指标文件格式：none、prometheus、json 或 both
+    metrics_directory: str = ""  # 指标文件目录，为空时使用 ~/.sqlexec/metrics
 
 
 @dataclass
 class Settings:
     version: int = 2
     general: GeneralSettings = field(default_factory=GeneralSettings)
+    execution: ExecutionSettings = field(default_factory=ExecutionSettings)
     connections: Dict[str, DatabaseConnection] = field(
         default_factory=dict)  # 使用alias作为key
     groups: Dict[str, GroupInfo] = field(default_factory=dict)
@@ -58,7 +122,10 @@ class Settings:
         general_data["close_action"] = CloseAction(
             general_data.get("close_action", CloseAction.ASK.value))
 
-        general = GeneralSettings(**general_data)
+        general = GeneralSettings(**_known_fields(GeneralSettings, general_data))
+
+        # 执行设置
+        execution = ExecutionSettings(**_known_fields(ExecutionSettings, data.get("execution", {})))
 
         # 加载连接
         connections = {}
@@ -68,7 +135,9 @@ class Settings:
                 name=conn_data["name"],
                 alias=alias,
                 type=conn_data["type"],
-                connection_string=conn_data["connection_string"]
+                connection_string=conn_data["connection_string"],
+                statement_timeout=conn_data.get("statement_timeout", 0),
+                pool=PoolSettings.from_dict(conn_data.get("pool"))
             )
             connections[alias] = conn
 
@@ -78,12 +147,17 @@ class Settings:
             groups[name] = GroupInfo(
                 name=name,
                 description=info["description"],
-                connections=set(info.get("connections", []))
+                connections=set(info.get("connections", [])),
+                max_workers=info.get("max_workers", 0),
+                warm_up=info.get("warm_up", False),
+                statement_timeout=info.get("statement_timeout", 0),
+                pool=PoolSettings.from_dict(info.get("pool"))
             )
 
         return cls(
             version=2,  # 总是使用最新版本
             general=general,
+            execution=execution,
             connections=connections,
             groups=groups
         )
@@ -144,26 +218,62 @@ class Settings:
                 "language": self.general.language.value,
                 "show_system_tray": self.general.show_system_tray,
                 "enable_notifications": self.general.enable_notifications,
-                "close_action": self.general.close_action.value
+                "close_action": self.general.close_action.value,
+                "history_enabled": self.general.history_enabled,
+                "history_max_entries": self.general.history_max_entries,
+                "history_retention_days": self.general.history_retention_days
+            },
+            "execution": {
+                "max_workers": self.execution.max_workers,
+                "warm_up_workers": self.execution.warm_up_workers,
+                "health_check_timeout": self.execution.health_check_timeout,
+                "health_check_samples": self.execution.health_check_samples,
+                "cache_enabled": self.execution.cache_enabled,
+                "cache_ttl": self.execution.cache_ttl,
+                "cache_max_mb": self.execution.cache_max_mb,
+                "memory_budget_mb": self.execution.memory_budget_mb,
+                "spill_directory": self.execution.spill_directory,
+                "bulk_chunk_size": self.execution.bulk_chunk_size,
+                "retry_attempts": self.execution.retry_attempts,
+                "retry_base_delay": self.execution.retry_base_delay,
+                "retry_max_delay": self.execution.retry_max_delay,
+                "circuit_failure_threshold": self.execution.circuit_failure_threshold,
+                "circuit_reset_timeout": self.execution.circuit_reset_timeout,
+                "max_per_host": self.execution.max_per_host,
+                "host_limits": dict(self.execution.host_limits),
+                "share_server_pools": self.execution.share_server_pools,
+                "metrics_format": self.execution.metrics_format,
+                "metrics_directory": self.execution.metrics_directory
             },
             "connections": [
-                {
+                self._with_pool({
                     "name": conn.name,
                     "alias": conn.alias,
                     "type": conn.type,
-                    "connection_string": conn.connection_string
-                }
+                    "connection_string": conn.connection_string,
+                    "statement_timeout": conn.statement_timeout
+                }, conn.pool)
                 for conn in self.connections.values()
             ],
             "groups": {
-                name: {
+                name: self._with_pool({
                     "description": group.description,
-                    "connections": list(group.connections)
-                }
+                    "connections": list(group.connections),
+                    "max_workers": group.max_workers,
+                    "warm_up": group.warm_up,
+                    "statement_timeout": group.statement_timeout
+                }, group.pool)
                 for name, group in self.groups.items()
             }
         }
 
+    @staticmethod
+    def _with_pool(data: dict, pool: Optional[PoolSettings]) -> dict:
+        """有连接池设置时写入 pool 表，TOML 无法表示 None"""
+        if pool is not None:
+            data["pool"] = pool.to_dict()
+        return data
+
     def add_connection_to_group(self, group_name: str, connection_alias: str) -> bool:
         """将连接添加到组"""
         if group_name not in self.groups or connection_alias not in self.connections:
@@ -178,6 +288,83 @@ class Settings:
         self.groups[group_name].connections.discard(connection_alias)
         return True
 
+    def get_group_worker_limits(self) -> Dict[str, int]:
+        """获取各组的并发上限"""
+        return {
+            name: group.max_workers for name, group in self.groups.items()
+            if group.max_workers > 0
+        }
+
+    def get_host_limits(self) -> Dict[str, int]:
+        """获取各数据库服务器的并发上限，键为 ``主机:端口``，单独设置的上限优先"""
+        overrides = {host.lower(): cap for host, cap in self.execution.host_limits.items()}
+        limits = {}
+        for alias in self.connections:
+            host = self.get_connection_host(alias)
+            if host:
+                cap = overrides.get(host, self.execution.max_per_host)
+                if cap > 0:
+                    limits[host] = cap
+        return limits
+
+    def get_connection_host(self, connection_alias: str) -> str:
+        """获取连接所在的数据库服务器（主机:端口），本地数据库为空字符串"""
+        conn = self.connections.get(connection_alias)
+        if conn is None:
+            return ""
+        return parse_host(conn.type, conn.connection_string)
+
+    def get_warm_up_connections(self) -> List[str]:
+        """获取需要在启动时预热的连接"""
+        aliases = set()
+        for group in self.groups.values():
+            if group.warm_up:
+                aliases.update(group.connections)
+        return sorted(alias for alias in aliases if alias in self.connections)
+
+    def get_connection_configs(self) -> Dict[str, Dict]:
+        """获取交给数据库管理器的连接配置，以alias为key"""
+        return {
+            conn.alias: {
+                "name": conn.name,
+                "alias": conn.alias,
+                "type": conn.type,
+                "connection_string": conn.connection_string,
+                "groups": self.get_connection_groups(conn.alias),
+                "host": self.get_connection_host(conn.alias),
+                "statement_timeout": self.get_statement_timeout(conn.alias),
+                "pool": self.get_pool_settings(conn.alias).to_dict()
+            }
+            for conn in self.connections.values()
+        }
+
+    def get_statement_timeout(self, connection_alias: str) -> float:
+        """获取连接的语句超时（秒）：连接自身的设置优先，否则取所属组中最短的超时，0表示不限制"""
+        conn = self.connections.get(connection_alias)
+        if conn is not None and conn.statement_timeout > 0:
+            return conn.statement_timeout
+        timeouts = [group.statement_timeout for group in self.groups.values()
+                    if connection_alias in group.connections and group.statement_timeout > 0]
+        return min(timeouts, default=0)
+
+    def get_pool_settings(self, connection_alias: str) -> PoolSettings:
+        """获取连接的连接池设置：连接自身的设置优先，否则取按组名排序后第一个设置了连接池的组"""
+        conn = self.connections.get(connection_alias)
+        if conn is not None and conn.pool is not None:
+            return conn.pool
+        for name in sorted(self.groups):
+            group = self.groups[name]
+            if group.pool is not None and connection_alias in group.connections:
+                return group.pool
+        return PoolSettings()
+
+    def get_group_connections(self, group_name: str) -> List[str]:
+        """获取组内存在的连接，按别名排序"""
+        group = self.groups.get(group_name)
+        if group is None:
+            return []
+        return sorted(alias for alias in group.connections if alias in self.connections)
+
     def get_connection_groups(self, connection_alias: str) -> List[str]:
         """获取连接所属的所有组"""
         return [
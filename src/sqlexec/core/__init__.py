@@ -1,5 +1,47 @@
-"""SQL Exec 核心组件"""
+"""SQL Exec 核心组件
 
-from .db_manager import DatabaseManager
+组件在第一次访问时才导入，导入本包不会加载 SQLAlchemy 等依赖。
+"""
 
-__all__ = ['DatabaseManager']
+import importlib
+from typing import Any
+
+# 组件名称到所在模块的映射
+_EXPORTS = {
+    'DatabaseManager': '.db_manager',
+    'FanOutRunner': '.fanout',
+    'ResultSet': '.result_set',
+    'HealthChecker': '.health',
+    'HealthResult': '.health',
+    'ResultCache': '.result_cache',
+    'MergedStream': '.merge',
+    'concat_results': '.merge',
+    'AggregateCombiner': '.aggregate',
+    'plan_aggregate': '.aggregate',
+    'MemoryBudget': '.spill',
+    'SpilledResultSet': '.spill',
+    'ResultExporter': '.export',
+    'export_result': '.export',
+    'split_statements': '.sql_splitter',
+    'statement_type': '.sql_splitter',
+    'StatementResult': '.script',
+    'BulkExecutor': '.bulk',
+    'RetryPolicy': '.resilience',
+    'CircuitBreaker': '.resilience',
+    'PoolStats': '.pool',
+    'QueryMetrics': '.metrics',
+    'MetricsRegistry': '.metrics',
+    'QueryHistory': '.history',
+    'HistoryEntry': '.history',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
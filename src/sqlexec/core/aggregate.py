@@ -0,0 +1,425 @@
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import re
+import unicodedata
+
+from sqlexec.core.merge import (
+    BINARY_COLLATION_TYPES, SQL_TOKEN_PATTERN, OrderItem, make_sort_key, parse_order_by
+)
+from sqlexec.core.result_set import ResultSet
+
+# 可以在各连接上先部分聚合、再在本地合并的聚合函数
+AGGREGATE_FUNCTIONS = {"COUNT", "SUM", "MIN", "MAX", "AVG"}
+# 出现在最外层时无法按部分聚合正确合并的子句
+_UNSUPPORTED_CLAUSES = {
+    "HAVING": "HAVING 条件需要在合并后的结果上计算",
+    "LIMIT": "LIMIT 会截断各连接的部分聚合结果",
+    "OFFSET": "OFFSET 会截断各连接的部分聚合结果",
+    "FETCH": "FETCH 会截断各连接的部分聚合结果",
+    "TOP": "TOP 会截断各连接的部分聚合结果",
+    "UNION": "不支持 UNION 查询",
+    "INTERSECT": "不支持 INTERSECT 查询",
+    "EXCEPT": "不支持 EXCEPT 查询",
+}
+# 结尾是这些关键字时不视为列别名
+_NON_ALIAS_KEYWORDS = {"END", "NULL", "TRUE", "FALSE", "ASC", "DESC", "DISTINCT"}
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][\w$#@]*$")
+_OPERATOR_CHARS = set("+-*/%=<>|&^~!:.")
+# 默认排序规则可能不区分大小写和重音的数据库，各连接上只有大小写不同的值属于同一分组
+_INSENSITIVE_COLLATION_TYPES = ("mssql", "mysql")
+_AVG_SUM_ALIAS = "__sqlexec_avg_sum_{}"
+_AVG_COUNT_ALIAS = "__sqlexec_avg_count_{}"
+
+
+class _Token:
+    """带位置和括号深度的词法单元"""
+
+    __slots__ = ("text", "start", "end", "depth")
+
+    def __init__(self, text: str, start: int, end: int, depth: int):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.depth = depth
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper()
+
+
+def _tokenize(query: str) -> List[_Token]:
+    """拆分语句，跳过注释和空白"""
+    tokens: List[_Token] = []
+    depth = 0
+    for match in SQL_TOKEN_PATTERN.finditer(query):
+        quoted, comment, punct, space, word = match.groups()
+        if comment or space:
+            continue
+        text = quoted or punct or word
+        if text == ")":
+            depth -= 1
+        tokens.append(_Token(text, match.start(), match.end(), depth))
+        if text == "(":
+            depth += 1
+    return tokens
+
+
+def _is_identifier(token: _Token) -> bool:
+    """判断是否是标识符（含带引号的标识符）"""
+    if token.text[0] in "\"`[":
+        return True
+    return bool(_IDENTIFIER_PATTERN.match(token.text)) and token.upper not in _NON_ALIAS_KEYWORDS
+
+
+def _unquote(name: str) -> str:
+    """去掉标识符的引号"""
+    if len(name) >= 2 and name[0] + name[-1] in ('""', '``', '[]'):
+        return name[1:-1]
+    return name
+
+
+class AggregateColumn:
+    """聚合查询结果中的一列"""
+
+    def __init__(self, expression: str, function: Optional[str], argument: str = "",
+                 alias: Optional[str] = None):
+        self.expression = expression  # 原始表达式（不含别名）
+        self.function = function  # 聚合函数，分组列为None
+        self.argument = argument  # 聚合函数的参数
+        self.alias = alias  # 列别名
+        self.indices: List[int] = []  # 对应的部分聚合结果列
+
+    @property
+    def is_key(self) -> bool:
+        """是否是分组列"""
+        return self.function is None
+
+    def __repr__(self) -> str:
+        return f"AggregateColumn({self.expression!r}, function={self.function!r})"
+
+
+class AggregatePlan:
+    """分布式聚合的执行计划
+
+    ``query`` 是发送到各个连接的部分聚合语句，AVG 被改写为 SUM 和 COUNT，
+    其余列保持不变。各连接只返回按分组汇总后的少量行。
+    """
+
+    def __init__(self, query: str, columns: List[AggregateColumn],
+                 order_items: List[OrderItem]):
+        self.query = query
+        self.columns = columns
+        self.order_items = order_items
+
+    @property
+    def key_indices(self) -> List[int]:
+        """分组列在部分聚合结果中的位置"""
+        return [column.indices[0] for column in self.columns if column.is_key]
+
+
+def _split_select_list(tokens: List[_Token]) -> Tuple[int, int, List[List[_Token]]]:
+    """
+    找到最外层 SELECT 的列表达式
+
+    Returns:
+        Tuple[int, int, List[List[_Token]]]: 列表的起止位置（词法单元序号）和每一列的词法单元
+    """
+    start = next((i for i, token in enumerate(tokens)
+                  if token.depth == 0 and token.upper == "SELECT"), None)
+    if start is None:
+        raise ValueError("只支持 SELECT 聚合查询")
+    start += 1
+    while start < len(tokens) and tokens[start].upper in ("DISTINCT", "ALL"):
+        start += 1
+
+    end = start
+    while end < len(tokens):
+        token = tokens[end]
+        if token.depth == 0 and (token.upper == "FROM" or token.text == ";"):
+            break
+        end += 1
+
+    items: List[List[_Token]] = [[]]
+    for token in tokens[start:end]:
+        if token.depth == 0 and token.text == ",":
+            items.append([])
+        else:
+            items[-1].append(token)
+    if not all(items):
+        raise ValueError("无法解析 SELECT 列表")
+    return start, end, items
+
+
+def _parse_column(query: str, item: List[_Token]) -> AggregateColumn:
+    """解析一个列表达式"""
+    alias = None
+    if len(item) >= 3 and item[-2].upper == "AS":
+        alias = item[-1].text
+        item = item[:-2]
+    elif (len(item) >= 2 and item[-1].depth == 0 and _is_identifier(item[-1])
+          and item[-2].text[-1] not in _OPERATOR_CHARS and item[-2].text != "("
+          and item[-2].upper not in ("CASE", "WHEN", "THEN", "ELSE", "AND", "OR",
+                                     "NOT", "IS", "IN", "LIKE", "BETWEEN")):
+        alias = item[-1].text
+        item = item[:-1]
+
+    expression = query[item[0].start:item[-1].end]
+    function = item[0].upper
+    if (function in AGGREGATE_FUNCTIONS and len(item) >= 3 and item[1].text == "("
+            and item[-1].text == ")" and item[-1].depth == 0
+            and all(token.depth > 0 for token in item[2:-1])):
+        inner = item[2:-1]
+        if not inner:
+            raise ValueError(f"聚合函数缺少参数: {expression}")
+        if inner[0].upper in ("DISTINCT", "ALL"):
+            if inner[0].upper == "DISTINCT":
+                raise ValueError(f"{function}(DISTINCT ...) 无法由各连接的部分结果合并: {expression}")
+            inner = inner[1:]
+        argument = query[inner[0].start:inner[-1].end]
+        return AggregateColumn(expression, function, argument, alias)
+
+    for i, token in enumerate(item[:-1]):
+        if token.upper in AGGREGATE_FUNCTIONS and item[i + 1].text == "(":
+            raise ValueError(f"不支持嵌套在表达式中的聚合函数: {expression}")
+    return AggregateColumn(expression, None, alias=alias)
+
+
+def plan_aggregate(query: str) -> AggregatePlan:
+    """
+    为聚合查询生成分布式执行计划
+
+    支持以 COUNT、SUM、MIN、MAX、AVG 作为整列表达式的 SELECT 语句，
+    其余列视为分组列。
+
+    Args:
+        query: SQL语句
+
+    Returns:
+        AggregatePlan: 执行计划
+
+    Raises:
+        ValueError: 语句不是可以分布式合并的聚合查询
+    """
+    tokens = _tokenize(query)
+    for token in tokens:
+        if token.depth == 0 and token.upper in _UNSUPPORTED_CLAUSES:
+            raise ValueError(_UNSUPPORTED_CLAUSES[token.upper])
+
+    start, end, items = _split_select_list(tokens)
+    columns = [_parse_column(query, item) for item in items]
+    if all(column.is_key for column in columns):
+        raise ValueError("语句中没有可合并的聚合函数（COUNT、SUM、MIN、MAX、AVG）")
+
+    # 改写 SELECT 列表：AVG 拆成 SUM 和 COUNT，其余列保持原样
+    parts: List[str] = []
+    for i, (column, item) in enumerate(zip(columns, items)):
+        column.indices = [len(parts)]
+        if column.function != "AVG":
+            parts.append(query[item[0].start:item[-1].end])
+            continue
+        sum_alias = column.alias or _AVG_SUM_ALIAS.format(i)
+        parts.append(f"SUM({column.argument}) AS {sum_alias}")
+        column.indices.append(len(parts))
+        parts.append(f"COUNT({column.argument}) AS {_AVG_COUNT_ALIAS.format(i)}")
+
+    list_start = tokens[start].start
+    list_end = tokens[end - 1].end
+    rewritten = query[:list_start] + ", ".join(parts) + query[list_end:]
+    return AggregatePlan(rewritten, columns, parse_order_by(query))
+
+
+def _add(a: Any, b: Any) -> Any:
+    """相加，忽略NULL，类型不兼容时按浮点数计算（例如 Decimal 和 float）"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return a + b
+    except TypeError:
+        return float(a) + float(b)
+
+
+def _less(a: Any, b: Any) -> bool:
+    """比较大小，类型不兼容时按字符串比较"""
+    try:
+        return a < b
+    except TypeError:
+        return str(a) < str(b)
+
+
+def _fold(text: str) -> str:
+    """去掉大小写和重音差异，近似不区分大小写和重音的排序规则"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _fold_key(key: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    return tuple(_fold(value) if value.__class__ is str else value for value in key)
+
+
+class AggregateCombiner:
+    """合并各连接的部分聚合结果
+
+    每收到一个连接的结果就更新各分组的累计值，可以随时通过
+    :meth:`result` 得到当前的全局结果。
+
+    分组和 MIN/MAX 在本地按 Python 的相等和大小比较，与数据库的排序规则不一定一致：
+    SQL Server、MySQL 的默认排序规则通常不区分大小写（'A' 和 'a' 是同一分组），
+    PostgreSQL 等按语言排序文本。合并时发现只有大小写或重音不同的分组，或者文本的
+    MIN/MAX 按本地比较与不区分大小写的比较结果不同时，抛出异常而不是给出错误的结果。
+    """
+
+    def __init__(self, plan: AggregatePlan):
+        self.plan = plan
+        self.shards = 0  # 已合并的连接数
+        self.partial_rows = 0  # 已合并的部分聚合行数
+        self.logger = logging.getLogger(__name__)
+        self._names: List[str] = []
+        self._groups: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._db_type = ""  # 第一个连接的数据库类型，决定排序时 NULL 的默认位置
+        self._folded: Dict[Tuple[Any, ...], Tuple[Any, ...]] = {}  # 去掉大小写和重音后的分组键
+        self._collision: Optional[Tuple[Tuple[Any, ...], Tuple[Any, ...]]] = None
+        self._insensitive = False  # 是否合并过排序规则可能不区分大小写的连接
+
+    def add(self, result: ResultSet, db_type: str = "") -> None:
+        """
+        合并一个连接的部分聚合结果
+
+        Args:
+            result: 部分聚合语句的查询结果
+            db_type: 该连接的数据库类型
+
+        Raises:
+            ValueError: 结果列与执行计划不一致，或者文本分组、MIN/MAX 无法在本地正确合并
+        """
+        expected = sum(len(column.indices) for column in self.plan.columns)
+        if len(result.columns) != expected:
+            raise ValueError("部分聚合结果的列数与查询不一致")
+        if not self._names:
+            self._names = self._column_names(result.columns)
+        db_type = (db_type or "").lower()
+        if not self.shards:
+            self._db_type = db_type
+        self._insensitive = self._insensitive or db_type in _INSENSITIVE_COLLATION_TYPES
+        binary = db_type in BINARY_COLLATION_TYPES
+
+        key_indices = self.plan.key_indices
+        for row in result:
+            key = tuple(row[index] for index in key_indices)
+            state = self._groups.get(key)
+            if state is None:
+                state = self._groups[key] = [None] * len(self.plan.columns)
+                self._check_key(key)
+            for i, column in enumerate(self.plan.columns):
+                state[i] = self._accumulate(column, state[i], row, binary)
+        if self._insensitive and self._collision is not None:
+            first, second = self._collision
+            raise ValueError(f"分组 {first} 和 {second} 只有大小写或重音不同，"
+                             f"数据库的排序规则可能把它们视为同一分组，无法在本地正确合并；"
+                             f"请在 GROUP BY 中使用区分大小写的排序规则（COLLATE），或改为分别显示")
+        self.shards += 1
+        self.partial_rows += len(result)
+
+    def _check_key(self, key: Tuple[Any, ...]) -> None:
+        """记录只有大小写或重音不同的文本分组键"""
+        if not any(value.__class__ is str for value in key):
+            return
+        folded = _fold_key(key)
+        existing = self._folded.setdefault(folded, key)
+        if existing != key and self._collision is None:
+            self._collision = (existing, key)
+
+    @classmethod
+    def _accumulate(cls, column: AggregateColumn, current: Any, row: Tuple[Any, ...],
+                    binary: bool = True) -> Any:
+        """更新一列的累计值"""
+        value = row[column.indices[0]]
+        function = column.function
+        if function is None:
+            return value
+        if function == "COUNT":
+            return _add(current or 0, value or 0)
+        if function == "SUM":
+            return _add(current, value)
+        if function == "AVG":
+            total, count = current or (None, 0)
+            return (_add(total, value), count + (row[column.indices[1]] or 0))
+        if value is None:
+            return current
+        if current is None:
+            return value
+        if not binary and value.__class__ is str and current.__class__ is str:
+            cls._check_text_order(column, value, current)
+        if function == "MIN":
+            return value if _less(value, current) else current
+        return current if _less(value, current) else value
+
+    @staticmethod
+    def _check_text_order(column: AggregateColumn, a: str, b: str) -> None:
+        """文本的大小取决于排序规则，本地比较与不区分大小写和重音的比较结果不同时无法确定"""
+        folded_a, folded_b = _fold(a), _fold(b)
+        if a != b and (folded_a == folded_b or (a < b) != (folded_a < folded_b)):
+            raise ValueError(f"{column.expression} 的结果取决于数据库的排序规则"
+                             f"（{a!r} 与 {b!r} 的大小可能不区分大小写或重音），无法在本地正确合并")
+
+    def _column_names(self, partial_columns: List[str]) -> List[str]:
+        """确定合并结果的列名"""
+        names = []
+        for column in self.plan.columns:
+            if column.alias:
+                names.append(_unquote(column.alias))
+            elif column.function == "AVG":
+                names.append(column.expression)
+            else:
+                names.append(partial_columns[column.indices[0]] or column.expression)
+        return names
+
+    def result(self) -> ResultSet:
+        """
+        获取当前的全局聚合结果
+
+        Returns:
+            ResultSet: 合并后的结果，语句带 ORDER BY 时按其排序
+        """
+        rows = []
+        for state in self._groups.values():
+            row = []
+            for column, value in zip(self.plan.columns, state):
+                if column.function == "AVG":
+                    total, count = value
+                    value = total / count if count and total is not None else None
+                row.append(value)
+            rows.append(tuple(row))
+
+        names = self._names or [column.alias or column.expression for column in self.plan.columns]
+        self._sort(rows, names)
+        return ResultSet.from_rows(names, rows).compact()
+
+    def _sort(self, rows: List[Tuple[Any, ...]], names: List[str]) -> None:
+        """按最外层 ORDER BY 排序，排序项可以是列名、别名、列序号或聚合表达式"""
+        items = self.plan.order_items
+        if not items:
+            return
+
+        def normalize(text: str) -> str:
+            return re.sub(r"\s+", "", _unquote(text)).lower()
+
+        lookup: Dict[str, int] = {}
+        for i, column in enumerate(self.plan.columns):
+            lookup.setdefault(normalize(column.expression), i)
+            lookup.setdefault(normalize(column.expression.split(".")[-1]), i)
+        for i, name in enumerate(names):
+            lookup.setdefault(normalize(name), i)
+
+        indices = []
+        for item in items:
+            expression = item.expression.strip()
+            if expression.isdigit() and 0 < int(expression) <= len(names):
+                indices.append(int(expression) - 1)
+            elif normalize(expression) in lookup:
+                indices.append(lookup[normalize(expression)])
+            else:
+                self.logger.debug(f"排序表达式不在聚合结果中，保持合并顺序: {item.expression}")
+                return
+        rows.sort(key=make_sort_key(indices, items, self._db_type))
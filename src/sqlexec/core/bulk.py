@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import csv
+import logging
+import sys
+import time
+
+from sqlexec.core.db_manager import DatabaseManager, DEFAULT_BATCH_SIZE
+from sqlexec.core.fanout import FanOutRunner
+
+
+@dataclass
+class BulkResult:
+    """单个连接的批量执行结果"""
+    alias: str
+    ok: bool
+    rows: int  # 已提交的参数行数
+    elapsed_ms: float
+    error: str = ""
+
+    def summary(self) -> str:
+        """简短的结果描述"""
+        if not self.ok:
+            return f"{self.alias}: 失败，{self.error}"
+        return f"{self.alias}: 提交 {self.rows} 行，耗时 {self.elapsed_ms:.0f}ms"
+
+
+def read_csv_params(path: str, null_value: Optional[str] = "") -> List[Dict[str, Any]]:
+    """
+    从带表头的CSV文件读取参数行，表头为参数名
+
+    Args:
+        path: CSV文件路径，``-`` 表示标准输入
+        null_value: 等于该值的字段作为NULL，为None时保留所有字符串
+
+    Returns:
+        List[Dict[str, Any]]: 参数行
+
+    Raises:
+        OSError: 无法读取文件
+        ValueError: 文件格式错误、没有表头或某行的字段数与表头不一致
+    """
+    def load(stream) -> List[Dict[str, Any]]:
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames:
+            raise ValueError("参数文件没有表头")
+        rows = []
+        for row in reader:
+            if None in row or None in row.values():
+                raise ValueError(f"参数文件第 {reader.line_num} 行的字段数与表头不一致")
+            if null_value is not None:
+                row = {key: None if value == null_value else value for key, value in row.items()}
+            rows.append(row)
+        return rows
+
+    try:
+        if path == "-":
+            return load(sys.stdin)
+        with open(path, newline="", encoding="utf-8-sig") as stream:
+            return load(stream)
+    except csv.Error as e:
+        raise ValueError(f"参数文件格式错误: {e}") from None
+
+
+class BulkExecutor:
+    """在多个连接上并发执行批量DML
+
+    每个连接使用 :meth:`DatabaseManager.execute_many` 分批提交，
+    连接之间按 :class:`FanOutRunner` 的并发和限流设置并行执行。
+    """
+
+    def __init__(self, db_manager: DatabaseManager, chunk_size: int = DEFAULT_BATCH_SIZE,
+                 max_workers: int = 8, limits: Optional[Dict[str, int]] = None):
+        """
+        初始化批量执行器
+
+        Args:
+            db_manager: 数据库管理器
+            chunk_size: 每个事务提交的参数行数
+            max_workers: 同时执行的连接数
+            limits: 限流键对应的并发上限，参见 :class:`FanOutRunner`
+        """
+        self.db_manager = db_manager
+        self.chunk_size = max(1, int(chunk_size))
+        self.logger = logging.getLogger(__name__)
+        self._runner = FanOutRunner(max_workers, limits)
+
+    def stop(self) -> None:
+        """不再开始新的连接，正在执行的连接继续完成"""
+        self._runner.stop()
+
+    def run(self, aliases: List[str], statement: str, params: Sequence[Dict[str, Any]],
+            keys_of: Optional[Callable[[str], Iterable[str]]] = None,
+            on_done: Optional[Callable[[BulkResult], None]] = None,
+            on_rows: Optional[Callable[[int], None]] = None,
+            stop_on_error: bool = False) -> List[BulkResult]:
+        """
+        在所有连接上批量执行
+
+        Args:
+            aliases: 连接别名列表
+            statement: 使用 ``:name`` 命名参数的SQL语句
+            params: 参数行，所有连接共用
+            keys_of: 返回连接的限流键
+            on_done: 单个连接完成后调用，在调用线程中执行
+            on_rows: 每提交一批后调用，参数为该批行数，在工作线程中执行
+            stop_on_error: 某个连接失败时是否停止开始其他连接
+
+        Returns:
+            List[BulkResult]: 与 aliases 顺序一致的结果，未开始的连接不包含在内
+        """
+        def run_one(alias: str) -> BulkResult:
+            started = time.perf_counter()
+            success, rows, error = self.db_manager.execute_many(
+                alias, statement, params, self.chunk_size, on_rows)
+            return BulkResult(alias, success, rows, (time.perf_counter() - started) * 1000, error)
+
+        def finished(index: int, alias: str, result: BulkResult) -> None:
+            if not result.ok and stop_on_error:
+                self.stop()
+            if on_done:
+                on_done(result)
+
+        self.logger.info(f"在 {len(aliases)} 个连接上批量执行 {len(params)} 组参数")
+        results = self._runner.run(aliases, run_one, keys_of, finished)
+        return [result for result in results if result is not None]
@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Optional
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 有服务端语句超时的数据库，本地计时器在超时后再等待这么多秒才取消，作为兜底
+TIMEOUT_GRACE = 2.0
+
+
+class QueryInterrupted(Exception):
+    """查询在执行过程中被中断"""
+
+
+class QueryCanceled(QueryInterrupted):
+    """查询被用户取消"""
+
+    def __init__(self, message: str = "查询已取消"):
+        super().__init__(message)
+
+
+class QueryTimeout(QueryInterrupted):
+    """查询超出语句超时"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"查询超时（{timeout:g} 秒）")
+        self.timeout = timeout
+
+
+def make_canceller(db_type: str, dbapi_connection: Any,
+                   kill_query: Callable[[int], None]) -> Optional[Callable[[], None]]:
+    """
+    生成中断连接上正在执行语句的函数，可以在其他线程中调用
+
+    - SQLite：``interrupt()``
+    - PostgreSQL（psycopg2）：``cancel()`` 发送取消请求
+    - MySQL：通过新连接执行 ``KILL QUERY <线程ID>``
+    - SQL Server（pymssql）：``cancel()`` 发送 attention 信号
+
+    Args:
+        db_type: 数据库类型
+        dbapi_connection: 正在执行语句的DBAPI连接
+        kill_query: 使用新连接终止指定线程ID的语句，MySQL使用
+
+    Returns:
+        Optional[Callable[[], None]]: 取消函数，驱动不支持时为None
+    """
+    db_type = db_type.lower()
+    if db_type == "sqlite":
+        return getattr(dbapi_connection, "interrupt", None)
+    if db_type == "postgresql":
+        return getattr(dbapi_connection, "cancel", None)
+    if db_type == "mysql":
+        thread_id = getattr(dbapi_connection, "thread_id", None)
+        if thread_id is None:
+            return None
+        connection_id = thread_id() if callable(thread_id) else thread_id
+        return lambda: kill_query(connection_id)
+    if db_type == "mssql":
+        # pymssql 的底层 _mssql 连接提供 cancel()
+        return getattr(getattr(dbapi_connection, "_conn", None), "cancel", None)
+    return None
+
+
+class CancelScope:
+    """一次执行中所有正在运行的语句，可以统一取消
+
+    执行语句前登记取消函数，执行结束后注销。取消后登记新语句会立即抛出
+    :class:`QueryCanceled`，因此尚未开始的语句不会再执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._event = threading.Event()
+        self._running: Dict[int, Callable[[], None]] = {}
+        self._next_token = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def wait(self, timeout: float) -> bool:
+        """
+        等待 timeout 秒，期间取消时立即返回
+
+        Returns:
+            bool: 是否已取消
+        """
+        return self._event.wait(timeout)
+
+    def register(self, canceller: Callable[[], None]) -> int:
+        """
+        登记正在执行的语句
+
+        Args:
+            canceller: 取消函数
+
+        Returns:
+            int: 用于注销的令牌
+
+        Raises:
+            QueryCanceled: 已经取消
+        """
+        with self._lock:
+            if self._cancelled:
+                raise QueryCanceled()
+            self._next_token += 1
+            self._running[self._next_token] = canceller
+            return self._next_token
+
+    def unregister(self, token: int) -> None:
+        """语句执行结束后注销"""
+        with self._lock:
+            self._running.pop(token, None)
+
+    def cancel(self) -> None:
+        """取消所有正在执行的语句，并阻止新的语句开始"""
+        with self._lock:
+            self._cancelled = True
+            self._event.set()
+            cancellers = list(self._running.values())
+        for canceller in cancellers:
+            try:
+                canceller()
+            except Exception as e:
+                logger.warning(f"取消查询失败: {str(e)}")
@@ -0,0 +1,194 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+from sqlexec.utils.logger import TRACE
+
+# 各数据库类型返回 bytes 时使用的字符集
+DB_CHARSETS: Dict[str, str] = {
+    "mssql": "cp936",  # pymssql 连接使用 cp936 (GBK)
+    "mysql": "utf8",
+    "postgresql": "utf8",
+    "sqlite": "utf8",
+}
+FALLBACK_CHARSET = "utf8"
+
+Converter = Callable[[Any], Any]
+
+
+def get_charset(db_type: str) -> str:
+    """获取数据库类型对应的字符集"""
+    return DB_CHARSETS.get((db_type or "").lower(), FALLBACK_CHARSET)
+
+
+class ColumnStats:
+    """单列的解码统计"""
+
+    __slots__ = ("column", "decoded", "fallback", "failed")
+
+    def __init__(self, column: str):
+        self.column = column
+        self.decoded = 0  # 解码的单元格数，仅在跟踪开启时统计
+        self.fallback = 0  # 回退到 utf8 的单元格数
+        self.failed = 0  # 解码失败、保留字符串表示的单元格数
+
+
+class DecodeStats:
+    """一次查询的解码统计
+
+    回退和失败次数只在异常路径上累加，始终统计；
+    已解码单元格数需要在热路径上计数，只在跟踪开启时统计。
+    """
+
+    def __init__(self, columns: Sequence[str], trace: bool = False):
+        self.trace = trace
+        self.columns: List[ColumnStats] = [ColumnStats(column) for column in columns]
+
+    def report(self, logger: logging.Logger, alias: str) -> None:
+        """
+        输出统计信息
+
+        跟踪开启时逐列输出 TRACE 日志；否则只在出现回退或失败时输出一条汇总警告。
+
+        Args:
+            logger: 日志记录器
+            alias: 连接别名
+        """
+        if self.trace:
+            for stats in self.columns:
+                logger.log(TRACE,
+                           f"{alias} 字段 {stats.column}: 解码 {stats.decoded}, "
+                           f"回退 {stats.fallback}, 失败 {stats.failed}")
+            return
+
+        problems = [stats for stats in self.columns if stats.fallback or stats.failed]
+        if problems:
+            logger.warning(f"{alias} 部分字段解码异常: " + ", ".join(
+                f"{stats.column}(回退 {stats.fallback}, 失败 {stats.failed})"
+                for stats in problems))
+
+
+def make_text_decoder(charset: str, stats: ColumnStats, trace: bool = False) -> Converter:
+    """
+    创建将 bytes 解码为文本的转换器
+
+    先使用连接的字符集解码，失败后尝试 utf8，仍然失败则保留其字符串表示。
+    非 bytes 的值原样返回。解码过程中不输出日志，只记录统计。
+
+    Args:
+        charset: 连接的字符集
+        stats: 该列的解码统计
+        trace: 是否统计已解码的单元格数
+
+    Returns:
+        Converter: 转换函数
+    """
+    fallback = FALLBACK_CHARSET if charset != FALLBACK_CHARSET else None
+
+    def decode_slow(value: bytes) -> str:
+        if fallback:
+            try:
+                result = value.decode(fallback)
+                stats.fallback += 1
+                return result
+            except UnicodeDecodeError:
+                pass
+        stats.failed += 1
+        return str(value)
+
+    if trace:
+        def decode(value: Any) -> Any:
+            if value.__class__ is not bytes:
+                return value
+            stats.decoded += 1
+            try:
+                return value.decode(charset)
+            except UnicodeDecodeError:
+                return decode_slow(value)
+    else:
+        def decode(value: Any) -> Any:
+            if value.__class__ is not bytes:
+                return value
+            try:
+                return value.decode(charset)
+            except UnicodeDecodeError:
+                return decode_slow(value)
+
+    return decode
+
+
+def _is_text_type(type_code: Any, dbapi: Any) -> Optional[bool]:
+    """
+    根据游标描述中的类型判断列是否可能返回 bytes
+
+    Returns:
+        Optional[bool]: 无法判断时返回None
+    """
+    if type_code is None or dbapi is None:
+        return None
+    for name in ("STRING", "BINARY"):
+        type_object = getattr(dbapi, name, None)
+        if type_object is not None:
+            try:
+                if type_code == type_object:
+                    return True
+            except Exception:
+                return None
+    if type_code in (bytes, bytearray, str):
+        return True
+    return False
+
+
+def build_converters(columns: Sequence[str],
+                     description: Optional[Sequence[Sequence[Any]]],
+                     charset: str,
+                     dbapi: Any = None,
+                     stats: Optional[DecodeStats] = None) -> List[Optional[Converter]]:
+    """
+    根据游标描述为每一列生成转换器
+
+    每个结果只调用一次。文本/二进制列使用解码转换器，其余列不转换（None）。
+    驱动没有提供类型信息时（例如 SQLite 没有声明类型的列），同一列的值类型可能
+    逐行变化，bytes 可能只在后面的批次中出现，因此也使用解码转换器，逐个值检查。
+
+    Args:
+        columns: 列名
+        description: DBAPI 游标描述
+        charset: 连接的字符集
+        dbapi: DBAPI 模块，用于比较类型对象
+        stats: 解码统计，为None时不对外暴露统计
+
+    Returns:
+        List[Optional[Converter]]: 每列的转换器，None 表示不需要转换
+    """
+    if stats is None:
+        stats = DecodeStats(columns)
+    converters: List[Optional[Converter]] = []
+    for i, column in enumerate(columns):
+        type_code = description[i][1] if description and i < len(description) else None
+        # 无法判断类型时按文本列处理：解码转换器对非 bytes 的值原样返回
+        is_text = _is_text_type(type_code, dbapi) is not False
+        converters.append(
+            make_text_decoder(charset, stats.columns[i], stats.trace) if is_text else None)
+    return converters
+
+
+def apply_converters(converters: Sequence[Optional[Converter]],
+                     columns: List[Sequence[Any]]) -> List[List[Any]]:
+    """
+    按列批量应用转换器
+
+    转换器只处理 bytes、其余值原样返回，因此本批次中没有 bytes 的列直接复制，
+    不逐个值调用转换器（类型检查在 C 层完成）。后续批次仍会重新检查。
+
+    Args:
+        converters: 每列的转换器
+        columns: 按列组织的数据
+
+    Returns:
+        List[List[Any]]: 转换后的数据
+    """
+    return [
+        list(map(converter, values))
+        if converter and bytes in set(map(type, values)) else list(values)
+        for converter, values in zip(converters, columns)
+    ]
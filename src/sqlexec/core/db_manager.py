@@ -1,7 +1,85 @@
-from typing import Dict, List, Tuple, Any, Optional
+from typing import (
+    Dict, List, Tuple, Any, Callable, ContextManager, Optional, Iterator, Iterable, Sequence
+)
 import logging
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from sqlexec.core.cancel import (
+    CancelScope, QueryCanceled, QueryInterrupted, QueryTimeout, TIMEOUT_GRACE, make_canceller
+)
+from sqlexec.core.metrics import MetricsRegistry, QueryMetrics
+from sqlexec.core.pool import PoolMonitor, PoolStats
+from sqlexec.core.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, is_connection_error, is_idempotent,
+    is_pool_timeout
+)
+from sqlexec.core.result_set import ResultSet
+from sqlexec.core.result_cache import ResultCache, is_cacheable
+from sqlexec.core.script import StatementResult
+from sqlexec.core.sql_splitter import Statement, needs_split, split_statements, statement_type
+from sqlexec.core.spill import MemoryBudget, ResultBuilder
+from sqlexec.core.converters import get_charset, build_converters, apply_converters, DecodeStats
+from sqlexec.utils.logger import TRACE
+
+DEFAULT_BATCH_SIZE = 1000  # 流式查询默认每批行数
+
+# 各数据库驱动的连接超时参数
+CONNECT_TIMEOUT_ARGS: Dict[str, Tuple[str, ...]] = {
+    "mssql": ("login_timeout", "timeout"),  # pymssql
+    "mysql": ("connect_timeout", "read_timeout"),
+    "postgresql": ("connect_timeout",),  # psycopg2
+    "sqlite": ("timeout",),
+}
+
+# 在服务端（或由驱动）执行语句超时的数据库，其他数据库只依靠本地计时器中断语句
+SERVER_TIMEOUT_TYPES = ("postgresql", "mysql", "mssql")
+
+# 可以在同一个连接上用 USE 切换数据库、共享服务器级连接池的数据库
+SHARED_POOL_TYPES = ("mssql", "mysql")
+
+
+def _sql_text(query: str) -> Any:
+    """创建可执行的SQL文本，SQLAlchemy 在第一次执行查询时才导入"""
+    from sqlalchemy import text
+    return text(query)
+
+
+def _use_database(db_type: str, dbapi_connection: Any, database: str) -> None:
+    """
+    在DBAPI连接上切换当前数据库
+
+    直接使用DBAPI游标执行，不会开始 SQLAlchemy 事务；切换后提交，
+    pymssql 在非自动提交模式下为 USE 隐式开始的事务不会留到后续语句。
+    """
+    if db_type == "mssql":
+        statement = "USE [{}]".format(database.replace("]", "]]"))
+    else:
+        statement = "USE `{}`".format(database.replace("`", "``"))
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+def _set_mysql_statement_timeout(dbapi_connection: Any, timeout: float) -> None:
+    """在新建的 MySQL 连接上设置会话级语句超时，MariaDB 使用 max_statement_time"""
+    cursor = dbapi_connection.cursor()
+    try:
+        try:
+            cursor.execute(f"SET SESSION max_execution_time = {int(timeout * 1000)}")
+        except Exception:
+            try:
+                cursor.execute(f"SET SESSION max_statement_time = {timeout:g}")
+            except Exception as e:
+                logging.getLogger(__name__).debug(f"设置 MySQL 语句超时失败: {str(e)}")
+    finally:
+        cursor.close()
 
 
 class DatabaseManager:
@@ -10,13 +88,31 @@ class DatabaseManager:
     def __init__(self):
         """初始化数据库管理器"""
         self.connections: Dict[str, Dict] = {}  # 存储连接配置
-        self.engines: Dict[str, Any] = {}      # 存储数据库引擎
+        self.engines: Dict[str, Any] = {}      # 存储已创建的数据库引擎
         self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()  # 保护 engines 和 _engine_locks
+        self._engine_locks: Dict[str, threading.Lock] = {}  # 每个连接的引擎创建锁
+        self.result_cache: Optional[ResultCache] = None  # 结果缓存，默认关闭
+        self.memory_budget: Optional[MemoryBudget] = None  # 结果内存预算，超出后写入临时文件
+        self.spill_directory: Optional[str] = None  # 临时文件目录，None表示系统临时目录
+        self.retry_policy = RetryPolicy()  # 查询遇到暂时性错误时的重试策略
+        self.circuit_failure_threshold = 3  # 连续连接失败多少次后熔断，0表示不熔断
+        self.circuit_reset_timeout = 30.0  # 熔断后多少秒再次尝试
+        self._breakers: Dict[str, CircuitBreaker] = {}  # 每个连接的熔断器
+        self.pool_monitor = PoolMonitor()  # 各连接获取连接的耗时统计
+        self.metrics = MetricsRegistry()  # 各连接查询的分阶段耗时统计
+        # 同一服务器上的数据库共享连接池，每次获取连接后切换数据库
+        self.share_server_pools = False
+        self._shared_engines: Dict[Tuple, Any] = {}  # 服务器级引擎，键参见 _server_pool_key
+        self._shared_database: Dict[str, str] = {}  # 使用共享引擎的连接别名到数据库名
 
     def add_connection(self, alias: str, config: Dict) -> bool:
         """
         添加数据库连接
 
+        只保存连接配置，数据库引擎在第一次使用时才创建。
+        如果连接已存在且配置没有变化，保留已创建的引擎。
+
         Args:
             alias: 连接别名
             config: 连接配置，包含类型、连接字符串等信息
@@ -25,19 +121,44 @@ class DatabaseManager:
             bool: 是否成功添加连接
         """
         try:
+            old_config = self.connections.get(alias)
+            if old_config is not None and self._engine_config(old_config) != self._engine_config(config):
+                # 配置变化，丢弃旧引擎、连接池统计和缓存的结果
+                self._dispose_engine(alias)
+                self.pool_monitor.reset(alias)
+                if self.result_cache is not None:
+                    self.result_cache.invalidate(alias)
+
             # 保存连接配置
             self.connections[alias] = config
-
-            # 创建数据库引擎
-            engine = self._create_engine(config)
-            if engine:
-                self.engines[alias] = engine
-                return True
-            return False
+            return True
         except Exception as e:
             self.logger.error(f"添加连接失败: {str(e)}")
             return False
 
+    def sync_connections(self, configs: Dict[str, Dict]) -> List[str]:
+        """
+        同步连接配置
+
+        移除不再存在的连接，添加新连接，未变化的连接保留已创建的引擎。
+
+        Args:
+            configs: 连接别名到连接配置的映射
+
+        Returns:
+            List[str]: 新添加或引擎配置发生变化的连接别名
+        """
+        for alias in list(self.connections):
+            if alias not in configs:
+                self.remove_connection(alias)
+        changed = []
+        for alias, config in configs.items():
+            old_config = self.connections.get(alias)
+            if old_config is None or self._engine_config(old_config) != self._engine_config(config):
+                changed.append(alias)
+            self.add_connection(alias, config)
+        return changed
+
     def remove_connection(self, alias: str) -> bool:
         """
         移除数据库连接
@@ -49,9 +170,12 @@ class DatabaseManager:
             bool: 是否成功移除连接
         """
         try:
-            if alias in self.engines:
-                self.engines[alias].dispose()
-                del self.engines[alias]
+            self._dispose_engine(alias)
+            self.pool_monitor.reset(alias)
+            with self._lock:
+                self._breakers.pop(alias, None)
+            if self.result_cache is not None:
+                self.result_cache.invalidate(alias)
             if alias in self.connections:
                 del self.connections[alias]
             return True
@@ -59,6 +183,346 @@ class DatabaseManager:
             self.logger.error(f"移除连接失败: {str(e)}")
             return False
 
+    def configure_cache(self, enabled: bool, ttl: float = 300, max_mb: int = 256) -> None:
+        """
+        配置结果缓存
+
+        Args:
+            enabled: 是否启用缓存
+            ttl: 缓存条目的有效期（秒）
+            max_mb: 缓存的最大内存（MB）
+        """
+        if not enabled:
+            self.result_cache = None
+            return
+        max_bytes = max_mb * 1024 * 1024
+        if self.result_cache is None:
+            self.result_cache = ResultCache(ttl, max_bytes)
+        else:
+            self.result_cache.ttl = ttl
+            self.result_cache.max_bytes = max_bytes
+
+    def configure_spill(self, budget_mb: int, directory: str = "") -> None:
+        """
+        配置查询结果的内存预算
+
+        所有连接的内存结果共用预算，超出后新的结果写入本地临时文件。
+
+        Args:
+            budget_mb: 内存预算（MB），为0时不限制
+            directory: 临时文件目录，为空时使用系统临时目录
+        """
+        self.spill_directory = directory or None
+        if budget_mb <= 0:
+            self.memory_budget = None
+            return
+        max_bytes = budget_mb * 1024 * 1024
+        if self.memory_budget is None:
+            self.memory_budget = MemoryBudget(max_bytes)
+        else:
+            self.memory_budget.max_bytes = max_bytes
+
+    def configure_resilience(self, max_attempts: int = 3, base_delay: float = 0.2,
+                             max_delay: float = 5.0, failure_threshold: int = 3,
+                             reset_timeout: float = 30.0) -> None:
+        """
+        配置查询重试和熔断
+
+        Args:
+            max_attempts: 查询遇到暂时性错误时最多执行的次数，1表示不重试
+            base_delay: 第一次重试前的基准等待时间（秒）
+            max_delay: 重试等待时间的上限（秒）
+            failure_threshold: 连续连接失败多少次后熔断，0表示不熔断
+            reset_timeout: 熔断后多少秒再次尝试
+        """
+        self.retry_policy = RetryPolicy(max(1, max_attempts), base_delay, max_delay)
+        self.circuit_failure_threshold = failure_threshold
+        self.circuit_reset_timeout = reset_timeout
+        with self._lock:
+            for breaker in self._breakers.values():
+                breaker.failure_threshold = failure_threshold
+                breaker.reset_timeout = reset_timeout
+
+    def configure_shared_pools(self, enabled: bool) -> None:
+        """
+        配置是否共享服务器级连接池
+
+        启用后同一 SQL Server/MySQL 服务器上、只有数据库名不同的连接共用一个引擎和连接池，
+        每次获取连接后执行 ``USE 数据库`` 切换，减少空闲连接和建立连接的握手。
+        切换模式时释放已创建的引擎，下次使用时按新模式重新创建。
+
+        Args:
+            enabled: 是否共享
+        """
+        if enabled == self.share_server_pools:
+            return
+        self.share_server_pools = enabled
+        self._dispose_all_engines()
+
+    def configure_metrics(self, fmt: str = "none", directory: str = "") -> None:
+        """
+        配置执行统计的指标文件，文件由 :meth:`MetricsRegistry.flush` 写入
+
+        Args:
+            fmt: none、prometheus、json 或 both
+            directory: 指标文件目录，为空时使用 ~/.sqlexec/metrics
+        """
+        self.metrics.configure(fmt, directory)
+
+    def _breaker(self, alias: str) -> CircuitBreaker:
+        """获取连接的熔断器"""
+        with self._lock:
+            breaker = self._breakers.get(alias)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    alias, self.circuit_failure_threshold, self.circuit_reset_timeout)
+                self._breakers[alias] = breaker
+            return breaker
+
+    def circuit_state(self, alias: str) -> str:
+        """连接熔断器的状态，参见 :class:`CircuitBreaker`"""
+        return self._breaker(alias).state
+
+    def reset_circuit(self, alias: str) -> None:
+        """确认连接可用后关闭熔断器，例如健康检查成功后"""
+        self._breaker(alias).reset()
+
+    @contextmanager
+    def _circuit(self, alias: str) -> Iterator[None]:
+        """
+        经过熔断器执行请求，连接错误计为失败，其他结果计为成功
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        breaker = self._breaker(alias)
+        breaker.before_call()
+        ok = True
+        try:
+            yield
+        except Exception as e:
+            ok = not is_connection_error(e)
+            raise
+        finally:
+            breaker.record(ok)
+
+    @contextmanager
+    def _connect(self, alias: str, begin: bool = False,
+                 metrics: Optional[QueryMetrics] = None) -> Iterator[Any]:
+        """
+        从连接池获取连接，记录获取连接的耗时
+
+        Args:
+            alias: 连接别名
+            begin: 是否开始事务，正常退出时提交，出现异常时回滚
+            metrics: 指定时把获取连接的耗时计入 connect 阶段
+
+        Yields:
+            Any: SQLAlchemy连接
+
+        Raises:
+            RuntimeError: 创建数据库引擎失败
+        """
+        engine = self.get_engine(alias)
+        if engine is None:
+            raise RuntimeError("创建数据库引擎失败")
+        started = time.perf_counter()
+        try:
+            conn = engine.connect()
+        except Exception as e:
+            wait_ms = (time.perf_counter() - started) * 1000
+            self.pool_monitor.record(alias, wait_ms, timed_out=is_pool_timeout(e))
+            if metrics is not None:
+                metrics.add("connect", wait_ms)
+            raise
+        database = self._shared_database.get(alias)
+        if database is not None:
+            # 共享连接池中的连接可能停留在其他数据库，脚本中的 USE 也会改变当前数据库
+            try:
+                _use_database(self.connections[alias]["type"].lower(),
+                              conn.connection.dbapi_connection, database)
+            except Exception:
+                conn.close()
+                raise
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.pool_monitor.record(alias, wait_ms)
+        if metrics is not None:
+            metrics.add("connect", wait_ms)
+        with conn:
+            if begin:
+                with conn.begin():
+                    yield conn
+            else:
+                yield conn
+
+    def pool_stats(self, alias: str) -> PoolStats:
+        """
+        获取连接池的实时状态和获取连接的耗时统计
+
+        Args:
+            alias: 连接别名
+
+        Returns:
+            PoolStats: 连接池状态
+        """
+        stats = self.pool_monitor.snapshot(alias, self.engines.get(alias))
+        stats.shared = alias in self._shared_database
+        return stats
+
+    def get_engine(self, alias: str) -> Any:
+        """
+        获取连接的数据库引擎，第一次使用时创建
+
+        Args:
+            alias: 连接别名
+
+        Returns:
+            Any: SQLAlchemy引擎实例，连接不存在或创建失败时返回None
+        """
+        engine = self.engines.get(alias)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            lock = self._engine_locks.setdefault(alias, threading.Lock())
+
+        # 每个连接单独加锁，不同连接的引擎可以同时创建
+        with lock:
+            engine = self.engines.get(alias)
+            if engine is None and alias in self.connections:
+                config = self.connections[alias]
+                shared = self._server_pool_key(config) if self.share_server_pools else None
+                if shared is not None:
+                    key, database = shared
+                    engine = self._get_server_engine(key, config)
+                    if engine is not None:
+                        with self._lock:
+                            self._shared_database[alias] = database
+                else:
+                    engine = self._create_engine(config)
+                if engine is not None:
+                    with self._lock:
+                        self.engines[alias] = engine
+            return engine
+
+    def _server_pool_key(self, config: Dict) -> Optional[Tuple[Tuple, str]]:
+        """
+        获取连接所在服务器的共享引擎键
+
+        Args:
+            config: 连接配置
+
+        Returns:
+            Optional[Tuple[Tuple, str]]: (引擎键, 数据库名)，不支持共享或连接字符串没有数据库时为None
+        """
+        db_type = config["type"].lower()
+        if db_type not in SHARED_POOL_TYPES:
+            return None
+        try:
+            conn_str, _ = self._engine_arguments(config)
+            from sqlalchemy.engine import make_url
+            url = make_url(conn_str)
+        except Exception:
+            return None
+        if not url.database:
+            return None
+        # 去掉数据库名后的地址、凭据、驱动参数，以及语句超时和连接池设置都相同才共享
+        # （URL.set 会忽略值为 None 的参数，只能用 _replace 去掉数据库名）
+        server = url._replace(database=None).render_as_string(hide_password=False)
+        return (db_type, server) + self._engine_config(config)[2:], url.database
+
+    def _get_server_engine(self, key: Tuple, config: Dict) -> Any:
+        """获取服务器级共享引擎，第一次使用时以不含数据库名的地址创建"""
+        with self._lock:
+            engine = self._shared_engines.get(key)
+            lock = self._engine_locks.setdefault(key, threading.Lock())
+        if engine is not None:
+            return engine
+        with lock:
+            engine = self._shared_engines.get(key)
+            if engine is None:
+                engine = self._create_engine(config, server_only=True)
+                if engine is not None:
+                    with self._lock:
+                        self._shared_engines[key] = engine
+                    self.logger.info(f"为 {key[1]} 创建共享连接池")
+            return engine
+
+    def start_warm_up(self, aliases: Iterable[str], max_workers: int = 4) -> threading.Thread:
+        """
+        在后台预热连接：创建引擎并建立一个连接放入连接池
+
+        Args:
+            aliases: 需要预热的连接别名
+            max_workers: 预热使用的最大线程数
+
+        Returns:
+            threading.Thread: 执行预热的后台线程
+        """
+        aliases = [alias for alias in aliases if alias in self.connections]
+
+        def warm_up_one(alias: str) -> None:
+            try:
+                with self._connect(alias):
+                    pass
+            except Exception as e:
+                self.logger.warning(f"预热连接 {alias} 失败: {str(e)}")
+
+        def run() -> None:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                    thread_name_prefix="warm-up") as pool:
+                list(pool.map(warm_up_one, aliases))
+            self.logger.info(f"已预热 {len(aliases)} 个连接")
+
+        thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _dispose_engine(self, alias: str, expected: Any = None) -> None:
+        """
+        释放连接的数据库引擎
+
+        Args:
+            alias: 连接别名
+            expected: 指定时只在当前引擎仍是该引擎时释放，避免释放其他线程刚重建的引擎
+        """
+        with self._lock:
+            engine = self.engines.get(alias)
+            if engine is None or (expected is not None and engine is not expected):
+                return
+            key = next((key for key, shared in self._shared_engines.items() if shared is engine), None)
+            if key is None:
+                del self.engines[alias]
+            else:
+                # 共享引擎：配置变化或移除时只解除该连接，没有其他连接使用时才释放；
+                # 连接断开时（指定了 expected）释放共享引擎，所有使用它的连接下次重新创建
+                users = [other for other, shared in self.engines.items() if shared is engine]
+                for other in (users if expected is not None else [alias]):
+                    del self.engines[other]
+                    self._shared_database.pop(other, None)
+                if expected is None and len(users) > 1:
+                    return
+                del self._shared_engines[key]
+        engine.dispose()
+
+    def _dispose_all_engines(self) -> None:
+        """释放所有引擎，连接配置保留"""
+        with self._lock:
+            engines = {id(engine): engine for engine in self.engines.values()}
+            engines.update((id(engine), engine) for engine in self._shared_engines.values())
+            self.engines.clear()
+            self._shared_engines.clear()
+            self._shared_database.clear()
+        for engine in engines.values():
+            engine.dispose()
+
+    @staticmethod
+    def _engine_config(config: Dict) -> Tuple:
+        """提取影响引擎创建的配置项"""
+        return (config.get("type"), config.get("connection_string"),
+                float(config.get("statement_timeout") or 0),
+                tuple(sorted((config.get("pool") or {}).items())))
+
     def test_connection(self, alias: str) -> Tuple[bool, str]:
         """
         测试数据库连接
@@ -70,164 +534,672 @@ class DatabaseManager:
             Tuple[bool, str]: (是否成功, 错误信息)
         """
         try:
-            if alias not in self.engines:
+            if alias not in self.connections:
                 return False, "连接不存在"
 
-            # 尝试执行简单查询
-            with self.engines[alias].connect() as conn:
-                conn.execute(text("SELECT 1"))
+            engine = self.get_engine(alias)
+            if engine is None:
+                return False, "创建数据库引擎失败"
+
+            # 尝试执行简单查询，不经过熔断器检查，结果用于更新熔断器
+            with self._connect(alias) as conn:
+                conn.execute(_sql_text("SELECT 1"))
+            self.reset_circuit(alias)
             return True, ""
         except Exception as e:
+            self._breaker(alias).record(not is_connection_error(e))
             return False, str(e)
 
-    def execute_query(self, alias: str, query: str) -> Tuple[bool, Optional[List[Dict]], str]:
+    def split_script(self, alias: str, script: str) -> List[Statement]:
+        """
+        按连接的数据库类型将脚本拆分为语句
+
+        Args:
+            alias: 连接别名
+            script: SQL脚本
+
+        Returns:
+            List[Statement]: 语句列表
+        """
+        return split_statements(script, self.connections.get(alias, {}).get("type", ""))
+
+    def stream_query(self, alias: str, query: str,
+                     batch_size: int = DEFAULT_BATCH_SIZE,
+                     scope: Optional[CancelScope] = None,
+                     metrics: Optional[QueryMetrics] = None) -> Iterator[ResultSet]:
+        """
+        以流式方式执行SQL查询，按批次逐步返回结果
+
+        支持服务端游标的方言会使用服务端游标，内存占用与批次大小相关，
+        与结果总行数无关。调用方可以在第一批数据到达后立即开始处理。
+
+        包含多条语句的脚本在同一个连接和事务中按顺序执行，只返回最后一条语句的结果；
+        需要每条语句结果的场景使用 :meth:`execute_script`。只有一条语句时，如果原文中
+        带有 ``GO``、``DELIMITER`` 等客户端命令或 ``GO n`` 重复次数，同样按拆分后的语句执行。
+
+        Args:
+            alias: 连接别名
+            query: SQL查询语句或脚本
+            batch_size: 每批返回的行数
+            scope: 取消范围，取消后中断正在执行的语句
+            metrics: 指定时累加各阶段耗时、行数和数据量
+
+        Yields:
+            ResultSet: 一批查询结果，至少返回一批（可能为空）
+
+        Raises:
+            KeyError: 连接不存在
+            CircuitOpenError: 连接连续失败，已暂停使用
+            QueryCanceled: 查询被取消
+            QueryTimeout: 查询超出语句超时
+            Exception: 执行查询时数据库驱动抛出的异常
+        """
+        if alias not in self.connections:
+            raise KeyError(f"连接不存在: {alias}")
+
+        created = time.perf_counter()
+        engine = self.get_engine(alias)
+        if metrics is not None:
+            # 第一次使用时创建引擎的耗时计入获取连接
+            metrics.add("connect", (time.perf_counter() - created) * 1000)
+        if engine is None:
+            raise RuntimeError("创建数据库引擎失败")
+
+        statements = self.split_script(alias, query)
+        with self._circuit(alias), self._connect(alias, begin=True, metrics=metrics) as conn, \
+                self._interruptible(alias, conn, scope) as timed:  # 使用事务
+            started = time.perf_counter()
+            # 只在执行语句和读取每批结果时计算语句超时，调用方处理结果的时间不计入
+            with timed():
+                if needs_split(query, statements):
+                    # 按拆分后的语句执行：去掉 GO、DELIMITER 等客户端命令，按 GO n 重复执行；
+                    # 语句按原样交给驱动执行，前面的语句在同一个连接上依次执行
+                    if len(statements) > 1:
+                        self.logger.info(f"在 {alias} 上执行 {len(statements)} 条语句的脚本")
+                    for statement in statements[:-1]:
+                        for _ in range(statement.repeat):
+                            self._execute_statement(conn, statement.text).close()
+                    last = statements[-1]
+                    for _ in range(last.repeat - 1):
+                        self._execute_statement(conn, last.text).close()
+                    result = self._execute_statement(conn, last.text, batch_size)
+                    query_type = last.type
+                else:
+                    self.logger.info(f"执行查询: {query}")
+                    result = conn.execution_options(
+                        stream_results=True, yield_per=batch_size
+                    ).execute(_sql_text(query))
+                    query_type = statement_type(query)
+            if metrics is not None:
+                metrics.add("execute", (time.perf_counter() - started) * 1000)
+
+            if result.returns_rows:
+                yield from self._read_batches(alias, conn, result, batch_size, metrics, timed)
+                return
+
+            # 对于非查询语句，返回操作类型和影响的行数
+            yield self._describe_statement(query_type, result)
+
+    def _execute_statement(self, conn: Any, statement: str,
+                           batch_size: Optional[int] = None) -> Any:
+        """
+        不解析绑定参数，将语句原样交给驱动执行
+
+        Args:
+            conn: SQLAlchemy连接
+            statement: SQL语句
+            batch_size: 指定时使用服务端游标按批读取结果
+
+        Returns:
+            Any: SQLAlchemy结果对象
+        """
+        self.logger.debug(f"执行语句: {statement}")
+        options: Dict[str, Any] = {"no_parameters": True}
+        if batch_size:
+            options.update(stream_results=True, yield_per=batch_size)
+        return conn.exec_driver_sql(statement, execution_options=options)
+
+    def _read_batches(self, alias: str, conn: Any, result: Any, batch_size: int,
+                      metrics: Optional[QueryMetrics] = None,
+                      timed: Callable[[], ContextManager] = nullcontext) -> Iterator[ResultSet]:
+        """
+        按批读取返回行的语句的结果，转换驱动返回的值
+
+        Args:
+            alias: 连接别名
+            conn: SQLAlchemy连接
+            result: SQLAlchemy结果对象
+            batch_size: 每批行数
+            metrics: 指定时分别累加读取和转换的耗时、行数和数据量，
+                调用方处理每批结果的时间不计入
+            timed: 从驱动读取每批结果时进入的上下文，用于计算语句超时
+
+        Yields:
+            ResultSet: 一批结果，空结果也返回一批带列名的空结果
+        """
+        # 没有列名时使用 "Column_N" 作为键名
+        keys = [key or f"Column_{i}" for i, key in enumerate(result.keys())]
+        charset = get_charset(self.connections.get(alias, {}).get("type", ""))
+        description = getattr(result.cursor, "description", None)
+        # 每个查询只检查一次是否开启行级跟踪
+        stats = DecodeStats(keys, self.logger.isEnabledFor(TRACE))
+        converters = None
+        total = 0
+        partitions = result.partitions(batch_size)
+        while True:
+            started = time.perf_counter()
+            with timed():
+                partition = next(partitions, None)
+            if partition is None:
+                if metrics is not None:
+                    metrics.add("fetch", (time.perf_counter() - started) * 1000)
+                break
+            fetched = time.perf_counter()
+            columns = list(zip(*partition))
+            # 每个结果只根据游标描述生成一次转换器
+            if converters is None:
+                converters = build_converters(
+                    keys, description, charset, conn.dialect.dbapi, stats)
+            batch = ResultSet(keys, apply_converters(converters, columns))
+            total += len(batch)
+            if metrics is not None:
+                metrics.add("fetch", (fetched - started) * 1000)
+                metrics.add("convert", (time.perf_counter() - fetched) * 1000)
+                metrics.rows += len(batch)
+                metrics.bytes += batch.estimated_bytes()
+            yield batch
+
+        # 空结果也返回列名
+        if total == 0:
+            yield ResultSet(keys)
+
+        stats.report(self.logger, alias)
+        self.logger.info(f"查询返回 {total} 行数据")
+
+    def _describe_statement(self, query_type: str, result: Any) -> ResultSet:
+        """生成不返回行的语句的执行结果：操作类型和影响的行数"""
+        if query_type in ('CREATE', 'DROP', 'ALTER', 'TRUNCATE'):
+            self.logger.info(f"执行 {query_type} 操作成功")
+            return ResultSet.from_rows(["operation", "status"], [(query_type, "SUCCESS")])
+        affected = result.rowcount
+        self.logger.info(f"执行 {query_type} 操作成功，影响 {affected} 行")
+        return ResultSet.from_rows(["operation", "affected_rows"], [(query_type, affected)])
+
+    @contextmanager
+    def _interruptible(self, alias: str, conn: Any,
+                       scope: Optional[CancelScope] = None) -> Iterator[Callable[[], ContextManager]]:
+        """
+        在语句执行期间登记取消函数，超出连接的语句超时后中断语句
+
+        返回的 ``timed()`` 上下文只包住执行语句和每次从驱动读取结果：语句超时的计时器
+        在进入时启动、退出时停止，流式查询的调用方在两批结果之间处理数据的时间不计入。
+        取消函数在整个上下文期间保持登记。有服务端语句超时的数据库由服务端先中断，
+        本地计时器多等待 TIMEOUT_GRACE 秒作为兜底；SQLite 只依靠本地计时器。
+
+        Args:
+            alias: 连接别名
+            conn: 正在执行语句的SQLAlchemy连接
+            scope: 取消范围
+
+        Yields:
+            Callable[[], ContextManager]: 执行语句或读取结果时进入的计时上下文
+
+        Raises:
+            QueryCanceled: 执行前已取消，或执行中被取消
+            QueryTimeout: 本地计时器因超时中断了语句
+        """
+        config = self.connections.get(alias, {})
+        timeout = float(config.get("statement_timeout") or 0)
+        if scope is None and timeout <= 0:
+            yield nullcontext
+            return
+
+        db_type = config.get("type", "").lower()
+        canceller = self.canceller_for(alias, conn.connection.dbapi_connection)
+        token = scope.register(canceller or (lambda: None)) if scope is not None else None
+        timed_out = threading.Event()
+        grace = TIMEOUT_GRACE if db_type in SERVER_TIMEOUT_TYPES else 0
+
+        def on_timeout() -> None:
+            timed_out.set()
+            self.logger.warning(f"{alias} 的查询超出 {timeout:g} 秒，正在中断")
+            canceller()
+
+        @contextmanager
+        def timed() -> Iterator[None]:
+            if timeout <= 0 or canceller is None:
+                yield
+                return
+            timer = threading.Timer(timeout + grace, on_timeout)
+            timer.daemon = True
+            timer.start()
+            try:
+                yield
+            finally:
+                timer.cancel()
+
+        try:
+            yield timed
+        except QueryInterrupted:
+            raise
+        except Exception as e:
+            # 被中断的语句由驱动抛出异常，转换为取消或超时
+            if timed_out.is_set():
+                raise QueryTimeout(timeout) from e
+            if scope is not None and scope.cancelled:
+                raise QueryCanceled() from e
+            raise
+        finally:
+            if token is not None:
+                scope.unregister(token)
+
+    def canceller_for(self, alias: str, dbapi_connection: Any) -> Optional[Callable[[], None]]:
+        """
+        生成中断DBAPI连接上正在执行语句的函数，可以在其他线程中调用
+
+        Args:
+            alias: 连接别名
+            dbapi_connection: 正在执行语句的DBAPI连接
+
+        Returns:
+            Optional[Callable[[], None]]: 取消函数，驱动不支持时为None
+        """
+        return make_canceller(
+            self.connections.get(alias, {}).get("type", ""), dbapi_connection,
+            lambda connection_id: self._kill_query(alias, connection_id))
+
+    def _kill_query(self, alias: str, connection_id: int) -> None:
+        """通过新连接终止 MySQL 连接上正在执行的语句"""
+        raw = self.open_raw_connection(alias, timeout=5)
+        try:
+            cursor = raw.cursor()
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+            cursor.close()
+        finally:
+            raw.close()
+
+    def execute_script(self, alias: str, statements: List[Statement],
+                       stop_on_error: bool = True,
+                       scope: Optional[CancelScope] = None,
+                       metrics: Optional[QueryMetrics] = None) -> Tuple[bool, List[StatementResult], str]:
+        """
+        在一个连接上按顺序执行脚本中的语句，返回每条语句的结果和耗时
+
+        连接以自动提交模式执行，每条语句完成即生效，脚本中的 BEGIN/COMMIT/ROLLBACK
+        按原样控制事务。语句按原样交给驱动执行，不解析绑定参数。脚本不会自动重试。
+
+        Args:
+            alias: 连接别名
+            statements: 语句列表，通常由 :meth:`split_script` 生成
+            stop_on_error: 某条语句失败后是否停止执行后续语句
+            scope: 取消范围，取消后中断当前语句并停止执行后续语句
+            metrics: 执行统计，所有语句的耗时、行数和数据量累加，
+                未指定时创建一个，完成后记录到 :attr:`metrics`
+
+        Returns:
+            Tuple[bool, List[StatementResult], str]: (是否全部成功, 已执行语句的结果, 错误信息)
+        """
+        results: List[StatementResult] = []
+        if alias not in self.connections:
+            return False, results, "连接不存在"
+
+        errors: List[str] = []
+        if metrics is None:
+            metrics = QueryMetrics(alias)
+        metrics.attempts = 1
+        started = time.perf_counter()
+        try:
+            engine = self.get_engine(alias)
+            metrics.add("connect", (time.perf_counter() - started) * 1000)
+            if engine is None:
+                self._record_metrics(metrics, started, "创建数据库引擎失败")
+                return False, results, "创建数据库引擎失败"
+
+            # 执行语句会修改数据，使该连接的缓存失效
+            if self.result_cache is not None:
+                self.result_cache.invalidate(alias)
+
+            self.logger.info(f"在 {alias} 上执行 {len(statements)} 条语句的脚本")
+            with self._circuit(alias), self._connect(alias, metrics=metrics) as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT")
+                for index, statement in enumerate(statements, 1):
+                    item = self._run_script_statement(alias, conn, index, statement, scope, metrics)
+                    results.append(item)
+                    if not item.ok:
+                        errors.append(f"{item.describe()}执行失败: {item.error}")
+                        self.logger.error(f"{alias} 的{errors[-1]}")
+                        if stop_on_error or (scope is not None and scope.cancelled):
+                            break
+        except Exception as e:
+            self.logger.error(f"执行脚本失败: {str(e)}")
+            errors.append(f"执行失败: {str(e)}")
+
+        self._record_metrics(metrics, started, errors[0] if errors else "")
+        self.logger.info(
+            f"{alias} 的脚本执行完成，{len(results)}/{len(statements)} 条语句，"
+            f"耗时 {metrics.total_ms:.0f}ms")
+        return not errors, results, "\n".join(errors)
+
+    def _run_script_statement(self, alias: str, conn: Any, index: int, statement: Statement,
+                              scope: Optional[CancelScope] = None,
+                              metrics: Optional[QueryMetrics] = None) -> StatementResult:
+        """执行脚本中的一条语句，结果超出内存预算时写入临时文件"""
+        item = StatementResult(index, statement.line, statement.text, statement.type)
+        started = time.perf_counter()
+        builder = None
+        try:
+            for _ in range(statement.repeat):
+                with self._interruptible(alias, conn, scope) as timed:
+                    executed = time.perf_counter()
+                    with timed():
+                        result = self._execute_statement(conn, statement.text)
+                    if metrics is not None:
+                        metrics.add("execute", (time.perf_counter() - executed) * 1000)
+                    if result.returns_rows:
+                        builder = ResultBuilder(self.memory_budget, self.spill_directory)
+                        for batch in self._read_batches(alias, conn, result, DEFAULT_BATCH_SIZE,
+                                                        metrics, timed):
+                            builder.add(batch)
+                        item.result = builder.finish()
+                        builder = None
+                    else:
+                        rowcount = result.rowcount
+                        item.affected_rows = (rowcount if rowcount is not None and rowcount >= 0
+                                              else None)
+                        result.close()
+        except Exception as e:
+            if builder is not None:
+                builder.abort()
+            item.error = str(e)
+        item.elapsed_ms = (time.perf_counter() - started) * 1000
+        return item
+
+    def execute_query(self, alias: str, query: str,
+                      scope: Optional[CancelScope] = None,
+                      metrics: Optional[QueryMetrics] = None) -> Tuple[bool, Optional[ResultSet], str]:
         """
         执行SQL查询
 
+        结果超出内存预算时返回 :class:`SpilledResultSet`，其只读接口与 ResultSet 相同。
+        遇到暂时性错误时按 :attr:`retry_policy` 退避后重试：只读语句可以重试，
+        修改数据的语句只在尚未发送到数据库时重试。连接错误会释放旧引擎，
+        下次执行时重新创建。被取消或超时的查询不会重试。
+
         Args:
             alias: 连接别名
             query: SQL查询语句
+            scope: 取消范围，取消后中断正在执行的查询
+            metrics: 执行统计，未指定时创建一个，完成后记录到 :attr:`metrics`
 
         Returns:
-            Tuple[bool, Optional[List[Dict]], str]: (是否成功, 查询结果, 错误信息)
+            Tuple[bool, Optional[ResultSet], str]: (是否成功, 查询结果, 错误信息)
         """
+        if metrics is None:
+            metrics = QueryMetrics(alias)
+        started = time.perf_counter()
+        ok, result, error = self._execute_query(alias, query, scope, metrics)
+        self._record_metrics(metrics, started, error)
+        return ok, result, error
+
+    def _record_metrics(self, metrics: QueryMetrics, started: float, error: str) -> None:
+        """记录一次执行完成的统计，error 为空表示成功"""
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        metrics.ok = not error
+        metrics.error = error
+        self.logger.debug(metrics.summary())
+        self.metrics.record(metrics)
+
+    def _execute_query(self, alias: str, query: str, scope: Optional[CancelScope],
+                       metrics: QueryMetrics) -> Tuple[bool, Optional[ResultSet], str]:
+        """执行SQL查询，参见 :meth:`execute_query`"""
         try:
-            if alias not in self.engines:
+            if alias not in self.connections:
                 return False, None, "连接不存在"
 
-            max_retries = 3  # 最大重试次数
-            retry_count = 0
+            # 只读语句尝试使用缓存，其他语句绕过缓存并使该连接的缓存失效
+            cache = self.result_cache
+            cacheable = cache is not None and is_cacheable(query)
+            if cacheable:
+                cached = cache.get(alias, query)
+                if cached is not None:
+                    self.logger.info(f"{alias} 命中结果缓存: {query}")
+                    result = cached.copy()
+                    result.from_cache = True
+                    metrics.from_cache = True
+                    metrics.rows = len(result)
+                    return True, result, ""
+            elif cache is not None:
+                cache.invalidate(alias)
 
-            while retry_count < max_retries:
+            idempotent = is_idempotent(self.split_script(alias, query))
+            attempt = 1
+            while True:
+                # 第一次使用时创建引擎的耗时计入获取连接，之后 stream_query 中的调用直接返回
+                created = time.perf_counter()
+                engine = self.get_engine(alias)
+                metrics.add("connect", (time.perf_counter() - created) * 1000)
+                builder = ResultBuilder(self.memory_budget, self.spill_directory)
+                # 行数和数据量只计最后一次执行
+                metrics.attempts = attempt
+                metrics.rows = metrics.bytes = 0
                 try:
-                    with self.engines[alias].begin() as conn:  # 使用事务
-                        self.logger.info(f"执行查询: {query}")
-                        result = conn.execute(text(query))
-
-                        if result.returns_rows:
-                            # 使用_mapping属性获取字典，并确保字符串编码正确
-                            rows = []
-                            for row in result:
-                                data = {}
-                                # 检查是否有列名
-                                if hasattr(row, '_mapping'):
-                                    items = row._mapping.items()
-                                else:
-                                    # 如果没有列名，使用列号作为键
-                                    items = enumerate(row)
-
-                                for key, value in items:
-                                    # 如果键是数字（没有列名的情况），使用 "Column_N" 作为键名
-                                    if isinstance(key, int):
-                                        key = f"Column_{key}"
-
-                                    # 记录每个字段的值和类型
-                                    self.logger.debug(
-                                        f"字段 {key}: 值 = {value}, 类型 = {type(value)}")
-
-                                    if isinstance(value, bytes):
-                                        try:
-                                            # 使用 cp936 (GBK) 解码
-                                            value = value.decode('cp936')
-                                            self.logger.debug(
-                                                f"字段 {key} 已从 bytes 解码为 cp936: {value}")
-                                        except UnicodeDecodeError as e:
-                                            self.logger.warning(
-                                                f"字段 {key} cp936 解码失败: {e}")
-                                            try:
-                                                value = value.decode('utf8')
-                                                self.logger.debug(
-                                                    f"字段 {key} 已从 bytes 解码为 utf8: {value}")
-                                            except UnicodeDecodeError as e:
-                                                self.logger.error(
-                                                    f"字段 {key} utf8 解码也失败: {e}")
-                                                value = str(value)
-                                    data[key] = value
-                                rows.append(data)
-
-                            self.logger.info(f"查询返回 {len(rows)} 行数据")
-                            return True, rows, ""
-
-                        # 对于非查询语句，返回操作类型和影响的行数
-                        query_type = query.strip().split(None, 1)[0].upper()
-                        if query_type in ('CREATE', 'DROP', 'ALTER', 'TRUNCATE'):
-                            self.logger.info(f"执行 {query_type} 操作成功")
-                            return True, [{"operation": query_type, "status": "SUCCESS"}], ""
-                        else:
-                            affected = result.rowcount
-                            self.logger.info(
-                                f"执行 {query_type} 操作成功，影响 {affected} 行")
-                            return True, [{"operation": query_type, "affected_rows": affected}], ""
+                    for batch in self.stream_query(alias, query, scope=scope, metrics=metrics):
+                        builder.add(batch)
+                    spilled = builder.spilled
+                    result = builder.finish()
+                    if spilled:
+                        self.logger.info(f"{alias} 的查询结果共 {len(result)} 行，已写入临时文件")
+                    elif cacheable:
+                        cache.put(alias, query, result)
+                    return True, result, ""
 
                 except Exception as e:
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        self.logger.warning(
-                            f"执行查询失败，正在尝试第{retry_count}次重连: {str(e)}")
-                        # 重新创建引擎
-                        if alias in self.connections:
-                            self.engines[alias] = self._create_engine(
-                                self.connections[alias])
-                    else:
-                        raise e
+                    builder.abort()
+                    if not self.retry_policy.should_retry(e, attempt, idempotent):
+                        raise
+                    if engine is not None and is_connection_error(e):
+                        # 释放连接已断开的引擎，下次执行时重新创建
+                        self._dispose_engine(alias, engine)
+                    delay = self.retry_policy.delay(attempt)
+                    self.logger.warning(
+                        f"{alias} 执行查询失败，{delay:.2f} 秒后第 {attempt} 次重试: {str(e)}")
+                    if scope is None:
+                        time.sleep(delay)
+                    elif scope.wait(delay):
+                        raise QueryCanceled()
+                    attempt += 1
 
+        except QueryInterrupted as e:
+            self.logger.warning(f"{alias} {str(e)}")
+            return False, None, str(e)
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return False, None, str(e)
         except Exception as e:
             self.logger.error(f"执行查询失败: {str(e)}")
             return False, None, f"执行失败: {str(e)}"
 
-    def _create_engine(self, config: Dict) -> Any:
+    def execute_many(self, alias: str, statement: str, params: Sequence[Dict[str, Any]],
+                     chunk_size: int = DEFAULT_BATCH_SIZE,
+                     on_chunk: Optional[Callable[[int], None]] = None,
+                     scope: Optional[CancelScope] = None) -> Tuple[bool, int, str]:
+        """
+        使用同一条语句和多组参数批量执行DML
+
+        在一个连接上按 chunk_size 分批，每批作为一次驱动级 executemany 执行并单独提交
+        （mysqlclient 会改写为多行 VALUES，psycopg2 使用批量执行）。
+        某一批失败时回滚该批并停止，之前已提交的批次保留。批量执行不会自动重试。
+
+        Args:
+            alias: 连接别名
+            statement: 使用 ``:name`` 命名参数的SQL语句
+            params: 参数行，每行是参数名到值的映射
+            chunk_size: 每批（每个事务）的参数行数
+            on_chunk: 每批提交后调用，参数为该批的行数
+            scope: 取消范围，取消后中断当前批次并停止
+
+        Returns:
+            Tuple[bool, int, str]: (是否成功, 已提交的参数行数, 错误信息)
+        """
+        if alias not in self.connections:
+            return False, 0, "连接不存在"
+
+        committed = 0
+        try:
+            engine = self.get_engine(alias)
+            if engine is None:
+                return False, 0, "创建数据库引擎失败"
+
+            # 修改数据后该连接的缓存失效
+            if self.result_cache is not None:
+                self.result_cache.invalidate(alias)
+
+            clause = _sql_text(statement)
+            chunk_size = max(1, int(chunk_size))
+            self.logger.info(f"在 {alias} 上批量执行 {len(params)} 组参数: {statement}")
+            with self._circuit(alias), self._connect(alias) as conn:
+                for offset in range(0, len(params), chunk_size):
+                    chunk = list(params[offset:offset + chunk_size])
+                    with conn.begin(), self._interruptible(alias, conn, scope) as timed, timed():
+                        conn.execute(clause, chunk)
+                    committed += len(chunk)
+                    if on_chunk:
+                        on_chunk(len(chunk))
+            self.logger.info(f"{alias} 批量执行完成，提交 {committed} 行")
+            return True, committed, ""
+
+        except Exception as e:
+            self.logger.error(f"批量执行失败: {str(e)}")
+            return False, committed, f"执行失败（已提交 {committed} 行）: {str(e)}"
+
+    def open_raw_connection(self, alias: str, timeout: Optional[float] = None) -> Any:
+        """
+        绕过连接池直接建立一个DBAPI连接，调用方负责关闭
+
+        Args:
+            alias: 连接别名
+            timeout: 连接和查询超时（秒），为None时使用驱动默认值
+
+        Returns:
+            Any: DBAPI连接
+
+        Raises:
+            KeyError: 连接不存在
+            RuntimeError: 创建数据库引擎失败
+        """
+        if alias not in self.connections:
+            raise KeyError(f"连接不存在: {alias}")
+
+        engine = self.get_engine(alias)
+        if engine is None:
+            raise RuntimeError("创建数据库引擎失败")
+
+        config = self.connections[alias]
+        conn_str, engine_kwargs = self._engine_arguments(config)
+        # 使用连接自身的地址，共享引擎的地址不含数据库名
+        from sqlalchemy.engine import make_url
+        cargs, cparams = engine.dialect.create_connect_args(make_url(conn_str))
+        cparams.update(engine_kwargs.get("connect_args", {}))
+        if timeout:
+            for name in CONNECT_TIMEOUT_ARGS.get(config["type"].lower(), ()):
+                cparams[name] = max(1, math.ceil(timeout))
+        return engine.dialect.connect(*cargs, **cparams)
+
+    def _create_engine(self, config: Dict, server_only: bool = False) -> Any:
         """
         创建数据库引擎
 
         Args:
             config: 连接配置
+            server_only: 是否去掉连接字符串中的数据库名，用于服务器级共享引擎
 
         Returns:
             Any: SQLAlchemy引擎实例
         """
         try:
-            db_type = config["type"].lower()
-            conn_str = config["connection_string"]
-            engine_kwargs = {
-                "pool_pre_ping": True,  # 自动检测断开的连接
-                "pool_recycle": 3600,   # 每小时回收连接
-                "echo": False           # 关闭SQL日志
-            }
-
-            # 根据数据库类型添加适当的驱动和编码设置
-            if db_type == "mssql":
-                if not conn_str.startswith("mssql"):
-                    conn_str = f"mssql+pymssql://{conn_str}"
-                # SQL Server 的特殊编码设置
-                engine_kwargs["connect_args"] = {
-                    "charset": "cp936",  # 使用 cp936 (GBK) 编码，这是 pymssql 推荐的中文编码
-                    "autocommit": False
-                }
-                self.logger.info(
-                    f"创建 SQL Server 连接，连接字符串: {conn_str}, 参数: {engine_kwargs}")
-            elif db_type == "mysql":
-                if not conn_str.startswith("mysql"):
-                    conn_str = f"mysql+pymysql://{conn_str}"
-                if "?" in conn_str:
-                    conn_str += "&charset=utf8mb4"
-                else:
-                    conn_str += "?charset=utf8mb4"
-                engine_kwargs["encoding"] = "utf8mb4"
-                engine_kwargs["connect_args"] = {"charset": "utf8mb4"}
-            elif db_type == "postgresql":
-                if not conn_str.startswith("postgresql"):
-                    conn_str = f"postgresql+psycopg2://{conn_str}"
-                if "?" in conn_str:
-                    conn_str += "&client_encoding=utf8"
-                else:
-                    conn_str += "?client_encoding=utf8"
-                engine_kwargs["encoding"] = "utf8"
-
-            return create_engine(conn_str, **engine_kwargs)
+            conn_str, engine_kwargs = self._engine_arguments(config)
+            # SQLAlchemy 和数据库驱动在第一次创建引擎时才导入
+            from sqlalchemy import create_engine, event
+            from sqlalchemy.engine import make_url
+            url = make_url(conn_str)
+            if server_only:
+                url = url._replace(database=None)
+            engine = create_engine(url, **engine_kwargs)
+            timeout = float(config.get("statement_timeout") or 0)
+            if timeout > 0 and config["type"].lower() == "mysql":
+                event.listen(engine, "connect",
+                             lambda dbapi_connection, record:
+                             _set_mysql_statement_timeout(dbapi_connection, timeout))
+            return engine
         except Exception as e:
             self.logger.error(f"创建数据库引擎失败: {str(e)}")
             return None
 
+    def _engine_arguments(self, config: Dict) -> Tuple[str, Dict[str, Any]]:
+        """
+        根据连接配置生成连接字符串和引擎参数
+
+        Args:
+            config: 连接配置
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: (连接字符串, create_engine参数)
+        """
+        db_type = config["type"].lower()
+        conn_str = config["connection_string"]
+        pool = config.get("pool") or {}
+        engine_kwargs = {
+            "pool_pre_ping": pool.get("pre_ping", True),  # 使用前检测断开的连接
+            "pool_recycle": pool.get("pool_recycle", 3600),  # 默认每小时回收连接
+            "echo": False           # 关闭SQL日志
+        }
+        # SQLite 内存数据库使用每个线程一个连接的连接池，不支持设置连接池大小
+        if not (db_type == "sqlite" and (":memory:" in conn_str or "mode=memory" in conn_str
+                                         or conn_str.rstrip("/") == "sqlite:")):
+            engine_kwargs.update(
+                pool_size=pool.get("pool_size", 5),
+                max_overflow=pool.get("max_overflow", 10),
+                pool_timeout=pool.get("pool_timeout", 30),
+            )
+
+        # 根据数据库类型添加适当的驱动和编码设置
+        if db_type == "mssql":
+            if not conn_str.startswith("mssql"):
+                conn_str = f"mssql+pymssql://{conn_str}"
+            # SQL Server 的特殊编码设置
+            engine_kwargs["connect_args"] = {
+                "charset": "cp936",  # 使用 cp936 (GBK) 编码，这是 pymssql 推荐的中文编码
+                "autocommit": False
+            }
+            self.logger.info(
+                f"创建 SQL Server 连接，连接字符串: {conn_str}, 参数: {engine_kwargs}")
+        elif db_type == "mysql":
+            if not conn_str.startswith("mysql"):
+                conn_str = f"mysql+pymysql://{conn_str}"
+            if "?" in conn_str:
+                conn_str += "&charset=utf8mb4"
+            else:
+                conn_str += "?charset=utf8mb4"
+            engine_kwargs["connect_args"] = {"charset": "utf8mb4"}
+        elif db_type == "postgresql":
+            if not conn_str.startswith("postgresql"):
+                conn_str = f"postgresql+psycopg2://{conn_str}"
+            if "?" in conn_str:
+                conn_str += "&client_encoding=utf8"
+            else:
+                conn_str += "?client_encoding=utf8"
+
+        # 语句超时：PostgreSQL 由服务端执行，pymssql 由驱动执行，MySQL 在连接建立后设置
+        timeout = float(config.get("statement_timeout") or 0)
+        if timeout > 0:
+            if db_type == "postgresql":
+                connect_args = engine_kwargs.setdefault("connect_args", {})
+                connect_args["options"] = f"-c statement_timeout={int(timeout * 1000)}"
+            elif db_type == "mssql":
+                engine_kwargs["connect_args"]["timeout"] = max(1, math.ceil(timeout))
+
+        return conn_str, engine_kwargs
+
     def get_connection_info(self, alias: str) -> Optional[Dict]:
         """
         获取连接信息
@@ -251,7 +1223,5 @@ class DatabaseManager:
 
     def clear_all_connections(self):
         """清除所有连接"""
-        for engine in self.engines.values():
-            engine.dispose()
-        self.engines.clear()
+        self._dispose_all_engines()
         self.connections.clear()
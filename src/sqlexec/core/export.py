@@ -0,0 +1,511 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import base64
+import csv
+import datetime
+import decimal
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+from sqlexec.core.cancel import CancelScope, QueryCanceled
+from sqlexec.core.db_manager import DatabaseManager, DEFAULT_BATCH_SIZE
+from sqlexec.core.fanout import FanOutRunner
+from sqlexec.core.merge import SOURCE_COLUMN
+from sqlexec.core.metrics import QueryMetrics
+from sqlexec.core.result_set import ResultSet
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+STDOUT = "-"  # 导出到标准输出的路径
+
+
+class ExportStopped(Exception):
+    """导出被取消"""
+
+
+class ResultWriter:
+    """导出文件写入器基类
+
+    按批次接收数据并立即写入文件，不保留已写入的数据。
+    """
+
+    extension = ""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        """
+        初始化写入器
+
+        Args:
+            path: 文件路径，文本格式可以用 ``-`` 表示标准输出
+            columns: 列名
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+
+    def write(self, batch: ResultSet) -> None:
+        """写入一批数据"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """完成写入并关闭文件"""
+        raise NotImplementedError
+
+    @property
+    def bytes_written(self) -> int:
+        """已写入的字节数"""
+        raise NotImplementedError
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _CountingStream:
+    """包装标准输出并统计写入的字节数"""
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+        self._encoding = getattr(stream, "encoding", None) or "utf-8"
+        self._bytes = 0
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        self._bytes += len(text.encode(self._encoding, "replace"))
+        return self._stream.write(text)
+
+    def tell(self) -> int:
+        return self._bytes
+
+    def close(self) -> None:
+        self._stream.flush()
+        self.closed = True
+
+
+def _open_text(path: str, encoding: str, newline: str) -> Any:
+    """打开文本文件，路径为 ``-`` 时写入标准输出"""
+    if path == STDOUT:
+        return _CountingStream(sys.stdout)
+    return open(path, "w", encoding=encoding, newline=newline)
+
+
+class CsvWriter(ResultWriter):
+    """CSV写入器，默认带 BOM 以便 Excel 正确识别 UTF-8"""
+
+    extension = "csv"
+
+    def __init__(self, path: str, columns: Sequence[str], encoding: str = "utf-8-sig"):
+        super().__init__(path, columns)
+        if path == STDOUT:
+            encoding = "utf-8"  # 标准输出不写入 BOM
+        self._file = _open_text(path, encoding, "")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    @staticmethod
+    def _format(value: Any) -> Any:
+        if value is None:
+            return ""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).hex()
+        return value
+
+    def write(self, batch: ResultSet) -> None:
+        format_value = self._format
+        self._writer.writerows([format_value(value) for value in row] for row in batch)
+        self.rows += len(batch)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def _json_default(value: Any) -> Any:
+    """将 JSON 不支持的类型转换为字符串"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, (decimal.Decimal, uuid.UUID, datetime.timedelta)):
+        return str(value)
+    return repr(value)
+
+
+class JsonLinesWriter(ResultWriter):
+    """JSON Lines写入器，每行一个 JSON 对象"""
+
+    extension = "jsonl"
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        super().__init__(path, columns)
+        self._file = _open_text(path, "utf-8", "\n")
+        self._encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+    def write(self, batch: ResultSet) -> None:
+        encode = self._encoder.encode
+        columns = self.columns
+        self._file.write("".join(encode(dict(zip(columns, row))) + "\n" for row in batch))
+        self.rows += len(batch)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetWriter(ResultWriter):
+    """Parquet写入器，需要安装 pyarrow
+
+    列类型由第一批数据推断，全为 NULL 或类型混杂的列按字符串保存。
+    """
+
+    extension = "parquet"
+
+    @staticmethod
+    def require() -> Tuple[Any, Any]:
+        """
+        导入 pyarrow
+
+        Raises:
+            RuntimeError: 没有安装 pyarrow
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("导出 Parquet 需要安装 pyarrow: pip install pyarrow") from None
+        return pyarrow, pyarrow.parquet
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        super().__init__(path, columns)
+        if path == STDOUT:
+            raise ValueError("Parquet 格式不能输出到标准输出")
+        self._pa, self._pq = self.require()
+        self._schema = None
+        self._writer = None
+
+    def _to_array(self, values: List[Any], field: Any = None) -> Any:
+        """将一列的值转换为 Arrow 数组"""
+        pa = self._pa
+        if field is not None and pa.types.is_string(field.type):
+            return pa.array([None if value is None else str(value) for value in values], pa.string())
+        try:
+            array = pa.array(values, type=field.type if field is not None else None)
+        except (pa.ArrowException, TypeError, ValueError):
+            if field is not None:
+                raise RuntimeError(f"列 {field.name} 的数据类型与前面的数据不一致") from None
+            return self._to_array(values, pa.field("", pa.string()))
+        if pa.types.is_null(array.type):
+            return self._to_array(values, pa.field("", pa.string()))
+        return array
+
+    def write(self, batch: ResultSet) -> None:
+        if not len(batch):
+            return
+        pa = self._pa
+        if self._schema is None:
+            arrays = [self._to_array(list(batch.column(i))) for i in range(len(self.columns))]
+            self._schema = pa.schema([pa.field(name, array.type)
+                                      for name, array in zip(self.columns, arrays)])
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        else:
+            arrays = [self._to_array(list(batch.column(i)), field)
+                      for i, field in enumerate(self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        self.rows += len(batch)
+
+    @property
+    def bytes_written(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self) -> None:
+        if self._writer is None:
+            # 没有数据时写入只有列名的文件
+            pa = self._pa
+            self._schema = pa.schema([pa.field(name, pa.string()) for name in self.columns])
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        if self._writer.is_open:
+            self._writer.close()
+
+
+EXPORT_FORMATS: Dict[str, type] = {
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def create_writer(fmt: str, path: str, columns: Sequence[str]) -> ResultWriter:
+    """
+    创建导出写入器
+
+    Args:
+        fmt: 导出格式（csv、jsonl、parquet）
+        path: 文件路径
+        columns: 列名
+
+    Returns:
+        ResultWriter: 写入器
+
+    Raises:
+        ValueError: 不支持的格式
+        RuntimeError: 缺少格式需要的依赖
+    """
+    return check_format(fmt)(path, columns)
+
+
+def check_format(fmt: str) -> type:
+    """
+    检查导出格式是否可用
+
+    Args:
+        fmt: 导出格式
+
+    Returns:
+        type: 格式对应的写入器类
+
+    Raises:
+        ValueError: 不支持的格式
+        RuntimeError: 缺少格式需要的依赖
+    """
+    writer_class = EXPORT_FORMATS.get(fmt)
+    if writer_class is None:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if writer_class is ParquetWriter:
+        ParquetWriter.require()
+    return writer_class
+
+
+def export_file_name(alias: str, fmt: str) -> str:
+    """生成连接对应的导出文件名"""
+    return f"{_UNSAFE_FILENAME_CHARS.sub('_', alias)}.{EXPORT_FORMATS[fmt].extension}"
+
+
+def export_result(result: Union[ResultSet, Any], path: str, fmt: str,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    导出已有的查询结果（包括落盘结果），按批写入
+
+    Args:
+        result: 查询结果
+        path: 文件路径
+        fmt: 导出格式
+        batch_size: 每批行数
+
+    Returns:
+        int: 导出的行数
+    """
+    rows = iter(result)
+    with create_writer(fmt, path, result.columns) as writer:
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            writer.write(ResultSet.from_rows(result.columns, chunk))
+        return writer.rows
+
+
+class ExportProgress:
+    """导出进度和吞吐量"""
+
+    def __init__(self, total_connections: int):
+        self.total_connections = total_connections
+        self.completed_connections = 0
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return max(time.monotonic() - self.started, 1e-6)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1024 / 1024 / self.elapsed
+
+    def summary(self) -> str:
+        """进度摘要"""
+        return (f"{self.completed_connections}/{self.total_connections} 个连接，{self.rows} 行，"
+                f"{self.bytes / 1024 / 1024:.1f} MB，"
+                f"{self.rows_per_second:.0f} 行/秒，{self.mb_per_second:.2f} MB/秒")
+
+
+class ResultExporter:
+    """从数据库游标流式导出查询结果
+
+    每个连接以流式查询逐批读取，读到的批次立即写入文件，内存中只保留
+    当前批次。可以每个连接导出一个文件，也可以合并为一个带来源列的文件。
+    """
+
+    def __init__(self, db_manager: DatabaseManager, fmt: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 8,
+                 limits: Optional[Dict[str, int]] = None):
+        """
+        初始化导出器
+
+        Args:
+            db_manager: 数据库管理器
+            fmt: 导出格式（csv、jsonl、parquet）
+            batch_size: 每批行数
+            max_workers: 同时导出的连接数
+            limits: 限流键对应的并发上限，参见 :class:`FanOutRunner`
+        """
+        check_format(fmt)
+        self.db_manager = db_manager
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.limits = limits or {}
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._runner = FanOutRunner(max_workers, self.limits)
+        self._scope = CancelScope()
+        self.metrics: Dict[str, QueryMetrics] = {}  # 最近一次导出各连接的统计，写入时间计入“其他”
+
+    def stop(self) -> None:
+        """取消导出，中断正在执行的查询，正在写入的批次完成后停止"""
+        self._stop.set()
+        self._runner.stop()
+        self._scope.cancel()
+
+    def export(self, aliases: List[str], query: str, target: str, merge: bool = False,
+               on_progress: Optional[Callable[[ExportProgress], None]] = None,
+               keys_of: Optional[Callable[[str], Iterable[str]]] = None,
+               stop_on_error: bool = True) -> List[str]:
+        """
+        导出查询结果
+
+        Args:
+            aliases: 连接别名列表
+            query: SQL语句
+            target: 合并导出时为文件路径（``-`` 表示标准输出），否则为目录（每个连接一个文件）
+            merge: 是否合并为一个文件
+            on_progress: 进度回调，在导出线程中调用
+            keys_of: 返回连接的限流键
+            stop_on_error: 某个连接失败时是否停止其他连接的导出
+
+        Returns:
+            List[str]: 写入的文件
+
+        Raises:
+            RuntimeError: 连接执行或写入失败，信息包含所有失败的连接
+            ExportStopped: 导出被取消
+        """
+        self._stop.clear()
+        self._scope = CancelScope()
+        self.metrics = {}
+        progress = ExportProgress(len(aliases))
+        merged_writer: Optional[ResultWriter] = None
+        paths: List[str] = []
+        if merge:
+            paths.append(target)
+        else:
+            os.makedirs(target, exist_ok=True)
+
+        def report(rows: int, delta_bytes: int) -> None:
+            with self._lock:
+                progress.rows += rows
+                progress.bytes += delta_bytes
+            if on_progress:
+                on_progress(progress)
+
+        def export_one(alias: str) -> str:
+            nonlocal merged_writer
+            writer: Optional[ResultWriter] = None
+            metrics = self.metrics[alias] = QueryMetrics(alias, attempts=1)
+            started = time.perf_counter()
+            stream = self.db_manager.stream_query(alias, query, self.batch_size, self._scope, metrics)
+            try:
+                for batch in stream:
+                    if self._stop.is_set():
+                        raise ExportStopped()
+                    if merge:
+                        batch = ResultSet([SOURCE_COLUMN] + batch.columns,
+                                          [[alias] * len(batch)]
+                                          + [batch.column(i) for i in range(len(batch.columns))])
+                        with self._lock:
+                            if merged_writer is None:
+                                merged_writer = create_writer(self.fmt, target, batch.columns)
+                            elif len(batch.columns) != len(merged_writer.columns):
+                                raise ValueError(f"{alias} 的结果列数与其他连接不一致")
+                            before = merged_writer.bytes_written
+                            merged_writer.write(batch)
+                            written = merged_writer.bytes_written - before
+                    else:
+                        if writer is None:
+                            path = os.path.join(target, export_file_name(alias, self.fmt))
+                            writer = create_writer(self.fmt, path, batch.columns)
+                        before = writer.bytes_written
+                        writer.write(batch)
+                        written = writer.bytes_written - before
+                    report(len(batch), written)
+                metrics.ok = True
+            except Exception as e:
+                metrics.error = str(e)
+                raise
+            finally:
+                stream.close()
+                if writer is not None:
+                    writer.close()
+                metrics.total_ms = (time.perf_counter() - started) * 1000
+                self.db_manager.metrics.record(metrics)
+            return writer.path if writer is not None else ""
+
+        errors: List[str] = []
+
+        def run_one(alias: str) -> str:
+            try:
+                return export_one(alias)
+            except ExportStopped:
+                return ""
+            except QueryCanceled:
+                if self._stop.is_set():
+                    return ""
+                raise
+            except Exception as e:
+                errors.append(f"导出 {alias} 失败: {e}")
+                if stop_on_error:
+                    self.stop()
+                return ""
+
+        def on_done(index: int, alias: str, path: Optional[str]) -> None:
+            with self._lock:
+                progress.completed_connections += 1
+            if on_progress:
+                on_progress(progress)
+
+        try:
+            results = self._runner.run(aliases, run_one, keys_of, on_done)
+        finally:
+            if merged_writer is not None:
+                merged_writer.close()
+            self.db_manager.metrics.flush()
+
+        if errors:
+            raise RuntimeError("\n".join(errors))
+        if self._stop.is_set():
+            raise ExportStopped("导出已取消")
+        if not merge:
+            paths.extend(path for path in results if path)
+        self.logger.info(f"导出完成: {progress.summary()}")
+        return paths
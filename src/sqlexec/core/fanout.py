@@ -0,0 +1,150 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+
+
+GROUP_KEY_PREFIX = "group:"  # 组的限流键前缀
+HOST_KEY_PREFIX = "host:"  # 数据库服务器的限流键前缀
+
+
+def build_limits(group_limits: Optional[Dict[str, int]] = None,
+                 host_limits: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    生成 :class:`FanOutRunner` 使用的限流键上限
+
+    Args:
+        group_limits: 组名到并发上限的映射
+        host_limits: 服务器地址（主机:端口）到并发上限的映射
+
+    Returns:
+        Dict[str, int]: 限流键到并发上限的映射
+    """
+    limits = {f"{GROUP_KEY_PREFIX}{name}": cap for name, cap in (group_limits or {}).items()}
+    limits.update({f"{HOST_KEY_PREFIX}{host}": cap for host, cap in (host_limits or {}).items()})
+    return limits
+
+
+def limit_keys(info: Dict[str, Any]) -> List[str]:
+    """
+    获取连接的限流键
+
+    Args:
+        info: 连接配置，包含所属组 ``groups`` 和服务器地址 ``host``
+
+    Returns:
+        List[str]: 所属组和服务器对应的限流键
+    """
+    keys = [f"{GROUP_KEY_PREFIX}{group}" for group in info.get("groups", [])]
+    if info.get("host"):
+        keys.append(f"{HOST_KEY_PREFIX}{info['host']}")
+    return keys
+
+
+class FanOutRunner:
+    """多连接并发执行调度器
+
+    使用有界线程池在多个连接上并发执行同一任务。除总并发数外，
+    每个任务还可以关联若干限流键（例如 ``group:生产环境``、``host:db1:1433``），
+    同一个键下同时运行的任务数不会超过其上限。
+
+    调度在调用线程中完成：只有当任务涉及的所有限流键都有空闲名额时
+    才会提交到线程池，因此不会出现工作线程阻塞等待名额的情况。
+    有空闲名额时优先派发所在服务器上运行任务最少的连接，
+    使多个服务器轮流执行，而不是按连接顺序集中在同一台服务器上。
+    """
+    def __init__(self, max_workers: int = 8, limits: Optional[Dict[str, int]] = None):
+        """
+        初始化调度器
+
+        Args:
+            max_workers: 最大并发数
+            limits: 限流键到并发上限的映射，上限小于等于0表示不限制
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.limits: Dict[str, int] = {
+            key: int(cap) for key, cap in (limits or {}).items() if cap and cap > 0
+        }
+        self.logger = logging.getLogger(__name__)
+        self._stopped = False
+
+    def stop(self) -> None:
+        """停止派发新任务，已在运行的任务会继续执行完毕"""
+        self._stopped = True
+
+    def run(self,
+            aliases: List[str],
+            func: Callable[[str], Any],
+            keys_of: Optional[Callable[[str], Iterable[str]]] = None,
+            on_done: Optional[Callable[[int, str, Any], None]] = None) -> List[Optional[Any]]:
+        """
+        在所有连接上执行任务
+
+        Args:
+            aliases: 连接别名列表
+            func: 对单个连接执行的任务，参数为连接别名
+            keys_of: 返回连接所属限流键的函数
+            on_done: 任务完成回调，参数为(序号, 连接别名, 返回值)，在调用线程中执行
+
+        Returns:
+            List[Optional[Any]]: 与aliases顺序一致的返回值列表，未执行的任务为None
+        """
+        self._stopped = False
+        results: List[Optional[Any]] = [None] * len(aliases)
+        # (序号, 连接别名, 有上限的限流键, 服务器键)，没有服务器键的连接单独作为一个服务器
+        pending: List[Tuple[int, str, List[str], str]] = []
+        for index, alias in enumerate(aliases):
+            all_keys = list(keys_of(alias)) if keys_of else []
+            keys = [key for key in all_keys if key in self.limits]
+            host = next((key for key in all_keys if key.startswith(HOST_KEY_PREFIX)), alias)
+            pending.append((index, alias, keys, host))
+
+        active: Dict[str, int] = {}  # 各限流键正在运行的任务数
+        hosts: Dict[str, int] = {}  # 各服务器正在运行的任务数
+        running: Dict[Future, Tuple[int, str, List[str], str]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="fanout") as pool:
+            while pending or running:
+                # 派发所有名额允许的任务
+                if self._stopped:
+                    pending = []
+                while pending and len(running) < self.max_workers:
+                    position = self._next_task(pending, active, hosts)
+                    if position is None:
+                        break
+                    task = pending.pop(position)
+                    _, alias, keys, host = task
+                    for key in keys:
+                        active[key] = active.get(key, 0) + 1
+                    hosts[host] = hosts.get(host, 0) + 1
+                    running[pool.submit(func, alias)] = task
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, alias, keys, host = running.pop(future)
+                    for key in keys:
+                        active[key] -= 1
+                    hosts[host] -= 1
+                    results[index] = future.result()
+                    if on_done:
+                        on_done(index, alias, results[index])
+
+        return results
+
+    def _next_task(self, pending: List[Tuple[int, str, List[str], str]],
+                   active: Dict[str, int], hosts: Dict[str, int]) -> Optional[int]:
+        """选择下一个可以派发的任务：所有限流键都有名额，且所在服务器运行的任务最少"""
+        best: Optional[int] = None
+        best_load = 0
+        for position, (_, _, keys, host) in enumerate(pending):
+            load = hosts.get(host, 0)
+            if best is not None and load >= best_load:
+                continue
+            if all(active.get(key, 0) < self.limits[key] for key in keys):
+                best, best_load = position, load
+                if load == 0:
+                    break
+        return best
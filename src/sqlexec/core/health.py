@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+import logging
+import math
+import threading
+import time
+
+from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.fanout import FanOutRunner
+from sqlexec.core.pool import PoolStats
+
+
+@dataclass
+class HealthResult:
+    """单个连接的健康检查结果，时间单位为毫秒"""
+    alias: str
+    ok: bool
+    connect_ms: Optional[float] = None
+    rtt_min_ms: Optional[float] = None
+    rtt_avg_ms: Optional[float] = None
+    rtt_p95_ms: Optional[float] = None
+    error: str = ""
+    pool: Optional[PoolStats] = None  # 检查时连接池的状态
+
+    def summary(self) -> str:
+        """简短的状态描述"""
+        if not self.ok:
+            return "失败"
+        return f"正常 {self.connect_ms:.0f}ms / {self.rtt_avg_ms:.1f}ms"
+
+    def details(self) -> str:
+        """详细的状态描述"""
+        if not self.ok:
+            return f"连接失败：{self.error}"
+        text = (f"建立连接: {self.connect_ms:.1f}ms\n"
+                f"往返延迟: 最小 {self.rtt_min_ms:.1f}ms, 平均 {self.rtt_avg_ms:.1f}ms, "
+                f"P95 {self.rtt_p95_ms:.1f}ms")
+        if self.pool is not None:
+            text += f"\n连接池: {self.pool.summary()}"
+        return text
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """按最近秩法计算百分位数"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class HealthChecker:
+    """连接健康检查器
+
+    绕过连接池为每个连接单独建立一个DBAPI连接，记录建立连接的耗时，
+    再多次执行 ``SELECT 1`` 统计往返延迟。多个连接并发检查，
+    每个连接都有独立的超时限制。
+    """
+
+    def __init__(self, db_manager: DatabaseManager, timeout: float = 5.0,
+                 samples: int = 5, max_workers: int = 16):
+        """
+        初始化健康检查器
+
+        Args:
+            db_manager: 数据库管理器
+            timeout: 单个连接的检查超时（秒）
+            samples: 往返延迟的采样次数
+            max_workers: 最大并发数
+        """
+        self.db_manager = db_manager
+        self.timeout = timeout
+        self.samples = max(1, samples)
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    def check(self, aliases: List[str],
+              on_result: Optional[Callable[[HealthResult], None]] = None) -> List[HealthResult]:
+        """
+        并发检查多个连接
+
+        Args:
+            aliases: 连接别名列表
+            on_result: 单个连接检查完成时的回调
+
+        Returns:
+            List[HealthResult]: 与aliases顺序一致的检查结果
+        """
+        runner = FanOutRunner(self.max_workers)
+        return runner.run(
+            aliases,
+            self.check_one,
+            on_done=(lambda index, alias, result: on_result(result)) if on_result else None
+        )
+
+    def check_one(self, alias: str) -> HealthResult:
+        """
+        检查单个连接，超过超时时间仍未完成时判定为失败
+
+        建立连接的超时通过驱动的连接超时参数生效（参见 ``CONNECT_TIMEOUT_ARGS``）；
+        连接建立后由计时器在剩余时间用完时中断正在执行的采样语句，
+        检查不会在后台留下仍在等待的线程和连接。
+
+        Args:
+            alias: 连接别名
+
+        Returns:
+            HealthResult: 检查结果
+        """
+        return self._probe(alias)
+
+    def _timeout_result(self, alias: str) -> HealthResult:
+        """超出检查超时的结果"""
+        self.logger.warning(f"连接 {alias} 健康检查超时（{self.timeout:g}秒）")
+        return HealthResult(alias, False, error=f"超时（{self.timeout:g}秒）")
+
+    def _probe(self, alias: str) -> HealthResult:
+        """建立连接并采样往返延迟"""
+        try:
+            # 引擎创建（加载驱动）不计入连接耗时
+            self.db_manager.get_engine(alias)
+            start = time.perf_counter()
+            deadline = start + self.timeout
+            conn = self.db_manager.open_raw_connection(alias, self.timeout)
+            connect_ms = (time.perf_counter() - start) * 1000
+            # 服务器接受连接后不再响应时，驱动的读取会一直等待，由计时器中断
+            timer = None
+            timed_out = threading.Event()
+            canceller = self.db_manager.canceller_for(alias, conn)
+            if canceller is not None:
+                def on_timeout() -> None:
+                    timed_out.set()
+                    canceller()
+
+                timer = threading.Timer(max(0.0, deadline - time.perf_counter()), on_timeout)
+                timer.daemon = True
+                timer.start()
+            try:
+                rtts = []
+                cursor = conn.cursor()
+                for _ in range(self.samples):
+                    start = time.perf_counter()
+                    if start > deadline:
+                        cursor.close()
+                        return self._timeout_result(alias)
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                    rtts.append((time.perf_counter() - start) * 1000)
+                cursor.close()
+            except Exception:
+                if timed_out.is_set():
+                    return self._timeout_result(alias)
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                conn.close()
+
+            # 连接可用，不再等待熔断超时
+            self.db_manager.reset_circuit(alias)
+            return HealthResult(
+                alias, True,
+                connect_ms=connect_ms,
+                rtt_min_ms=min(rtts),
+                rtt_avg_ms=sum(rtts) / len(rtts),
+                rtt_p95_ms=percentile(rtts, 95),
+                pool=self.db_manager.pool_stats(alias)
+            )
+        except Exception as e:
+            self.logger.warning(f"连接 {alias} 健康检查失败: {str(e)}")
+            return HealthResult(alias, False, error=str(e))
@@ -0,0 +1,297 @@
+"""查询历史
+
+每次执行的语句、目标连接、耗时、行数和状态保存在本地 SQLite 数据库中（默认为配置文件
+所在目录下的 ``history.db``）。SQLite 支持 FTS5 时建立 trigram 全文索引，任意子串
+（包括中文）的搜索不需要扫描全表；不支持时退回 LIKE 查询。
+
+历史按条数和天数保留，超出的记录在打开时和每写入一定条数后清理。
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+MAX_QUERY_CHARS = 100_000  # 单条记录保存的语句最大长度，超出部分截断
+COMPACT_INTERVAL = 200  # 每写入多少条记录清理一次
+MIN_FTS_TERM = 3  # trigram 索引只能匹配至少 3 个字符的搜索词，更短的词使用 LIKE
+
+STATUS_SUCCESS = "success"
+STATUS_FAILED = "failed"
+STATUS_CANCELED = "canceled"
+STATUS_NAMES = {STATUS_SUCCESS: "成功", STATUS_FAILED: "失败", STATUS_CANCELED: "已取消"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    query TEXT NOT NULL,
+    aliases TEXT NOT NULL,
+    duration_ms REAL,
+    rows INTEGER,
+    status TEXT NOT NULL,
+    error TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS history_started_at ON history (started_at);
+"""
+
+# 外部内容的全文索引，由触发器与 history 表保持同步
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE history_fts USING fts5(
+    query, aliases, error, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, query, aliases, error)
+    VALUES (new.id, new.query, new.aliases, new.error);
+END;
+CREATE TRIGGER history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, query, aliases, error)
+    VALUES ('delete', old.id, old.query, old.aliases, old.error);
+END;
+"""
+
+
+@dataclass
+class HistoryEntry:
+    """一次执行的历史记录"""
+    query: str
+    aliases: List[str] = field(default_factory=list)  # 目标连接别名
+    started_at: float = field(default_factory=time.time)  # 开始时间（Unix 时间戳）
+    duration_ms: Optional[float] = None  # 耗时，分页加载的合并结果为None
+    rows: Optional[int] = None  # 返回的总行数，未知时为None
+    status: str = STATUS_SUCCESS
+    error: str = ""
+    id: Optional[int] = None
+
+    @property
+    def title(self) -> str:
+        """语句的第一个非空行，用于列表显示"""
+        for line in self.query.splitlines():
+            if line.strip():
+                return line.strip()
+        return ""
+
+    @property
+    def status_name(self) -> str:
+        return STATUS_NAMES.get(self.status, self.status)
+
+
+def _like_pattern(term: str) -> str:
+    """生成包含 term 的 LIKE 模式，转义通配符"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class QueryHistory:
+    """本地查询历史
+
+    数据库在第一次使用时才打开，可以在多个线程中使用。
+    """
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 10000, retention_days: int = 90):
+        """
+        初始化查询历史
+
+        Args:
+            path: 历史数据库文件路径
+            max_entries: 最多保留的记录数，0表示不限制
+            retention_days: 记录保留的天数，0表示不限制
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.fts_enabled = False  # 是否使用全文索引
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._since_compact = 0
+
+    def configure(self, max_entries: int, retention_days: int) -> None:
+        """修改保留策略，下次写入时生效"""
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self._since_compact = COMPACT_INTERVAL
+
+    def _connection(self) -> sqlite3.Connection:
+        """打开数据库并创建表，调用方需要持有锁"""
+        if self._conn is not None:
+            return self._conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            conn.execute("PRAGMA busy_timeout = 5000")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0:
+                # 新数据库：清理后可以逐步归还空闲页
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            with conn:
+                conn.executescript(_SCHEMA)
+                self.fts_enabled = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone() is not None
+                if version == 0 and not self.fts_enabled:
+                    try:
+                        conn.executescript(_FTS_SCHEMA)
+                        self.fts_enabled = True
+                    except sqlite3.OperationalError as e:
+                        logger.info(f"SQLite 不支持 FTS5 trigram 索引，历史搜索使用 LIKE: {e}")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except BaseException:
+            conn.close()
+            raise
+        self._conn = conn
+        self._compact(conn)
+        return conn
+
+    def add(self, entry: HistoryEntry) -> Optional[int]:
+        """
+        保存一条记录，写入失败只记录日志，不影响查询
+
+        Args:
+            entry: 历史记录
+
+        Returns:
+            Optional[int]: 记录编号，写入失败时为None
+        """
+        query = entry.query[:MAX_QUERY_CHARS]
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    cursor = conn.execute(
+                        "INSERT INTO history (started_at, query, aliases, duration_ms, rows, status, error)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (entry.started_at, query, json.dumps(entry.aliases, ensure_ascii=False),
+                         entry.duration_ms, entry.rows, entry.status, entry.error))
+                entry.id = cursor.lastrowid
+                self._since_compact += 1
+                if self._since_compact >= COMPACT_INTERVAL:
+                    self._compact(conn)
+            return entry.id
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"保存查询历史失败: {e}")
+            return None
+
+    def search(self, text: str = "", status: Optional[str] = None,
+               alias: Optional[str] = None, limit: int = 500) -> List[HistoryEntry]:
+        """
+        搜索历史记录，按时间从新到旧排列
+
+        搜索词按空白分隔，每个词都要出现在语句、连接别名或错误信息中（不区分大小写）。
+
+        Args:
+            text: 搜索词，为空时返回最近的记录
+            status: 只返回该状态的记录
+            alias: 只返回在该连接上执行的记录
+            limit: 最多返回的记录数
+
+        Returns:
+            List[HistoryEntry]: 历史记录
+
+        Raises:
+            sqlite3.Error: 读取历史数据库失败
+        """
+        with self._lock:
+            conn = self._connection()  # 打开后才知道是否有全文索引
+        conditions: List[str] = []
+        params: List = []
+        fts_terms: List[str] = []
+        for term in text.split():
+            if self.fts_enabled and len(term) >= MIN_FTS_TERM:
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+            else:
+                conditions.append("(query LIKE ? ESCAPE '\\' OR aliases LIKE ? ESCAPE '\\'"
+                                  " OR error LIKE ? ESCAPE '\\')")
+                params.extend([_like_pattern(term)] * 3)
+        if fts_terms:
+            conditions.append("id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+            params.append(" AND ".join(fts_terms))
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if alias:
+            conditions.append("EXISTS (SELECT 1 FROM json_each(history.aliases) WHERE value = ?)")
+            params.append(alias)
+        sql = "SELECT id, started_at, query, aliases, duration_ms, rows, status, error FROM history"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = conn.execute(sql, params).fetchall()
+        return [HistoryEntry(id=row[0], started_at=row[1], query=row[2], aliases=json.loads(row[3]),
+                             duration_ms=row[4], rows=row[5], status=row[6], error=row[7])
+                for row in rows]
+
+    def count(self) -> int:
+        """记录总数"""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def delete(self, ids: Iterable[int]) -> None:
+        """删除指定的记录"""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM history WHERE id = ?", [(i,) for i in ids])
+
+    def clear(self) -> None:
+        """删除所有记录"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM history")
+            self._reclaim(conn)
+
+    def compact(self) -> int:
+        """
+        按保留策略删除过期和超出条数的记录
+
+        Returns:
+            int: 删除的记录数
+        """
+        with self._lock:
+            return self._compact(self._connection())
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        """按保留策略清理，调用方需要持有锁"""
+        self._since_compact = 0
+        removed = 0
+        with conn:
+            if self.retention_days > 0:
+                cutoff = time.time() - self.retention_days * 86400
+                removed += conn.execute("DELETE FROM history WHERE started_at < ?", (cutoff,)).rowcount
+            if self.max_entries > 0:
+                row = conn.execute(
+                    "SELECT started_at, id FROM history ORDER BY started_at DESC, id DESC"
+                    " LIMIT 1 OFFSET ?", (self.max_entries,)).fetchone()
+                if row is not None:
+                    removed += conn.execute(
+                        "DELETE FROM history WHERE started_at < ? OR (started_at = ? AND id <= ?)",
+                        (row[0], row[0], row[1])).rowcount
+        if removed:
+            logger.info(f"已清理 {removed} 条查询历史")
+            self._reclaim(conn)
+        return removed
+
+    def _reclaim(self, conn: sqlite3.Connection) -> None:
+        """合并全文索引的段并归还空闲页"""
+        if self.fts_enabled:
+            with conn:
+                conn.execute("INSERT INTO history_fts (history_fts) VALUES ('optimize')")
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def close(self) -> None:
+        """关闭数据库"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,435 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import heapq
+import itertools
+import logging
+import re
+
+from sqlexec.core.cancel import CancelScope, QueryCanceled
+from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.fanout import FanOutRunner
+from sqlexec.core.result_set import ResultSet
+
+SOURCE_COLUMN = "_source"  # 合并结果中标识来源连接的列名
+
+# SQL词法单元：字符串和带引号的标识符、注释、标点、空白以及其他单词
+SQL_TOKEN_PATTERN = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])"  # 字符串和带引号的标识符
+    r"|(--[^\n]*|/\*.*?\*/)"  # 注释
+    r"|([(),;])"  # 括号、逗号和分号
+    r"|(\s+)"  # 空白
+    r"|([^\s'\"`\[(),;]+)",  # 其他
+    re.DOTALL
+)
+# ORDER BY 子句之后可能出现的子句
+_ORDER_END_KEYWORDS = {"LIMIT", "OFFSET", "FETCH", "FOR", "OPTION", "UNION", "INTERSECT", "EXCEPT"}
+# 把 NULL 视为最大值的数据库：未指定 NULLS FIRST/LAST 时 ASC 排在最后、DESC 排在最前；
+# SQL Server、MySQL、SQLite 把 NULL 视为最小值
+NULLS_LARGEST_TYPES = ("postgresql", "oracle")
+# 默认按二进制比较文本的数据库，与本地（按码位）比较的顺序一致
+BINARY_COLLATION_TYPES = ("sqlite",)
+
+
+class OrderItem:
+    """ORDER BY 中的一项"""
+
+    def __init__(self, expression: str, descending: bool = False,
+                 nulls_first: Optional[bool] = None):
+        self.expression = expression
+        self.descending = descending
+        self.nulls_first = nulls_first  # None 表示未指定，取决于数据库
+
+    def resolve_nulls_first(self, db_type: str = "") -> bool:
+        """
+        NULL 是否排在最前
+
+        Args:
+            db_type: 数据库类型，未指定 NULLS FIRST/LAST 时按该数据库的默认行为
+
+        Returns:
+            bool: NULL 是否排在最前
+        """
+        if self.nulls_first is not None:
+            return self.nulls_first
+        if (db_type or "").lower() in NULLS_LARGEST_TYPES:
+            return self.descending
+        return not self.descending
+
+    def __repr__(self) -> str:
+        return f"OrderItem({self.expression!r}, descending={self.descending})"
+
+
+def parse_order_by(query: str) -> List[OrderItem]:
+    """
+    解析语句最外层的 ORDER BY 子句
+
+    Args:
+        query: SQL语句
+
+    Returns:
+        List[OrderItem]: 排序项，没有最外层 ORDER BY 时返回空列表
+    """
+    tokens: List[Tuple[str, int]] = []  # (文本, 括号深度)
+    depth = 0
+    for match in SQL_TOKEN_PATTERN.finditer(query):
+        quoted, comment, punct, space, word = match.groups()
+        if comment or space:
+            continue
+        token = quoted or punct or word
+        if token == ")":
+            depth -= 1
+        tokens.append((token, depth))
+        if token == "(":
+            depth += 1
+
+    # 查找最后一个最外层的 ORDER BY
+    start = None
+    for i in range(len(tokens) - 1):
+        if (tokens[i][1] == 0 and tokens[i][0].upper() == "ORDER"
+                and tokens[i + 1][0].upper() == "BY"):
+            start = i + 2
+    if start is None:
+        return []
+
+    items: List[OrderItem] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if not current:
+            return
+        words = [word.upper() for word in current]
+        nulls_first = None
+        if len(words) >= 2 and words[-2] == "NULLS":
+            nulls_first = words[-1] == "FIRST"
+            del current[-2:], words[-2:]
+        descending = False
+        if words and words[-1] in ("ASC", "DESC"):
+            descending = words[-1] == "DESC"
+            current.pop()
+        items.append(OrderItem(" ".join(current), descending, nulls_first))
+        current.clear()
+
+    for token, token_depth in tokens[start:]:
+        if token_depth == 0 and (token == ";" or token.upper() in _ORDER_END_KEYWORDS):
+            break
+        if token_depth == 0 and token == ",":
+            flush()
+        else:
+            current.append(token)
+    flush()
+    return items
+
+
+def _unquote(name: str) -> str:
+    """去掉标识符的引号"""
+    if len(name) >= 2 and name[0] + name[-1] in ('""', '``', '[]'):
+        return name[1:-1]
+    return name
+
+
+def resolve_sort_columns(items: Sequence[OrderItem], columns: Sequence[str]) -> List[int]:
+    """
+    将排序项对应到结果列
+
+    支持列名（忽略大小写和表名前缀）、列别名以及列序号。
+
+    Args:
+        items: 排序项
+        columns: 结果列名
+
+    Returns:
+        List[int]: 每个排序项对应的列序号
+
+    Raises:
+        ValueError: 排序项不是结果中的列
+    """
+    lowered = [column.lower() for column in columns]
+    indices = []
+    for item in items:
+        expression = item.expression.strip()
+        if expression.isdigit():
+            index = int(expression) - 1
+            if not 0 <= index < len(columns):
+                raise ValueError(f"排序列序号超出范围: {expression}")
+            indices.append(index)
+            continue
+        name = _unquote(expression.split(".")[-1].strip()).lower()
+        if name not in lowered:
+            raise ValueError(f"排序表达式不在查询结果中: {item.expression}")
+        indices.append(lowered.index(name))
+    return indices
+
+
+class _SortValue:
+    """支持 NULL 和不同类型比较的排序值"""
+
+    __slots__ = ("value", "descending", "nulls_first")
+
+    def __init__(self, value: Any, descending: bool, nulls_first: bool):
+        self.value = value
+        self.descending = descending
+        self.nulls_first = nulls_first
+
+    def __eq__(self, other: '_SortValue') -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: '_SortValue') -> bool:
+        a, b = self.value, other.value
+        if a is None or b is None:
+            if a is None and b is None:
+                return False
+            return (a is None) == self.nulls_first
+        if self.descending:
+            a, b = b, a
+        try:
+            return a < b
+        except TypeError:
+            return str(a) < str(b)
+
+
+def make_sort_key(indices: Sequence[int], items: Sequence[OrderItem],
+                  db_type: str = "") -> Callable[[Sequence[Any]], Tuple[_SortValue, ...]]:
+    """
+    生成行的排序键函数
+
+    Args:
+        indices: 排序列序号
+        items: 排序项
+        db_type: 数据库类型，决定未指定 NULLS FIRST/LAST 时 NULL 的位置
+
+    Returns:
+        Callable: 输入一行，返回可比较的排序键
+    """
+    specs = [(index, item.descending, item.resolve_nulls_first(db_type))
+             for index, item in zip(indices, items)]
+
+    def key(row: Sequence[Any]) -> Tuple[_SortValue, ...]:
+        return tuple(_SortValue(row[index], descending, nulls_first)
+                     for index, descending, nulls_first in specs)
+
+    return key
+
+
+def concat_results(results: Sequence[Tuple[str, ResultSet]],
+                   source_column: str = SOURCE_COLUMN) -> ResultSet:
+    """
+    按连接顺序拼接多个连接的结果，并在第一列注入来源连接
+
+    Args:
+        results: (连接别名, 查询结果) 列表
+        source_column: 来源列名
+
+    Returns:
+        ResultSet: 合并后的结果
+
+    Raises:
+        ValueError: 各连接结果的列数不一致
+    """
+    results = [(alias, result) for alias, result in results if result is not None]
+    if not results:
+        return ResultSet([source_column])
+
+    columns = results[0][1].columns
+    merged = ResultSet([source_column] + columns)
+    for alias, result in results:
+        if len(result.columns) != len(columns):
+            raise ValueError(f"{alias} 的结果列数与其他连接不一致")
+        merged.extend(ResultSet(
+            merged.columns,
+            [[alias] * len(result)] + [list(result.column(i)) for i in range(len(columns))]
+        ))
+    return merged.compact()
+
+
+class MergedStream:
+    """多个连接结果的流式合并
+
+    每个连接以流式查询打开，第一批数据并发获取，之后按需逐批读取。
+    语句带有最外层 ORDER BY 时，对各连接已经排好序的结果做 k 路归并，
+    得到全局有序的结果；否则按连接顺序依次拼接。
+    任何时候内存中只保留每个连接的一批数据。所有连接的查询共用 :attr:`scope`，
+    调用 :meth:`cancel` 会中断正在执行或读取的语句，之后的读取抛出 :class:`QueryCanceled`。
+
+    归并要求本地的比较顺序与各数据库的排序一致。以下情况按连接顺序拼接，
+    原因记录在 :attr:`fallback_reason` 中：排序列不在结果中、各连接对 NULL 的
+    默认位置不同、文本排序列所在的数据库不是按二进制比较文本（排序规则可能
+    不区分大小写或按语言排序），或者某个连接的第一批数据按本地比较并不有序。
+    """
+
+    def __init__(self, db_manager: DatabaseManager, aliases: List[str], query: str,
+                 batch_size: int = 1000, max_workers: int = 8,
+                 source_column: str = SOURCE_COLUMN,
+                 limits: Optional[Dict[str, int]] = None,
+                 keys_of: Optional[Callable[[str], Iterable[str]]] = None):
+        """
+        初始化合并流
+
+        Args:
+            db_manager: 数据库管理器
+            aliases: 连接别名，按连接顺序拼接时使用此顺序
+            query: SQL查询语句
+            batch_size: 每批行数
+            max_workers: 并发获取第一批数据的连接数
+            source_column: 标识来源连接的列名
+            limits: 限流键对应的并发上限，参见 :class:`FanOutRunner`
+            keys_of: 返回连接的限流键
+        """
+        self.db_manager = db_manager
+        self.aliases = aliases
+        self.query = query
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.source_column = source_column
+        self.limits = limits or {}
+        self.keys_of = keys_of
+        self.columns: List[str] = []
+        self.order_items: List[OrderItem] = parse_order_by(query)
+        self.ordered = False  # 是否按 ORDER BY 归并
+        self.fallback_reason = ""  # 有 ORDER BY 但按连接顺序拼接的原因
+        self.scope = CancelScope()  # 所有连接的查询共用的取消范围
+        self.logger = logging.getLogger(__name__)
+        self._streams: Dict[str, Iterator[ResultSet]] = {}
+        self._rows: Optional[Iterator[Tuple[Any, ...]]] = None
+
+    def open(self) -> None:
+        """
+        打开所有连接的流式查询并并发获取第一批数据
+
+        Raises:
+            QueryCanceled: 已取消
+            RuntimeError: 某个连接执行失败
+            ValueError: 各连接结果的列不一致
+        """
+        for alias in self.aliases:
+            self._streams[alias] = self.db_manager.stream_query(
+                alias, self.query, self.batch_size, scope=self.scope)
+
+        def first_batch(alias: str) -> Tuple[Optional[ResultSet], str]:
+            try:
+                return next(self._streams[alias]), ""
+            except StopIteration:
+                return None, ""
+            except Exception as e:
+                return None, str(e)
+
+        outcomes = FanOutRunner(self.max_workers, self.limits).run(
+            self.aliases, first_batch, self.keys_of)
+        if self.scope.cancelled:
+            self.close()
+            raise QueryCanceled()
+        firsts: Dict[str, ResultSet] = {}
+        for alias, (batch, error) in zip(self.aliases, outcomes):
+            if error:
+                self.close()
+                raise RuntimeError(f"在 {alias} 上执行失败: {error}")
+            if batch is not None:
+                firsts[alias] = batch
+
+        columns = next(iter(firsts.values())).columns if firsts else []
+        for alias, batch in firsts.items():
+            if len(batch.columns) != len(columns):
+                self.close()
+                raise ValueError(f"{alias} 的结果列数与其他连接不一致")
+        self.columns = [self.source_column] + columns
+
+        iterators = [self._iter_rows(alias, firsts[alias]) for alias in self.aliases
+                     if alias in firsts]
+        if self.order_items:
+            try:
+                key = self._merge_key(columns, firsts)
+                self._rows = heapq.merge(*iterators, key=key)
+                self.ordered = True
+            except ValueError as e:
+                self.fallback_reason = str(e)
+                self.logger.warning(f"无法按 ORDER BY 归并，按连接顺序拼接: {e}")
+        if self._rows is None:
+            self._rows = itertools.chain(*iterators)
+
+    def _merge_key(self, columns: List[str],
+                   firsts: Dict[str, ResultSet]) -> Callable[[Sequence[Any]], Tuple[_SortValue, ...]]:
+        """
+        生成归并使用的排序键，本地比较无法复现各数据库的排序时抛出异常
+
+        Args:
+            columns: 结果列名（不含来源列）
+            firsts: 各连接的第一批数据
+
+        Returns:
+            Callable: 输入一行（含来源列），返回可比较的排序键
+
+        Raises:
+            ValueError: 无法在本地按相同的顺序归并
+        """
+        indices = resolve_sort_columns(self.order_items, columns)
+        types = {alias: (self.db_manager.connections.get(alias, {}).get("type") or "").lower()
+                 for alias in firsts}
+
+        # 未指定 NULLS FIRST/LAST 时各数据库的默认位置必须一致
+        for item in self.order_items:
+            if len({item.resolve_nulls_first(db_type) for db_type in types.values()}) > 1:
+                raise ValueError(f"各连接的数据库对 {item.expression} 中 NULL 的默认排序位置不同，"
+                                 f"请指定 NULLS FIRST 或 NULLS LAST")
+
+        # 文本的顺序取决于服务器的排序规则，只有按二进制比较时本地才能复现
+        for item, index in zip(self.order_items, indices):
+            for alias, batch in firsts.items():
+                if types[alias] in BINARY_COLLATION_TYPES:
+                    continue
+                if any(value.__class__ is str for value in batch.column(index)):
+                    raise ValueError(f"文本排序列 {item.expression} 的顺序取决于 {alias} 的排序规则"
+                                     f"（可能不区分大小写），无法在本地归并")
+
+        key = make_sort_key([index + 1 for index in indices], self.order_items,
+                            next(iter(types.values()), ""))
+        # 各连接的第一批数据按本地比较也必须有序，例如 SQLite 中声明为 NOCASE 的列
+        for alias, batch in firsts.items():
+            previous = None
+            for row in batch:
+                current = key((alias,) + row)
+                if previous is not None and current < previous:
+                    raise ValueError(f"{alias} 返回的顺序与本地比较不一致，无法在本地归并")
+                previous = current
+        return key
+
+    def _iter_rows(self, alias: str, first: ResultSet) -> Iterator[Tuple[Any, ...]]:
+        """逐行读取一个连接的结果，行首注入来源连接"""
+        batch = first
+        while batch is not None:
+            for row in batch:
+                yield (alias,) + row
+            # 两批之间没有正在执行的语句可以中断，取消后不再读取
+            if self.scope.cancelled:
+                raise QueryCanceled()
+            batch = next(self._streams[alias], None)
+
+    def fetch(self, count: int) -> ResultSet:
+        """
+        读取后续的若干行
+
+        Args:
+            count: 最多读取的行数
+
+        Returns:
+            ResultSet: 读取到的行，行数少于count表示已经读完
+
+        Raises:
+            QueryCanceled: 已取消
+        """
+        if self.scope.cancelled:
+            raise QueryCanceled()
+        if self._rows is None:
+            self.open()
+        rows = list(itertools.islice(self._rows, count))
+        return ResultSet.from_rows(self.columns, rows)
+
+    def cancel(self) -> None:
+        """中断所有连接上正在执行的语句，可以在其他线程中调用"""
+        self.scope.cancel()
+
+    def close(self) -> None:
+        """关闭所有连接的流式查询"""
+        for alias, stream in self._streams.items():
+            try:
+                stream.close()
+            except Exception as e:
+                self.logger.warning(f"关闭 {alias} 的查询失败: {str(e)}")
+        self._streams.clear()
@@ -0,0 +1,295 @@
+"""查询执行的分阶段耗时统计
+
+每次在一个连接上执行查询时记录一个 :class:`QueryMetrics`：
+
+- connect：第一次使用时创建引擎，从连接池获取连接（包括建立新连接、共享连接池切换数据库）
+- execute：把语句发送到数据库，直到驱动返回结果对象
+- fetch：从游标读取行
+- convert：把驱动返回的值转换为列数据
+
+:class:`MetricsRegistry` 保存每个连接最近一次的统计和累计值，
+可以导出为 Prometheus 文本格式（供 node_exporter 的 textfile collector 读取）或 JSON。
+"""
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from sqlexec.core.result_set import ResultSet
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("connect", "execute", "fetch", "convert")
+METRICS_FORMATS = ("none", "prometheus", "json", "both")
+PROMETHEUS_FILE = "sqlexec.prom"
+JSON_FILE = "sqlexec_metrics.json"
+
+
+@dataclass
+class QueryMetrics:
+    """一个连接上一次执行的统计，时间单位为毫秒
+
+    重试时各阶段耗时累加，行数和数据量只计最后一次执行。
+    """
+    alias: str
+    connect_ms: float = 0.0
+    execute_ms: float = 0.0
+    fetch_ms: float = 0.0
+    convert_ms: float = 0.0
+    total_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0  # 转换后结果的估算内存大小
+    attempts: int = 0  # 执行次数，大于1表示发生了重试
+    from_cache: bool = False
+    ok: bool = False
+    error: str = ""
+    started_at: float = field(default_factory=time.time)
+
+    def add(self, phase: str, ms: float) -> None:
+        """累加某个阶段的耗时"""
+        name = f"{phase}_ms"
+        setattr(self, name, getattr(self, name) + ms)
+
+    @property
+    def other_ms(self) -> float:
+        """未计入各阶段的耗时：重试等待、写入临时文件等"""
+        return max(0.0, self.total_ms - sum(getattr(self, f"{phase}_ms") for phase in PHASES))
+
+    def summary(self) -> str:
+        """简短的耗时描述"""
+        if self.from_cache:
+            return f"{self.alias}: 命中缓存，{self.rows} 行"
+        text = (f"{self.alias}: 总耗时 {self.total_ms:.0f}ms（连接 {self.connect_ms:.0f}ms，"
+                f"执行 {self.execute_ms:.0f}ms，读取 {self.fetch_ms:.0f}ms，"
+                f"转换 {self.convert_ms:.0f}ms），{self.rows} 行，{format_bytes(self.bytes)}")
+        if self.attempts > 1:
+            text += f"，执行 {self.attempts} 次"
+        return text
+
+
+@dataclass
+class MetricsTotals:
+    """一个连接的累计统计"""
+    queries: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    rows: int = 0
+    bytes: int = 0
+    seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES + ("total",), 0.0))
+
+
+def format_bytes(size: float) -> str:
+    """把字节数格式化为便于阅读的形式"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def run_summary(metrics: Iterable[QueryMetrics]) -> str:
+    """
+    一次执行（多个连接）的汇总描述，用于状态栏和命令行输出
+
+    Args:
+        metrics: 各连接的统计
+
+    Returns:
+        str: 汇总描述，没有统计时为空字符串
+    """
+    metrics = list(metrics)
+    if not metrics:
+        return ""
+    rows = sum(item.rows for item in metrics)
+    size = sum(item.bytes for item in metrics)
+    text = f"共 {rows} 行 / {format_bytes(size)}"
+    slowest = max(metrics, key=lambda item: item.total_ms)
+    if slowest.total_ms > 0 and not slowest.from_cache:
+        phase = max(PHASES, key=lambda name: getattr(slowest, f"{name}_ms"))
+        labels = {"connect": "连接", "execute": "执行", "fetch": "读取", "convert": "转换"}
+        text += (f"，最慢 {slowest.alias} {slowest.total_ms:.0f}ms"
+                 f"（{labels[phase]} {getattr(slowest, f'{phase}_ms'):.0f}ms）")
+    return text
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """保存各连接最近一次和累计的执行统计，并写入本地指标文件"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: Dict[str, QueryMetrics] = {}
+        self._totals: Dict[str, MetricsTotals] = {}
+        self.format = "none"
+        self.directory: Optional[Path] = None
+
+    def configure(self, fmt: str, directory: str = "") -> None:
+        """
+        设置指标文件的格式和目录
+
+        Args:
+            fmt: none、prometheus、json 或 both
+            directory: 指标文件目录，为空时使用 ~/.sqlexec/metrics
+        """
+        if fmt not in METRICS_FORMATS:
+            logger.warning(f"不支持的指标格式: {fmt}，不写入指标文件")
+            fmt = "none"
+        self.format = fmt
+        self.directory = Path(directory).expanduser() if directory else Path.home() / ".sqlexec" / "metrics"
+
+    def record(self, metrics: QueryMetrics) -> None:
+        """记录一次执行完成的统计"""
+        with self._lock:
+            self._last[metrics.alias] = metrics
+            totals = self._totals.setdefault(metrics.alias, MetricsTotals())
+            totals.queries += 1
+            totals.errors += not metrics.ok
+            totals.cache_hits += metrics.from_cache
+            totals.retries += max(0, metrics.attempts - 1)
+            totals.rows += metrics.rows
+            totals.bytes += metrics.bytes
+            for phase in PHASES + ("total",):
+                totals.seconds[phase] += getattr(metrics, f"{phase}_ms") / 1000
+
+    def last(self, alias: str) -> Optional[QueryMetrics]:
+        """连接最近一次执行的统计"""
+        with self._lock:
+            return self._last.get(alias)
+
+    def reset(self) -> None:
+        """清除所有统计"""
+        with self._lock:
+            self._last.clear()
+            self._totals.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        计数器为进程启动以来的累计值，``sqlexec_last_*`` 为各连接最近一次执行的值。
+        """
+        with self._lock:
+            last = dict(self._last)
+            totals = {alias: MetricsTotals(**{**vars(item), "seconds": dict(item.seconds)})
+                      for alias, item in self._totals.items()}
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: Iterable) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                text = ",".join(f'{key}="{_escape_label(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{text}}} {value}")
+
+        aliases = sorted(totals)
+        family("sqlexec_queries_total", "counter", "Queries executed per connection.",
+               [({"alias": alias, "status": status}, count)
+                for alias in aliases
+                for status, count in (("ok", totals[alias].queries - totals[alias].errors),
+                                      ("error", totals[alias].errors))])
+        family("sqlexec_cache_hits_total", "counter", "Queries answered from the result cache.",
+               [({"alias": alias}, totals[alias].cache_hits) for alias in aliases])
+        family("sqlexec_retries_total", "counter", "Query attempts retried after transient errors.",
+               [({"alias": alias}, totals[alias].retries) for alias in aliases])
+        family("sqlexec_rows_total", "counter", "Rows returned per connection.",
+               [({"alias": alias}, totals[alias].rows) for alias in aliases])
+        family("sqlexec_bytes_total", "counter", "Estimated in-memory bytes of returned rows.",
+               [({"alias": alias}, totals[alias].bytes) for alias in aliases])
+        family("sqlexec_phase_seconds_total", "counter", "Time spent per execution phase.",
+               [({"alias": alias, "phase": phase}, round(totals[alias].seconds[phase], 6))
+                for alias in aliases for phase in PHASES + ("total",)])
+
+        aliases = sorted(last)
+        family("sqlexec_last_phase_seconds", "gauge", "Phase timings of the most recent query.",
+               [({"alias": alias, "phase": phase}, round(getattr(last[alias], f"{phase}_ms") / 1000, 6))
+                for alias in aliases for phase in PHASES + ("total",)])
+        family("sqlexec_last_rows", "gauge", "Rows returned by the most recent query.",
+               [({"alias": alias}, last[alias].rows) for alias in aliases])
+        family("sqlexec_last_bytes", "gauge", "Estimated bytes returned by the most recent query.",
+               [({"alias": alias}, last[alias].bytes) for alias in aliases])
+        family("sqlexec_last_success", "gauge", "Whether the most recent query succeeded.",
+               [({"alias": alias}, int(last[alias].ok)) for alias in aliases])
+        family("sqlexec_last_timestamp_seconds", "gauge", "Start time of the most recent query.",
+               [({"alias": alias}, round(last[alias].started_at, 3)) for alias in aliases])
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> str:
+        """导出为 JSON：各连接最近一次执行和累计值"""
+        with self._lock:
+            data = {
+                "generated_at": time.time(),
+                "connections": {
+                    alias: {
+                        "last": asdict(self._last[alias]) if alias in self._last else None,
+                        "totals": asdict(totals),
+                    }
+                    for alias, totals in sorted(self._totals.items())
+                },
+            }
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def flush(self) -> List[Path]:
+        """
+        按设置的格式写入指标文件
+
+        文件先写入同一目录下的临时文件再替换，读取方不会读到写了一半的文件。
+        写入失败只记录日志，不影响查询。
+
+        Returns:
+            List[Path]: 写入的文件
+        """
+        if self.format == "none" or self.directory is None:
+            return []
+        outputs = []
+        if self.format in ("prometheus", "both"):
+            outputs.append((PROMETHEUS_FILE, self.to_prometheus))
+        if self.format in ("json", "both"):
+            outputs.append((JSON_FILE, self.to_json))
+        written = []
+        for name, render in outputs:
+            path = self.directory / name
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd, temp = tempfile.mkstemp(prefix=f".{name}.", dir=self.directory)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        f.write(render())
+                    os.replace(temp, path)
+                except BaseException:
+                    os.unlink(temp)
+                    raise
+                written.append(path)
+            except OSError as e:
+                logger.warning(f"写入指标文件失败: {path}: {e}")
+        return written
+
+
+def metrics_table(metrics: Iterable[QueryMetrics]) -> ResultSet:
+    """
+    把一次执行中各连接的统计转换为结果集，用于显示汇总表格
+
+    Args:
+        metrics: 各连接的统计
+
+    Returns:
+        ResultSet: 每个连接一行
+    """
+    columns = ["连接", "状态", "连接(ms)", "执行(ms)", "读取(ms)", "转换(ms)", "其他(ms)",
+               "总耗时(ms)", "行数", "字节数", "执行次数"]
+    rows = []
+    for item in metrics:
+        status = "缓存" if item.from_cache else ("成功" if item.ok else "失败")
+        rows.append((item.alias, status,
+                     *(round(getattr(item, f"{phase}_ms"), 1) for phase in PHASES),
+                     round(item.other_ms, 1), round(item.total_ms, 1),
+                     item.rows, item.bytes, item.attempts))
+    return ResultSet.from_rows(columns, rows)
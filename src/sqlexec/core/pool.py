@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import threading
+
+
+@dataclass
+class PoolStats:
+    """单个连接的连接池状态，时间单位为毫秒
+
+    获取连接的耗时包括等待空闲连接和建立新连接的时间。
+    """
+    alias: str
+    size: int = 0  # 连接池保持的连接数
+    checked_out: int = 0  # 正在使用的连接数
+    checked_in: int = 0  # 空闲的连接数
+    overflow: int = 0  # 超出 size 额外建立的连接数，负数表示尚未建满
+    checkouts: int = 0  # 累计获取连接次数
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    timeouts: int = 0  # 等待空闲连接超时的次数
+    shared: bool = False  # 是否使用服务器级共享连接池，连接数为整个服务器的统计
+
+    @property
+    def wait_ms_avg(self) -> float:
+        return self.wait_ms_total / self.checkouts if self.checkouts else 0.0
+
+    def summary(self) -> str:
+        """简短的状态描述"""
+        text = "服务器共享，" if self.shared else ""
+        text += (f"使用中 {self.checked_out}/{self.size}，空闲 {self.checked_in}，"
+                 f"溢出 {max(0, self.overflow)}，获取连接平均 {self.wait_ms_avg:.1f}ms"
+                 f"（最长 {self.wait_ms_max:.1f}ms）")
+        if self.timeouts:
+            text += f"，超时 {self.timeouts} 次"
+        return text
+
+
+class PoolMonitor:
+    """记录各连接从连接池获取连接的耗时，与引擎的实时状态合并为 :class:`PoolStats`"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, PoolStats] = {}
+
+    def record(self, alias: str, wait_ms: float, timed_out: bool = False) -> None:
+        """
+        记录一次获取连接
+
+        Args:
+            alias: 连接别名
+            wait_ms: 获取连接的耗时
+            timed_out: 是否因等待空闲连接超时而失败
+        """
+        with self._lock:
+            stats = self._stats.setdefault(alias, PoolStats(alias))
+            if timed_out:
+                stats.timeouts += 1
+                return
+            stats.checkouts += 1
+            stats.wait_ms_total += wait_ms
+            stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+
+    def reset(self, alias: str) -> None:
+        """清除连接的统计，引擎重建时调用"""
+        with self._lock:
+            self._stats.pop(alias, None)
+
+    def snapshot(self, alias: str, engine: Optional[Any]) -> PoolStats:
+        """
+        获取连接池的当前状态
+
+        Args:
+            alias: 连接别名
+            engine: 连接的引擎，尚未创建时为None
+
+        Returns:
+            PoolStats: 连接池状态，引擎尚未创建时只有累计统计
+        """
+        with self._lock:
+            recorded = self._stats.get(alias) or PoolStats(alias)
+            stats = PoolStats(**vars(recorded))
+        pool = getattr(engine, "pool", None)
+        if pool is not None:
+            # 不同类型的连接池提供的方法不同，缺少的项保持为0
+            for name, method in (("size", "size"), ("checked_out", "checkedout"),
+                                 ("checked_in", "checkedin"), ("overflow", "overflow")):
+                getter = getattr(pool, method, None)
+                if callable(getter):
+                    setattr(stats, name, getter())
+        return stats
@@ -0,0 +1,280 @@
+"""查询重试和熔断
+
+- :class:`RetryPolicy`：只重试暂时性错误（连接断开、死锁、锁等待超时等），
+  重试间隔按指数退避并加随机抖动；修改数据的语句只在尚未发送到数据库时重试
+- :class:`CircuitBreaker`：某个连接连续多次连接失败后在一段时间内直接失败，
+  不再为已经不可用的数据库逐个等待连接超时
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import logging
+import random
+import threading
+import time
+
+from sqlexec.core.cancel import QueryInterrupted
+from sqlexec.core.sql_splitter import Statement, has_side_effects
+
+logger = logging.getLogger(__name__)
+
+# 重试不会产生副作用的语句类型，出现副作用关键字的语句除外（参见 SIDE_EFFECT_KEYWORDS）
+IDEMPOTENT_STATEMENTS = {"SELECT", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "PRAGMA", "VALUES", "TABLE"}
+
+# 连接断开或无法建立连接的错误码：PostgreSQL SQLSTATE、MySQL 和 SQL Server 错误号
+_CONNECTION_CODES = {
+    "57P01", "57P02", "57P03",  # PostgreSQL：管理员关闭、崩溃关闭、暂时无法连接
+    "2002", "2003", "2006", "2013", "2055",  # MySQL：无法连接、服务器断开、查询中连接丢失
+    "20003", "20006", "20009", "20047",  # SQL Server（DB-Lib）：超时、写入失败、无法连接、连接已关闭
+}
+# 暂时性的锁冲突：重试通常可以成功
+_LOCK_CODES = {
+    "40001", "40P01", "55P03",  # PostgreSQL：序列化失败、死锁、无法获取锁
+    "1205", "1213",  # MySQL：锁等待超时、死锁；SQL Server：死锁牺牲品
+}
+_CONNECTION_MESSAGES = (
+    "server has gone away", "lost connection", "connection reset", "connection refused",
+    "could not connect", "connection timed out", "terminating connection",
+    "server closed the connection", "broken pipe", "adaptive server connection failed",
+    "unable to connect", "connection is closed", "connection was killed",
+)
+# 建立连接时的认证失败、数据库不存在等错误，重试不会成功
+_REJECTED_CODES = {"28000", "28P01", "3D000", "1044", "1045", "1049", "4060", "18456"}
+_REJECTED_MESSAGES = (
+    "authentication failed", "access denied", "login failed", "does not exist", "unknown database",
+)
+_LOCK_MESSAGES = ("deadlock", "database is locked", "lock wait timeout", "could not serialize")
+
+
+def _driver_error(error: BaseException) -> BaseException:
+    """SQLAlchemy 包装的驱动异常"""
+    return getattr(error, "orig", None) or error
+
+
+def _error_code(error: BaseException) -> str:
+    """驱动异常的错误码：PostgreSQL 的 SQLSTATE 或 MySQL/SQL Server 的错误号"""
+    code = getattr(error, "pgcode", None) or getattr(error, "sqlstate", None)
+    if code:
+        return str(code)
+    args = getattr(error, "args", ())
+    if args and isinstance(args[0], int):
+        return str(args[0])
+    return ""
+
+
+def is_pool_timeout(error: BaseException) -> bool:
+    """判断错误是否为等待连接池中的空闲连接超时"""
+    return type(error).__name__ == "TimeoutError" and type(error).__module__.startswith("sqlalchemy")
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """
+    判断错误是否表示数据库不可达或连接已断开
+
+    Args:
+        error: 执行时抛出的异常
+
+    Returns:
+        bool: 是否为连接错误
+    """
+    if isinstance(error, QueryInterrupted) or is_pool_timeout(error):
+        return False
+    orig = _driver_error(error)
+    code = _error_code(orig)
+    message = str(orig).lower()
+    if code in _REJECTED_CODES or any(text in message for text in _REJECTED_MESSAGES):
+        return False
+    if getattr(error, "connection_invalidated", False) or not_sent(error):
+        return True
+    if code in _CONNECTION_CODES or code.startswith("08"):
+        return True
+    return any(text in message for text in _CONNECTION_MESSAGES)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    判断错误是否为暂时性错误，重试可能成功
+
+    包括连接错误、等待连接池超时，以及死锁、锁等待超时和序列化失败。
+    语法错误、权限不足、约束冲突等错误重试也不会成功。
+
+    Args:
+        error: 执行时抛出的异常
+
+    Returns:
+        bool: 是否为暂时性错误
+    """
+    if isinstance(error, QueryInterrupted):
+        return False
+    if is_pool_timeout(error) or is_connection_error(error):
+        return True
+    orig = _driver_error(error)
+    if _error_code(orig) in _LOCK_CODES:
+        return True
+    message = str(orig).lower()
+    return any(text in message for text in _LOCK_MESSAGES)
+
+
+def not_sent(error: BaseException) -> bool:
+    """
+    判断失败是否发生在语句发送到数据库之前（建立连接失败或等待连接池超时）
+
+    SQLAlchemy 在建立连接失败时抛出的 DBAPIError 不带语句。
+    """
+    if is_pool_timeout(error):
+        return True
+    return (type(error).__module__.startswith("sqlalchemy")
+            and hasattr(error, "statement") and error.statement is None
+            and getattr(error, "orig", None) is not None)
+
+
+def is_idempotent(statements: Iterable[Statement]) -> bool:
+    """
+    判断语句是否都是只读的，重复执行不会产生副作用
+
+    Args:
+        statements: 语句列表
+
+    Returns:
+        bool: 是否可以安全重试
+    """
+    statements = list(statements)
+    return bool(statements) and all(
+        statement.type in IDEMPOTENT_STATEMENTS and not has_side_effects(statement.text)
+        for statement in statements
+    )
+
+
+@dataclass
+class RetryPolicy:
+    """查询的重试策略"""
+    max_attempts: int = 3  # 最多执行次数（包括第一次），1表示不重试
+    base_delay: float = 0.2  # 第一次重试前的基准等待时间（秒）
+    max_delay: float = 5.0  # 单次等待时间的上限（秒）
+
+    def should_retry(self, error: BaseException, attempt: int, idempotent: bool) -> bool:
+        """
+        判断第 attempt 次执行失败后是否重试
+
+        只重试暂时性错误；不是幂等的语句只在尚未发送到数据库时重试，
+        避免重复修改数据。
+
+        Args:
+            error: 本次执行的异常
+            attempt: 已执行次数（从 1 开始）
+            idempotent: 语句是否幂等
+
+        Returns:
+            bool: 是否重试
+        """
+        if attempt >= self.max_attempts or not is_transient(error):
+            return False
+        return idempotent or not_sent(error)
+
+    def delay(self, attempt: int) -> float:
+        """
+        第 attempt 次失败后的等待时间：指数退避，在 [0, 上限] 之间随机取值（全抖动），
+        避免多个连接同时重试
+
+        Args:
+            attempt: 已执行次数（从 1 开始）
+
+        Returns:
+            float: 等待秒数
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, max(0.0, ceiling))
+
+
+class CircuitOpenError(Exception):
+    """连接的熔断器处于打开状态，请求直接失败"""
+
+    def __init__(self, alias: str, failures: int, retry_after: float):
+        if retry_after > 0:
+            message = f"{alias} 连续 {failures} 次连接失败，已暂停使用，{retry_after:.0f} 秒后重试"
+        else:
+            message = f"{alias} 连续 {failures} 次连接失败，正在检测是否恢复"
+        super().__init__(message)
+        self.alias = alias
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """单个连接的熔断器
+
+    连续 failure_threshold 次连接失败后打开，reset_timeout 秒内的请求直接失败；
+    之后放行一个探测请求（半开），成功则关闭，失败则重新打开。
+    只有连接错误计为失败，语法错误等说明数据库可达，计为成功。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, alias: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        初始化熔断器
+
+        Args:
+            alias: 连接别名
+            failure_threshold: 打开熔断器的连续失败次数，0表示不熔断
+            reset_timeout: 打开后多少秒放行探测请求
+        """
+        self.alias = alias
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def before_call(self) -> None:
+        """
+        执行请求前检查
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已有探测请求
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(self.alias, self._failures, max(0.0, remaining))
+            self._probing = True
+
+    def record(self, ok: bool) -> None:
+        """
+        记录请求结果
+
+        Args:
+            ok: 为False表示连接失败
+        """
+        with self._lock:
+            self._probing = False
+            if ok:
+                if self._opened_at is not None:
+                    logger.info(f"{self.alias} 已恢复，关闭熔断")
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self.failure_threshold <= 0:
+                return
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"{self.alias} 连续 {self._failures} 次连接失败，"
+                                   f"{self.reset_timeout:g} 秒内不再尝试")
+                self._opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        """关闭熔断器，清除失败计数"""
+        self.record(True)
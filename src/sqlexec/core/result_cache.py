@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import re
+import threading
+import time
+
+from sqlexec.core.result_set import ResultSet
+from sqlexec.core.sql_splitter import has_side_effects
+
+# 字符串和带引号的标识符原样保留，连续的注释和空白合并为一个空格
+_TOKEN_PATTERN = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])"  # 字符串和带引号的标识符
+    r"|((?:--[^\n]*|/\*.*?\*/|\s+)+)",  # 连续的注释和空白
+    re.DOTALL
+)
+_WORD_PATTERN = re.compile(r"[A-Za-z_]+")
+
+# 可以缓存的语句类型，出现副作用关键字的语句仍然不缓存（参见 SIDE_EFFECT_KEYWORDS）
+CACHEABLE_STATEMENTS = {"SELECT", "WITH", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "VALUES"}
+
+
+def normalize_sql(query: str) -> str:
+    """
+    规范化SQL语句：去掉注释，合并字符串以外的空白，去掉末尾分号
+
+    Args:
+        query: SQL语句
+
+    Returns:
+        str: 规范化后的语句
+    """
+    def replace(match: "re.Match") -> str:
+        return match.group(1) or " "
+
+    return _TOKEN_PATTERN.sub(replace, query).strip().rstrip(";").strip()
+
+
+def is_cacheable(query: str) -> bool:
+    """
+    判断语句是否只读、可以缓存
+
+    Args:
+        query: SQL语句
+
+    Returns:
+        bool: 是否可以缓存
+    """
+    # 只检查字符串和带引号的标识符以外的关键字
+    text = _TOKEN_PATTERN.sub(lambda m: " ", query)
+    words = [word.upper() for word in _WORD_PATTERN.findall(text)]
+    if not words or words[0] not in CACHEABLE_STATEMENTS:
+        return False
+    return not has_side_effects(query)
+
+
+class ResultCache:
+    """查询结果缓存
+
+    以（连接别名, 规范化后的语句）为键，条目超过有效期后失效，
+    总大小超过上限时按最近最少使用的顺序淘汰。缓存的结果是只读的，
+    调用方不能修改。
+    """
+
+    def __init__(self, ttl: float = 300, max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化结果缓存
+
+        Args:
+            ttl: 条目的有效期（秒）
+            max_bytes: 缓存的最大估算内存（字节）
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, ResultSet]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """当前缓存的估算内存（字节）"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, alias: str, query: str) -> Optional[ResultSet]:
+        """
+        获取缓存的结果
+
+        Args:
+            alias: 连接别名
+            query: SQL语句
+
+        Returns:
+            Optional[ResultSet]: 缓存的结果，没有命中或已过期时返回None
+        """
+        key = (alias, normalize_sql(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, size, result = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, alias: str, query: str, result: ResultSet) -> bool:
+        """
+        缓存查询结果
+
+        Args:
+            alias: 连接别名
+            query: SQL语句
+            result: 查询结果
+
+        Returns:
+            bool: 是否已缓存，单个结果超过缓存上限时不缓存
+        """
+        size = result.estimated_bytes()
+        if size > self.max_bytes:
+            return False
+
+        key = (alias, normalize_sql(query))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), size, result)
+            self._size += size
+            # 按最近最少使用的顺序淘汰
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, alias: Optional[str] = None) -> None:
+        """
+        使缓存失效
+
+        Args:
+            alias: 连接别名，为None时清空全部缓存
+        """
+        with self._lock:
+            if alias is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            for key in [key for key in self._entries if key[0] == alias]:
+                self._remove(key)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """移除条目，调用方需持有锁"""
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
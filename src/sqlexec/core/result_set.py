@@ -0,0 +1,230 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from array import array
+import sys
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+SIZE_SAMPLE = 64  # 估算列表列内存时采样的值个数
+
+
+class TypedColumn:
+    """定长数值列
+
+    使用 ``array`` 紧凑存储整数或浮点数，NULL 通过单独的掩码记录，
+    掩码只在列中确实存在 NULL 时才会创建。
+    """
+
+    __slots__ = ("values", "nulls")
+
+    def __init__(self, values: array, nulls: Optional[bytearray] = None):
+        self.values = values
+        self.nulls = nulls
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> Optional['TypedColumn']:
+        """
+        尝试将一列值转换为定长数值列
+
+        Args:
+            values: 列的值
+
+        Returns:
+            Optional[TypedColumn]: 转换后的列，无法转换时返回None
+        """
+        typecode = None
+        has_null = False
+        for value in values:
+            if value is None:
+                has_null = True
+                continue
+            value_type = type(value)
+            if value_type is int:
+                if not INT64_MIN <= value <= INT64_MAX:
+                    return None
+                code = 'q'
+            elif value_type is float:
+                code = 'd'
+            else:
+                return None
+            if typecode is None:
+                typecode = code
+            elif typecode != code:
+                return None
+
+        if typecode is None:
+            return None
+
+        if not has_null:
+            return cls(array(typecode, values))
+
+        fill = 0 if typecode == 'q' else 0.0
+        nulls = bytearray(1 if value is None else 0 for value in values)
+        return cls(array(typecode, (fill if value is None else value for value in values)),
+                   nulls)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return self.values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.nulls is None:
+            return iter(self.values)
+        return (None if null else value for value, null in zip(self.values, self.nulls))
+
+    @property
+    def nbytes(self) -> int:
+        """占用的字节数"""
+        size = self.values.itemsize * len(self.values)
+        if self.nulls is not None:
+            size += len(self.nulls)
+        return size
+
+
+class ResultSet:
+    """列式查询结果
+
+    列名只保存一份，数据按列存储。数值列在 :meth:`compact` 后
+    使用定长数组存储，其余列使用普通列表。
+    """
+
+    def __init__(self, columns: Sequence[str],
+                 data: Optional[List[Sequence[Any]]] = None):
+        """
+        初始化查询结果
+
+        Args:
+            columns: 列名
+            data: 按列组织的数据，每个元素是一列的值
+        """
+        self.columns: List[str] = list(columns)
+        if data is None:
+            data = [[] for _ in self.columns]
+        if len(data) != len(self.columns):
+            raise ValueError("列数据数量与列名数量不一致")
+        self._data: List[Any] = [
+            column if isinstance(column, (list, TypedColumn)) else list(column)
+            for column in data
+        ]
+        self.from_cache: bool = False  # 结果是否来自结果缓存
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> 'ResultSet':
+        """
+        从按行组织的数据创建结果
+
+        Args:
+            columns: 列名
+            rows: 行数据
+
+        Returns:
+            ResultSet: 查询结果
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(columns)
+        return cls(columns, [list(column) for column in zip(*rows)])
+
+    @classmethod
+    def from_dicts(cls, rows: Sequence[Dict[str, Any]]) -> 'ResultSet':
+        """从字典列表创建结果，列名取自第一行"""
+        if not rows:
+            return cls([])
+        columns = list(rows[0].keys())
+        return cls(columns, [[row.get(column) for row in rows] for column in columns])
+
+    def __len__(self) -> int:
+        return len(self._data[0]) if self._data else 0
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return zip(*self._data)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Tuple[Any, ...], 'ResultSet']:
+        if isinstance(index, slice):
+            return ResultSet(self.columns, [list(column[index]) if isinstance(column, list)
+                                            else column[index] for column in self._data])
+        return self.row(index)
+
+    def __repr__(self) -> str:
+        return f"ResultSet(columns={self.columns!r}, rows={len(self)})"
+
+    def row(self, index: int) -> Tuple[Any, ...]:
+        """获取一行数据"""
+        return tuple(column[index] for column in self._data)
+
+    def value(self, row: int, column: int) -> Any:
+        """获取单元格的值"""
+        return self._data[column][row]
+
+    def column(self, key: Union[int, str]) -> Sequence[Any]:
+        """
+        获取一列数据
+
+        Args:
+            key: 列序号或列名
+
+        Returns:
+            Sequence[Any]: 列的值
+        """
+        if isinstance(key, str):
+            key = self.columns.index(key)
+        return self._data[key]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为字典列表"""
+        return [dict(zip(self.columns, row)) for row in self]
+
+    def extend(self, other: 'ResultSet') -> None:
+        """
+        追加另一个结果的数据
+
+        Args:
+            other: 列结构相同的查询结果
+        """
+        if len(other.columns) != len(self.columns):
+            raise ValueError("列数量不一致，无法合并结果")
+        for i, column in enumerate(other._data):
+            target = self._data[i]
+            if isinstance(target, TypedColumn):
+                target = self._data[i] = list(target)
+            target.extend(column)
+
+    def estimated_bytes(self) -> int:
+        """
+        估算结果占用的内存
+
+        定长数值列按实际大小计算，列表列按采样值的平均大小推算。
+
+        Returns:
+            int: 估算的字节数
+        """
+        total = 0
+        for column in self._data:
+            if isinstance(column, TypedColumn):
+                total += column.nbytes
+                continue
+            count = len(column)
+            total += sys.getsizeof(column)
+            if count:
+                step = max(1, count // SIZE_SAMPLE)
+                sample = column[::step]
+                total += sum(sys.getsizeof(value) for value in sample) * count // len(sample)
+        return total
+
+    def copy(self) -> 'ResultSet':
+        """创建共享列数据的浅拷贝"""
+        return ResultSet(self.columns, list(self._data))
+
+    def compact(self) -> 'ResultSet':
+        """将可以转换的列转换为定长数值列，返回自身"""
+        for i, column in enumerate(self._data):
+            if isinstance(column, list):
+                typed = TypedColumn.from_values(column)
+                if typed is not None:
+                    self._data[i] = typed
+        return self
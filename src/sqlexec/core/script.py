@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlexec.core.result_set import ResultSet
+
+# 执行摘要中语句文本的最大长度
+SUMMARY_TEXT_LENGTH = 200
+
+SUMMARY_COLUMNS = ["序号", "行号", "类型", "状态", "行数", "耗时(ms)", "语句", "错误"]
+
+
+@dataclass
+class StatementResult:
+    """脚本中一条语句的执行结果，时间单位为毫秒"""
+    index: int  # 语句序号（从 1 开始）
+    line: int  # 语句在脚本中的起始行号
+    statement: str
+    statement_type: str
+    elapsed_ms: float = 0.0
+    result: Optional[ResultSet] = None  # 返回行的语句的结果
+    affected_rows: Optional[int] = None  # 不返回行的语句影响的行数，驱动不支持时为None
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    @property
+    def rows(self) -> Optional[int]:
+        """返回或影响的行数"""
+        return len(self.result) if self.result is not None else self.affected_rows
+
+    def describe(self) -> str:
+        """语句位置的描述，用于错误信息"""
+        return f"第 {self.index} 条语句（第 {self.line} 行）"
+
+
+def summarize(results: List[StatementResult]) -> ResultSet:
+    """
+    生成脚本的执行摘要，每条语句一行
+
+    Args:
+        results: 各语句的执行结果
+
+    Returns:
+        ResultSet: 列为 :data:`SUMMARY_COLUMNS`
+    """
+    rows = []
+    for item in results:
+        text = " ".join(item.statement.split())
+        if len(text) > SUMMARY_TEXT_LENGTH:
+            text = text[:SUMMARY_TEXT_LENGTH] + "..."
+        rows.append((
+            item.index, item.line, item.statement_type,
+            "成功" if item.ok else "失败", item.rows,
+            round(item.elapsed_ms, 1), text, item.error
+        ))
+    return ResultSet.from_rows(SUMMARY_COLUMNS, rows)
@@ -0,0 +1,320 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+import pickle
+import tempfile
+import threading
+import weakref
+
+from sqlexec.core.result_set import ResultSet
+
+SPILL_PAGE_SIZE = 1000  # 落盘结果每页的行数
+SPILL_CACHE_PAGES = 16  # 落盘结果在内存中缓存的页数
+
+
+class MemoryBudget:
+    """查询结果的内存预算
+
+    所有连接正在构建和已经返回的内存结果共用一个预算。已返回的结果
+    通过弱引用登记，对象被回收后自动归还占用的预算。
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        初始化内存预算
+
+        Args:
+            max_bytes: 最大内存（字节）
+        """
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        """已占用的字节数"""
+        return self._used
+
+    def try_reserve(self, nbytes: int) -> bool:
+        """
+        尝试占用预算
+
+        Args:
+            nbytes: 需要的字节数
+
+        Returns:
+            bool: 是否占用成功，超出预算时返回False且不占用
+        """
+        with self._lock:
+            if self._used + nbytes > self.max_bytes:
+                return False
+            self._used += nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        """归还占用的预算"""
+        with self._lock:
+            self._used = max(0, self._used - nbytes)
+
+    def track(self, result: Any, nbytes: int) -> None:
+        """
+        登记已返回的结果，结果被回收时归还预算
+
+        Args:
+            result: 查询结果
+            nbytes: 结果占用的字节数
+        """
+        with self._lock:
+            self._used += nbytes
+        weakref.finalize(result, self.release, nbytes)
+
+
+def _close_file(handle: Any) -> None:
+    """关闭落盘文件，临时文件在关闭时自动删除"""
+    try:
+        handle.close()
+    except OSError:
+        pass
+
+
+class SpilledResultSet:
+    """保存在本地临时文件中的查询结果
+
+    数据按固定行数分页，每页以列式结构序列化后追加到临时文件，
+    内存中只保留每页的偏移量和最近访问的若干页。对外提供与
+    :class:`ResultSet` 相同的只读访问接口，结果表格和导出可以直接使用。
+    临时文件在结果关闭或被回收时删除。
+    """
+
+    def __init__(self, columns: Sequence[str], directory: Optional[str] = None,
+                 page_size: int = SPILL_PAGE_SIZE, cache_pages: int = SPILL_CACHE_PAGES):
+        """
+        初始化落盘结果
+
+        Args:
+            columns: 列名
+            directory: 临时文件目录，为None时使用系统临时目录
+            page_size: 每页的行数
+            cache_pages: 内存中缓存的页数
+        """
+        self.columns: List[str] = list(columns)
+        self.from_cache: bool = False
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self._file = tempfile.TemporaryFile(prefix="sqlexec-", suffix=".spill", dir=directory or None)
+        self._finalizer = weakref.finalize(self, _close_file, self._file)
+        self._offsets: List[Tuple[int, int]] = []  # 每页在文件中的(偏移量, 长度)
+        self._pending = ResultSet(self.columns)  # 尚未写满一页的数据
+        self._length = 0
+        self._pages: "OrderedDict[int, ResultSet]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def disk_bytes(self) -> int:
+        """临时文件的大小"""
+        return sum(length for _, length in self._offsets)
+
+    def append(self, result: ResultSet) -> None:
+        """
+        追加数据，写满的页立即写入临时文件
+
+        Args:
+            result: 列结构相同的查询结果
+        """
+        self._pending.extend(result)
+        self._length += len(result)
+        while len(self._pending) >= self.page_size:
+            self._write_page(self._pending[:self.page_size])
+            self._pending = self._pending[self.page_size:]
+
+    def finish(self) -> 'SpilledResultSet':
+        """写入剩余的数据，返回自身"""
+        if len(self._pending):
+            self._write_page(self._pending)
+            self._pending = ResultSet(self.columns)
+        self._file.flush()
+        return self
+
+    def _write_page(self, page: ResultSet) -> None:
+        """将一页数据写入临时文件"""
+        data = pickle.dumps([list(page.column(i)) for i in range(len(self.columns))],
+                            pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.seek(0, 2)
+            self._offsets.append((self._file.tell(), len(data)))
+            self._file.write(data)
+
+    def _page(self, number: int) -> ResultSet:
+        """读取一页数据，优先使用内存中缓存的页"""
+        with self._lock:
+            page = self._pages.get(number)
+            if page is not None:
+                self._pages.move_to_end(number)
+                return page
+            if number >= len(self._offsets):
+                # 尚未写入文件的数据
+                return self._pending
+            offset, length = self._offsets[number]
+            self._file.seek(offset)
+            page = ResultSet(self.columns, pickle.loads(self._file.read(length))).compact()
+            self._pages[number] = page
+            while len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+            return page
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        for number in range(len(self._offsets)):
+            yield from self._page(number)
+        yield from self._pending
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Tuple[Any, ...], ResultSet]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            return ResultSet.from_rows(self.columns, (self.row(i) for i in range(start, stop, step)))
+        return self.row(index)
+
+    def __repr__(self) -> str:
+        return f"SpilledResultSet(columns={self.columns!r}, rows={self._length})"
+
+    def _locate(self, index: int) -> Tuple[ResultSet, int]:
+        """定位行所在的页和页内序号"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("行序号超出范围")
+        return self._page(index // self.page_size), index % self.page_size
+
+    def row(self, index: int) -> Tuple[Any, ...]:
+        """获取一行数据"""
+        page, offset = self._locate(index)
+        return page.row(offset)
+
+    def value(self, row: int, column: int) -> Any:
+        """获取单元格的值"""
+        page, offset = self._locate(row)
+        return page.value(offset, column)
+
+    def column(self, key: Union[int, str]) -> List[Any]:
+        """
+        获取一列数据，需要读取全部页
+
+        Args:
+            key: 列序号或列名
+
+        Returns:
+            List[Any]: 列的值
+        """
+        if isinstance(key, str):
+            key = self.columns.index(key)
+        return [row[key] for row in self]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为字典列表，需要读取全部页"""
+        return [dict(zip(self.columns, row)) for row in self]
+
+    def estimated_bytes(self) -> int:
+        """估算占用的内存（仅包含缓存的页）"""
+        with self._lock:
+            pages = list(self._pages.values())
+        return sum(page.estimated_bytes() for page in pages) + self._pending.estimated_bytes()
+
+    def copy(self) -> 'SpilledResultSet':
+        """落盘结果只读，返回自身"""
+        return self
+
+    def compact(self) -> 'SpilledResultSet':
+        """落盘结果的页在读取时已经紧凑存储，返回自身"""
+        return self
+
+    def close(self) -> None:
+        """关闭并删除临时文件"""
+        self._pages.clear()
+        self._finalizer()
+
+
+class ResultBuilder:
+    """逐批构建查询结果
+
+    数据先在内存中累积，内存预算不足时将已有数据和后续批次写入临时文件。
+    """
+
+    def __init__(self, budget: Optional[MemoryBudget] = None, directory: Optional[str] = None):
+        """
+        初始化结果构建器
+
+        Args:
+            budget: 内存预算，为None时不限制
+            directory: 临时文件目录，为None时使用系统临时目录
+        """
+        self.budget = budget
+        self.directory = directory
+        self.logger = logging.getLogger(__name__)
+        self._result: Optional[ResultSet] = None
+        self._spilled: Optional[SpilledResultSet] = None
+        self._reserved = 0
+
+    @property
+    def spilled(self) -> bool:
+        """是否已经写入临时文件"""
+        return self._spilled is not None
+
+    def add(self, batch: ResultSet) -> None:
+        """追加一批数据"""
+        if self._spilled is not None:
+            self._spilled.append(batch)
+            return
+
+        if self.budget is not None:
+            size = batch.estimated_bytes()
+            if not self.budget.try_reserve(size):
+                self._spill(batch)
+                return
+            self._reserved += size
+
+        if self._result is None:
+            self._result = batch
+        else:
+            self._result.extend(batch)
+
+    def _spill(self, batch: ResultSet) -> None:
+        """将已累积的数据和当前批次写入临时文件"""
+        self._spilled = SpilledResultSet(batch.columns, self.directory)
+        if self._result is not None:
+            self._spilled.append(self._result)
+            self._result = None
+        self._spilled.append(batch)
+        self._release()
+        self.logger.info("查询结果超出内存预算，已写入临时文件")
+
+    def _release(self) -> None:
+        """归还构建期间占用的预算"""
+        if self.budget is not None and self._reserved:
+            self.budget.release(self._reserved)
+        self._reserved = 0
+
+    def finish(self) -> Union[ResultSet, SpilledResultSet]:
+        """
+        完成构建
+
+        Returns:
+            Union[ResultSet, SpilledResultSet]: 内存结果或落盘结果
+        """
+        if self._spilled is not None:
+            return self._spilled.finish()
+
+        result = self._result.compact() if self._result is not None else ResultSet([])
+        self._release()
+        if self.budget is not None:
+            self.budget.track(result, result.estimated_bytes())
+        return result
+
+    def abort(self) -> None:
+        """放弃构建，释放预算和临时文件"""
+        self._release()
+        if self._spilled is not None:
+            self._spilled.close()
+            self._spilled = None
+        self._result = None
@@ -0,0 +1,285 @@
+"""SQL 脚本拆分
+
+把包含多条语句的脚本拆分为逐条执行的语句。拆分时跳过注释、字符串和带引号的标识符，
+并按方言处理语句边界：
+
+- MSSQL：与 sqlcmd/SSMS 相同，以单独一行的 ``GO``（可带重复次数）分隔批处理，
+  批处理内部不再按分号拆分，存储过程定义和批处理内的变量保持完整，块注释可以嵌套
+- PostgreSQL：``$$ ... $$`` 和 ``$tag$ ... $tag$`` 包围的函数体内的分号不拆分，块注释可以嵌套
+- MySQL：支持 ``DELIMITER`` 命令修改分隔符，字符串中的反斜杠为转义字符，``#`` 开始单行注释
+- SQLite：``CREATE TRIGGER ... BEGIN ... END`` 内部的分号不拆分
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List
+import re
+
+# WITH 语句的实际类型取 CTE 之后的第一个关键字
+_CTE_STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE", "MERGE"}
+
+# 即使语句以 SELECT 等只读关键字开头，出现这些关键字时也可能产生副作用，
+# 不能缓存结果也不能重试：SELECT ... INTO、SELECT ... FOR UPDATE、CTE 中的修改语句、
+# 序列（nextval/setval）、咨询锁（MySQL GET_LOCK，PostgreSQL pg_advisory_* 以其前缀匹配）
+SIDE_EFFECT_KEYWORDS = frozenset({
+    "INSERT", "UPDATE", "DELETE", "MERGE", "UPSERT", "INTO", "CREATE", "DROP", "ALTER", "TRUNCATE",
+    "EXEC", "EXECUTE", "CALL", "GRANT", "REVOKE", "LOCK", "SHARE", "NEXTVAL", "SETVAL",
+    "GET_LOCK", "RELEASE_LOCK", "RELEASE_ALL_LOCKS", "SET_CONFIG",
+    "PG_TERMINATE_BACKEND", "PG_CANCEL_BACKEND",
+})
+_SIDE_EFFECT_PREFIXES = ("PG_ADVISORY_", "PG_TRY_ADVISORY_")
+
+# 计算语句类型时跳过的字符串、带引号的标识符和注释
+_SKIP_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/",
+    re.DOTALL
+)
+_TYPE_TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[()]")
+
+_WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+_DOLLAR_TAG_PATTERN = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+_GO_PATTERN = re.compile(r"[ \t]*GO(?:[ \t]+(\d+))?[ \t]*(?:--[^\n]*)?(?:\n|$)", re.IGNORECASE)
+_DELIMITER_PATTERN = re.compile(r"[ \t]*DELIMITER[ \t]+(\S+)[ \t]*(?:\n|$)", re.IGNORECASE)
+# 块注释可以嵌套的数据库
+_NESTED_COMMENT_DIALECTS = ("postgresql", "mssql")
+_TRIGGER_PATTERN = re.compile(r"CREATE\s+(?:TEMP\s+|TEMPORARY\s+)?TRIGGER\b", re.IGNORECASE)
+
+
+@dataclass
+class Statement:
+    """脚本中的一条语句"""
+    text: str  # 语句文本，不含结尾的分隔符
+    line: int  # 在脚本中的起始行号（从 1 开始）
+    repeat: int = 1  # 执行次数，MSSQL 的 ``GO n`` 指定
+
+    @property
+    def type(self) -> str:
+        """语句类型，参见 :func:`statement_type`"""
+        return statement_type(self.text)
+
+
+def statement_type(statement: str) -> str:
+    """
+    获取语句类型
+
+    跳过开头的注释和括号，返回第一个关键字的大写形式。``WITH`` 开头的语句
+    返回 CTE 之后的主语句关键字（SELECT、INSERT、UPDATE、DELETE、MERGE）。
+
+    Args:
+        statement: SQL语句
+
+    Returns:
+        str: 语句类型，语句中没有关键字时为空字符串
+    """
+    text = _SKIP_PATTERN.sub(" ", statement)
+    depth = 0
+    first = ""
+    for match in _TYPE_TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif not first:
+            first = token.upper()
+            if first != "WITH":
+                return first
+        elif depth == 0 and token.upper() in _CTE_STATEMENTS:
+            return token.upper()
+    return first
+
+
+def has_side_effects(statement: str) -> bool:
+    """
+    判断语句中（字符串和注释以外）是否出现可能产生副作用的关键字
+
+    结果缓存和重试共用这一判断，参见 :data:`SIDE_EFFECT_KEYWORDS`。
+
+    Args:
+        statement: SQL语句
+
+    Returns:
+        bool: 是否可能产生副作用
+    """
+    text = _SKIP_PATTERN.sub(" ", statement)
+    for match in _TYPE_TOKEN_PATTERN.finditer(text):
+        word = match.group().upper()
+        if word in SIDE_EFFECT_KEYWORDS or word.startswith(_SIDE_EFFECT_PREFIXES):
+            return True
+    return False
+
+
+class _Splitter:
+    """按方言扫描脚本并拆分语句"""
+
+    def __init__(self, script: str, dialect: str):
+        self.script = script
+        self.dialect = dialect.lower()
+        self.delimiter = ";"
+        self.statements: List[Statement] = []
+        # 每行起始位置，用于计算行号
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", script)]
+
+    def _line_of(self, position: int) -> int:
+        return bisect_right(self._line_starts, position)
+
+    def _emit(self, start: int, end: int, repeat: int = 1) -> None:
+        """保存 [start, end) 之间的语句，start 为语句第一个字符的位置，小于0表示没有语句"""
+        if start < 0:
+            return
+        text = self.script[start:end].rstrip()
+        self.statements.append(Statement(text, self._line_of(start), max(1, repeat)))
+
+    def _skip_quoted(self, i: int, quote: str, backslash: bool) -> int:
+        """跳过以 quote 包围的字符串或标识符，返回结束位置之后的下标"""
+        script = self.script
+        closing = "]" if quote == "[" else quote
+        i += 1
+        while i < len(script):
+            char = script[i]
+            if backslash and char == "\\":
+                i += 2
+                continue
+            if char == closing:
+                # 重复的引号表示引号本身
+                if i + 1 < len(script) and script[i + 1] == closing:
+                    i += 2
+                    continue
+                return i + 1
+            i += 1
+        return i
+
+    def _skip_block_comment(self, i: int) -> int:
+        """跳过块注释，PostgreSQL 和 SQL Server 的块注释可以嵌套"""
+        script = self.script
+        nested = self.dialect in _NESTED_COMMENT_DIALECTS
+        depth = 0
+        while i < len(script):
+            if script.startswith("/*", i):
+                depth = depth + 1 if nested or depth == 0 else depth
+                i += 2
+            elif script.startswith("*/", i):
+                depth -= 1
+                i += 2
+                if depth == 0:
+                    return i
+            else:
+                i += 1
+        return i
+
+    def _in_trigger(self, start: int, i: int) -> bool:
+        """当前语句是否为 SQLite 的 CREATE TRIGGER"""
+        text = _SKIP_PATTERN.sub(" ", self.script[start:i]).lstrip()
+        return _TRIGGER_PATTERN.match(text) is not None
+
+    def split(self) -> List[Statement]:
+        script = self.script
+        dialect = self.dialect
+        start = -1  # 当前语句第一个字符的位置，跳过开头的注释和空白
+        i = 0
+        block_depth = 0  # SQLite 触发器内 BEGIN/CASE ... END 的嵌套深度
+        trigger = False  # 当前语句是否为 SQLite 触发器
+        while i < len(script):
+            line_start = i == 0 or script[i - 1] == "\n"
+            if line_start and dialect == "mssql":
+                match = _GO_PATTERN.match(script, i)
+                if match:
+                    self._emit(start, i, int(match.group(1) or 1))
+                    start = -1
+                    i = match.end()
+                    continue
+            if line_start and dialect == "mysql":
+                match = _DELIMITER_PATTERN.match(script, i)
+                if match:
+                    self._emit(start, i)
+                    self.delimiter = match.group(1)
+                    start = -1
+                    i = match.end()
+                    continue
+
+            char = script[i]
+            if script.startswith("--", i) or (char == "#" and dialect == "mysql"):
+                newline = script.find("\n", i)
+                i = len(script) if newline < 0 else newline
+                continue
+            if script.startswith("/*", i):
+                i = self._skip_block_comment(i)
+                continue
+            if char.isspace():
+                i += 1
+                continue
+            if dialect != "mssql" and block_depth == 0 and script.startswith(self.delimiter, i):
+                self._emit(start, i)
+                start = -1
+                i += len(self.delimiter)
+                trigger = False
+                continue
+
+            if start < 0:
+                start = i
+            if char == "'":
+                # MySQL 字符串和 PostgreSQL 的 E'...' 字符串中反斜杠为转义字符
+                escape = dialect == "mysql" or (
+                    dialect == "postgresql" and i > 0 and script[i - 1] in "eE"
+                    and (i < 2 or not (script[i - 2].isalnum() or script[i - 2] == "_")))
+                i = self._skip_quoted(i, char, escape)
+            elif char in "\"`":
+                i = self._skip_quoted(i, char, False)
+            elif char == "[" and dialect in ("mssql", "sqlite"):
+                i = self._skip_quoted(i, char, False)
+            elif char == "$" and dialect == "postgresql":
+                match = _DOLLAR_TAG_PATTERN.match(script, i)
+                if match:
+                    closing = script.find(match.group(), match.end())
+                    i = len(script) if closing < 0 else closing + len(match.group())
+                else:
+                    i += 1
+            elif char.isalpha() or char == "_":
+                match = _WORD_PATTERN.match(script, i)
+                word = match.group().upper()
+                if dialect == "sqlite":
+                    if word == "TRIGGER" and not trigger:
+                        trigger = self._in_trigger(start, match.end())
+                    if trigger and word in ("BEGIN", "CASE"):
+                        block_depth += 1
+                    elif trigger and word == "END" and block_depth > 0:
+                        block_depth -= 1
+                i = match.end()
+            else:
+                i += 1
+        self._emit(start, len(script))
+        return self.statements
+
+
+def needs_split(script: str, statements: List[Statement]) -> bool:
+    """
+    判断是否需要按拆分后的语句执行，而不能把原文作为一条语句交给驱动
+
+    多条语句、语句需要重复执行（``GO n``），或者拆分时去掉了原文中除结尾分号、
+    开头和结尾空白以外的内容（``GO``、``DELIMITER`` 等客户端命令，开头的注释）时返回True。
+
+    Args:
+        script: 原始脚本
+        statements: :func:`split_statements` 的结果
+
+    Returns:
+        bool: 是否需要按拆分后的语句执行
+    """
+    if len(statements) != 1:
+        return len(statements) > 1
+    statement = statements[0]
+    text = script.strip()
+    return statement.repeat > 1 or statement.text not in (text, text.rstrip(";").rstrip())
+
+
+def split_statements(script: str, dialect: str = "") -> List[Statement]:
+    """
+    将脚本拆分为语句
+
+    Args:
+        script: SQL脚本
+        dialect: 数据库类型（mssql、mysql、postgresql、sqlite），为空时只按分号拆分
+
+    Returns:
+        List[Statement]: 按脚本顺序排列的语句，忽略只有注释和空白的片段
+    """
+    return _Splitter(script, dialect).split()
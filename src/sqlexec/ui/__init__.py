@@ -1,8 +1,26 @@
-"""SQL Exec UI组件"""
+"""SQL Exec UI组件
 
-from .main_window import MainWindow
-from .sidebar import Sidebar
-from .query_editor import QueryEditor
-from .settings_dialog import SettingsDialog
+组件在第一次访问时才导入，避免加载不需要的对话框模块。
+"""
 
-__all__ = ['MainWindow', 'Sidebar', 'QueryEditor', 'SettingsDialog']
+import importlib
+from typing import Any
+
+# 组件名称到所在模块的映射
+_EXPORTS = {
+    'MainWindow': '.main_window',
+    'Sidebar': '.sidebar',
+    'QueryEditor': '.query_editor',
+    'SettingsDialog': '.settings_dialog',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,210 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel,
+    QLineEdit, QComboBox, QPushButton, QCheckBox, QProgressBar,
+    QFileDialog, QMessageBox
+)
+from PySide6.QtCore import QThread, Signal
+from typing import Callable, Dict, Iterable, List, Optional
+import os
+import time
+
+from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.export import (
+    EXPORT_FORMATS, ExportProgress, ExportStopped, ResultExporter, check_format
+)
+
+PROGRESS_INTERVAL = 0.2  # 进度信号的最小间隔（秒）
+
+
+class ExportWorker(QThread):
+    """后台导出查询结果"""
+    progress = Signal(int, int, int, float, float)  # 已完成连接数，总数，行数，行/秒，MB/秒
+    finished = Signal(bool, str, list)  # 成功标志，信息，写入的文件列表
+
+    def __init__(self, db_manager: DatabaseManager, connections: List[str], query: str,
+                 fmt: str, target: str, merge: bool, max_workers: int = 8,
+                 limits: Optional[Dict[str, int]] = None,
+                 keys_of: Optional[Callable[[str], Iterable[str]]] = None):
+        super().__init__()
+        self.connections = connections
+        self.query = query
+        self.target = target
+        self.merge = merge
+        self.keys_of = keys_of
+        self.exporter = ResultExporter(db_manager, fmt, max_workers=max_workers, limits=limits)
+        self._last_report = 0.0
+
+    def stop(self) -> None:
+        """取消导出"""
+        self.exporter.stop()
+
+    def _on_progress(self, progress: ExportProgress) -> None:
+        """限制进度信号的频率"""
+        now = time.monotonic()
+        if (now - self._last_report < PROGRESS_INTERVAL
+                and progress.completed_connections < progress.total_connections):
+            return
+        self._last_report = now
+        self.progress.emit(progress.completed_connections, progress.total_connections,
+                           progress.rows, progress.rows_per_second, progress.mb_per_second)
+
+    def run(self) -> None:
+        """执行导出"""
+        try:
+            paths = self.exporter.export(self.connections, self.query, self.target,
+                                         self.merge, self._on_progress, self.keys_of)
+        except ExportStopped:
+            self.finished.emit(False, "导出已取消", [])
+            return
+        except Exception as e:
+            self.finished.emit(False, str(e), [])
+            return
+        self.finished.emit(True, "", paths)
+
+
+class ExportDialog(QDialog):
+    """导出查询结果对话框"""
+
+    FORMAT_NAMES = {"csv": "CSV", "jsonl": "JSON Lines", "parquet": "Parquet"}
+
+    def __init__(self, db_manager: DatabaseManager, connections: List[str], query: str,
+                 max_workers: int = 8, limits: Optional[Dict[str, int]] = None,
+                 keys_of: Optional[Callable[[str], Iterable[str]]] = None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("导出查询结果")
+        self.setMinimumWidth(480)
+        self.db_manager = db_manager
+        self.connections = connections
+        self.query = query
+        self.max_workers = max_workers
+        self.limits = limits
+        self.keys_of = keys_of
+        self.worker: Optional[ExportWorker] = None
+        self._init_ui()
+
+    def _init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        form.addRow("连接:", QLabel(f"{len(self.connections)} 个连接"))
+
+        self.format_combo = QComboBox()
+        for fmt in EXPORT_FORMATS:
+            self.format_combo.addItem(self.FORMAT_NAMES.get(fmt, fmt), fmt)
+        self.format_combo.currentIndexChanged.connect(self._on_target_mode_changed)
+        form.addRow("格式:", self.format_combo)
+
+        self.merge_check = QCheckBox("合并为一个文件（增加来源连接列）")
+        self.merge_check.toggled.connect(self._on_target_mode_changed)
+        form.addRow("", self.merge_check)
+
+        target_layout = QHBoxLayout()
+        self.target_edit = QLineEdit()
+        self.browse_btn = QPushButton("浏览...")
+        self.browse_btn.clicked.connect(self._browse_target)
+        target_layout.addWidget(self.target_edit)
+        target_layout.addWidget(self.browse_btn)
+        self.target_label = QLabel()
+        form.addRow(self.target_label, target_layout)
+        layout.addLayout(form)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, len(self.connections))
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.export_btn = QPushButton("导出")
+        self.export_btn.clicked.connect(self._start_export)
+        self.close_btn = QPushButton("关闭")
+        self.close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+        self._on_target_mode_changed()
+
+    def _on_target_mode_changed(self):
+        """合并导出时目标为文件，否则为目录"""
+        if self.merge_check.isChecked():
+            self.target_label.setText("导出文件:")
+            self.target_edit.setPlaceholderText("选择导出文件")
+        else:
+            self.target_label.setText("导出目录:")
+            self.target_edit.setPlaceholderText("每个连接导出一个文件")
+
+    def _browse_target(self):
+        """选择导出位置"""
+        fmt = self.format_combo.currentData()
+        if self.merge_check.isChecked():
+            extension = EXPORT_FORMATS[fmt].extension
+            path, _ = QFileDialog.getSaveFileName(
+                self, "选择导出文件", f"result.{extension}",
+                f"{self.FORMAT_NAMES[fmt]} (*.{extension})")
+        else:
+            path = QFileDialog.getExistingDirectory(self, "选择导出目录")
+        if path:
+            self.target_edit.setText(path)
+
+    def _start_export(self):
+        """开始导出"""
+        target = self.target_edit.text().strip()
+        if not target:
+            QMessageBox.warning(self, "错误", "请选择导出位置")
+            return
+        fmt = self.format_combo.currentData()
+        merge = self.merge_check.isChecked()
+        if merge and os.path.isdir(target):
+            target = os.path.join(target, f"result.{EXPORT_FORMATS[fmt].extension}")
+
+        try:
+            check_format(fmt)
+        except (ValueError, RuntimeError) as e:
+            QMessageBox.warning(self, "错误", str(e))
+            return
+
+        self.worker = ExportWorker(
+            self.db_manager, self.connections, self.query, fmt, target, merge,
+            self.max_workers, self.limits, self.keys_of)
+        self.worker.progress.connect(self._update_progress)
+        self.worker.finished.connect(self._on_finished)
+
+        self.export_btn.setEnabled(False)
+        self.close_btn.setText("取消")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setStyleSheet("")
+        self.status_label.setText("正在导出...")
+        self.worker.start()
+
+    def _update_progress(self, completed: int, total: int, rows: int,
+                         rows_per_second: float, mb_per_second: float):
+        """更新导出进度"""
+        self.progress_bar.setValue(completed)
+        self.status_label.setText(
+            f"{completed}/{total} 个连接，已导出 {rows} 行，"
+            f"{rows_per_second:.0f} 行/秒，{mb_per_second:.2f} MB/秒")
+
+    def _on_finished(self, success: bool, message: str, paths: List[str]):
+        """导出结束"""
+        self.export_btn.setEnabled(True)
+        self.close_btn.setText("关闭")
+        self.worker = None
+        if success:
+            self.status_label.setStyleSheet("color: green;")
+            self.status_label.setText(f"{self.status_label.text()}\n已写入 {len(paths)} 个文件")
+        else:
+            self.status_label.setStyleSheet("color: red;")
+            self.status_label.setText(message)
+
+    def reject(self):
+        """导出进行中时取消导出，否则关闭对话框"""
+        if self.worker is not None:
+            self.worker.stop()
+            return
+        super().reject()
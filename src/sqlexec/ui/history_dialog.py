@@ -0,0 +1,189 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
+    QPushButton, QTableWidget, QTableWidgetItem, QTextEdit, QSplitter,
+    QHeaderView, QAbstractItemView, QMessageBox
+)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor, QFont
+from typing import List, Optional
+import datetime
+import sqlite3
+
+from sqlexec.core.history import HistoryEntry, QueryHistory, STATUS_FAILED, STATUS_NAMES
+
+SEARCH_DELAY_MS = 200  # 输入停止后多久开始搜索
+MAX_RESULTS = 500  # 最多显示的记录数
+
+
+class HistoryDialog(QDialog):
+    """查询历史对话框：搜索执行过的查询，选中的语句可以载入编辑器"""
+
+    COLUMNS = ["时间", "连接", "状态", "耗时(ms)", "行数", "语句"]
+
+    def __init__(self, history: QueryHistory, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("查询历史")
+        self.resize(900, 600)
+        self.history = history
+        self.selected_query: Optional[str] = None  # 载入编辑器的语句
+        self._entries: List[HistoryEntry] = []
+
+        # 输入停止一段时间后再搜索
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._refresh)
+
+        self._init_ui()
+        self._refresh()
+
+    def _init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索语句、连接或错误信息，多个词以空格分隔...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(lambda: self._search_timer.start())
+        self.status_combo = QComboBox()
+        self.status_combo.addItem("全部状态", None)
+        for status, name in STATUS_NAMES.items():
+            self.status_combo.addItem(name, status)
+        self.status_combo.currentIndexChanged.connect(self._refresh)
+        filter_layout.addWidget(self.search_edit)
+        filter_layout.addWidget(self.status_combo)
+        layout.addLayout(filter_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self._show_selected)
+        self.table.itemDoubleClicked.connect(self._load_selected)
+        splitter.addWidget(self.table)
+
+        # 选中记录的完整语句
+        self.preview = QTextEdit()
+        self.preview.setReadOnly(True)
+        self.preview.setFont(QFont("Consolas", 10))
+        splitter.addWidget(self.preview)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+        button_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        self.load_btn = QPushButton("载入到编辑器")
+        self.load_btn.clicked.connect(self._load_selected)
+        self.delete_btn = QPushButton("删除")
+        self.delete_btn.clicked.connect(self._delete_selected)
+        self.clear_btn = QPushButton("清空历史")
+        self.clear_btn.clicked.connect(self._clear_history)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.count_label)
+        button_layout.addStretch()
+        button_layout.addWidget(self.load_btn)
+        button_layout.addWidget(self.delete_btn)
+        button_layout.addWidget(self.clear_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+    def _refresh(self):
+        """按搜索条件重新加载记录"""
+        try:
+            self._entries = self.history.search(
+                self.search_edit.text(), self.status_combo.currentData(), limit=MAX_RESULTS)
+            total = self.history.count()
+        except (sqlite3.Error, OSError) as e:
+            self._entries = []
+            self.count_label.setText(f"读取查询历史失败: {e}")
+            self._fill_table()
+            return
+        self._fill_table()
+        shown = len(self._entries)
+        if shown >= MAX_RESULTS:
+            self.count_label.setText(f"共 {total} 条记录，显示最近 {shown} 条匹配的记录")
+        else:
+            self.count_label.setText(f"共 {total} 条记录，{shown} 条匹配")
+
+    def _fill_table(self):
+        """显示当前记录"""
+        self.table.setRowCount(len(self._entries))
+        for row, entry in enumerate(self._entries):
+            started = datetime.datetime.fromtimestamp(entry.started_at)
+            values = [
+                started.strftime("%Y-%m-%d %H:%M:%S"),
+                ", ".join(entry.aliases),
+                entry.status_name,
+                "" if entry.duration_ms is None else f"{entry.duration_ms:.0f}",
+                "" if entry.rows is None else str(entry.rows),
+                entry.title,
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column in (3, 4):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if entry.status == STATUS_FAILED:
+                    item.setForeground(QColor("red"))
+                self.table.setItem(row, column, item)
+            self.table.item(row, 1).setToolTip("\n".join(entry.aliases))
+            if entry.error:
+                self.table.item(row, 2).setToolTip(entry.error)
+        self.table.resizeColumnsToContents()
+        self.table.horizontalHeader().setSectionResizeMode(
+            len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        self._show_selected()
+
+    def _selected_entries(self) -> List[HistoryEntry]:
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self._entries[row] for row in rows]
+
+    def _show_selected(self):
+        """预览选中记录的完整语句和错误信息"""
+        entries = self._selected_entries()
+        self.load_btn.setEnabled(len(entries) == 1)
+        self.delete_btn.setEnabled(bool(entries))
+        if len(entries) != 1:
+            self.preview.clear()
+            return
+        entry = entries[0]
+        text = entry.query
+        if entry.error:
+            text += f"\n\n-- 错误: {entry.error}"
+        self.preview.setPlainText(text)
+
+    def _load_selected(self):
+        """把选中的语句载入编辑器"""
+        entries = self._selected_entries()
+        if len(entries) != 1:
+            return
+        self.selected_query = entries[0].query
+        self.accept()
+
+    def _delete_selected(self):
+        """删除选中的记录"""
+        entries = self._selected_entries()
+        if not entries:
+            return
+        try:
+            self.history.delete(entry.id for entry in entries)
+        except (sqlite3.Error, OSError) as e:
+            QMessageBox.warning(self, "错误", f"删除查询历史失败: {e}")
+        self._refresh()
+
+    def _clear_history(self):
+        """删除所有记录"""
+        reply = QMessageBox.question(self, "清空历史", "确定要删除所有查询历史吗？")
+        if reply != QMessageBox.Yes:
+            return
+        try:
+            self.history.clear()
+        except (sqlite3.Error, OSError) as e:
+            QMessageBox.warning(self, "错误", f"清空查询历史失败: {e}")
+        self._refresh()
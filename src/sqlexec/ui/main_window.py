@@ -9,8 +9,8 @@ from pathlib import Path
 
 from sqlexec.ui.sidebar import Sidebar
 from sqlexec.ui.query_editor import QueryEditor
-from sqlexec.ui.settings_dialog import SettingsDialog
 from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.history import QueryHistory
 from sqlexec.config.config_manager import ConfigManager
 from sqlexec.config.settings import Settings
 from sqlexec.config.enums import Theme, CloseAction
@@ -22,6 +22,8 @@ class MainWindow(QMainWindow):
         self.config_manager = ConfigManager()
         self.settings = self.config_manager.settings
         self.db_manager = DatabaseManager()
+        # 查询历史保存在配置文件所在目录，第一次使用时才打开
+        self.history = QueryHistory(self.config_manager.config_dir / "history.db")
 
         # 定义主题样式表
         self.light_theme = """
@@ -67,7 +69,7 @@ class MainWindow(QMainWindow):
             QPushButton:hover {
                 background-color: #dde1e6;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #ffffff;
                 alternate-background-color: #f8f9fa;
                 border: 1px solid #d4d8dd;
@@ -155,7 +157,7 @@ class MainWindow(QMainWindow):
             QPushButton:hover {
                 background-color: #505050;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d2d;
                 alternate-background-color: #3d3d3d;
                 border: 1px solid #505050;
@@ -227,6 +229,11 @@ class MainWindow(QMainWindow):
         toggle_sidebar_action.triggered.connect(self._toggle_sidebar)
         view_menu.addAction(toggle_sidebar_action)
 
+        history_action = QAction("查询历史", self)
+        history_action.setShortcut("Ctrl+H")
+        history_action.triggered.connect(self.query_editor.show_history)
+        view_menu.addAction(history_action)
+
     def _setup_tray(self):
         """设置系统托盘"""
         if not self.settings.general.show_system_tray:
@@ -272,17 +279,17 @@ class MainWindow(QMainWindow):
         self.tray_icon.show()
 
     def _load_connections(self):
-        """加载数据库连接"""
-        for conn in self.settings.connections.values():
-            self.db_manager.add_connection(conn.alias, {
-                "name": conn.name,
-                "alias": conn.alias,
-                "type": conn.type,
-                "connection_string": conn.connection_string,
-                "groups": self.settings.get_connection_groups(conn.alias)
-            })
+        """加载数据库连接，引擎在第一次使用时才创建"""
+        changed = set(self.db_manager.sync_connections(self.settings.get_connection_configs()))
         self.sidebar.refresh_connections()
 
+        # 在后台预热标记为预热的组内连接；重新加载时只预热新添加或配置变化的连接，
+        # 已预热的连接池保持不变
+        warm_up = [alias for alias in self.settings.get_warm_up_connections() if alias in changed]
+        if warm_up:
+            self.db_manager.start_warm_up(
+                warm_up, self.settings.execution.warm_up_workers)
+
     def _apply_settings(self):
         """应用设置到界面"""
         # 应用主题
@@ -291,6 +298,19 @@ class MainWindow(QMainWindow):
         else:
             self.setStyleSheet(self.light_theme)
 
+        # 应用结果缓存设置
+        execution = self.settings.execution
+        self.db_manager.configure_cache(
+            execution.cache_enabled, execution.cache_ttl, execution.cache_max_mb)
+        self.db_manager.configure_spill(execution.memory_budget_mb, execution.spill_directory)
+        self.db_manager.configure_resilience(
+            execution.retry_attempts, execution.retry_base_delay, execution.retry_max_delay,
+            execution.circuit_failure_threshold, execution.circuit_reset_timeout)
+        self.db_manager.configure_shared_pools(execution.share_server_pools)
+        self.db_manager.configure_metrics(execution.metrics_format, execution.metrics_directory)
+        self.history.configure(self.settings.general.history_max_entries,
+                               self.settings.general.history_retention_days)
+
         # 应用系统托盘设置
         if hasattr(self, "tray_icon"):
             if self.settings.general.show_system_tray:
@@ -300,6 +320,8 @@ class MainWindow(QMainWindow):
 
     def _show_settings(self):
         """显示设置对话框"""
+        # 设置对话框只在打开时导入
+        from sqlexec.ui.settings_dialog import SettingsDialog
         dialog = SettingsDialog(self.settings, self)
         if dialog.exec():
             # 保存设置到文件
@@ -326,6 +348,7 @@ class MainWindow(QMainWindow):
     def _quit_application(self):
         """退出应用程序"""
         self.db_manager.clear_all_connections()
+        self.history.close()
         self.tray_icon.hide()
         sys.exit(0)
 
@@ -0,0 +1,129 @@
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from sqlexec.core.merge import MergedStream
+from sqlexec.core.result_set import ResultSet
+from sqlexec.ui.result_view import ResultTableView, PAGE_SIZE
+
+MAX_LOADED_ROWS = 100000  # 合并结果最多加载到表格中的行数
+
+
+class MergedResultLoader(QObject):
+    """在后台线程中从合并流读取数据，最多读取 max_rows 行"""
+    page_ready = Signal(object, bool, bool)  # 一页数据 ResultSet，是否还有更多，是否达到行数上限
+    failed = Signal(str)  # 错误信息
+
+    def __init__(self, stream: MergedStream, max_rows: int = MAX_LOADED_ROWS):
+        super().__init__()
+        self.stream = stream
+        self.remaining = max_rows
+        self.closed = False
+
+    @Slot(int)
+    def fetch(self, count: int) -> None:
+        """读取一页数据，流已关闭时忽略"""
+        if self.closed:
+            return
+        count = min(count, self.remaining)
+        try:
+            page = self.stream.fetch(count)
+        except Exception as e:
+            self._close()
+            self.failed.emit(str(e))
+            return
+
+        self.remaining -= len(page)
+        truncated = self.remaining <= 0
+        has_more = len(page) >= count and not truncated
+        if not has_more:
+            self._close()
+        self.page_ready.emit(page, has_more, truncated)
+
+    def _close(self) -> None:
+        """关闭所有连接的查询"""
+        self.closed = True
+        self.stream.close()
+
+
+class MergedResultView(ResultTableView):
+    """多连接合并结果表格
+
+    数据由后台线程从 :class:`MergedStream` 分页读取，滚动到底部时
+    才加载下一页，不必等待所有连接返回全部结果。已加载的页保留在表格中，
+    加载到 max_rows 行后停止读取并关闭各连接的查询。
+    """
+    fetch_requested = Signal(int)  # 转发给后台线程的加载请求
+    page_loaded = Signal(int, bool)  # 已加载的总行数，是否还有更多
+    failed = Signal(str)  # 错误信息
+
+    def __init__(self, stream: MergedStream, max_rows: int = MAX_LOADED_ROWS, parent=None):
+        super().__init__(parent)
+        self._stream = stream
+        self._loaded_first = False
+        self._truncated = False
+
+        self._thread = QThread()
+        self._loader = MergedResultLoader(stream, max_rows)
+        self._loader.moveToThread(self._thread)
+        self.fetch_requested.connect(self._loader.fetch)
+        self._loader.page_ready.connect(self._on_page_ready)
+        self._loader.failed.connect(self._on_failed)
+        self.model().fetch_requested.connect(self.fetch_requested)
+        self._thread.start()
+
+        self.fetch_requested.emit(PAGE_SIZE)
+
+    @property
+    def ordered(self) -> bool:
+        """结果是否按 ORDER BY 全局有序"""
+        return self._stream.ordered
+
+    @property
+    def fallback_reason(self) -> str:
+        """有 ORDER BY 但未能全局排序的原因"""
+        return self._stream.fallback_reason
+
+    @property
+    def truncated(self) -> bool:
+        """是否因为达到行数上限停止加载"""
+        return self._truncated
+
+    @property
+    def cancelled(self) -> bool:
+        """查询是否已被取消"""
+        return self._stream.scope.cancelled
+
+    def cancel(self) -> None:
+        """中断各连接上正在执行的语句，停止加载"""
+        self._stream.cancel()
+        # 没有正在加载的页时，由后台线程处理这次请求并报告取消
+        self.fetch_requested.emit(0)
+
+    def _on_page_ready(self, page: ResultSet, has_more: bool, truncated: bool) -> None:
+        """显示一页数据"""
+        self._truncated = truncated
+        model = self.model()
+        if not self._loaded_first:
+            self._loaded_first = True
+            self.set_results(page)
+        else:
+            model.append_results(page)
+        model.set_has_more(has_more)
+        self.page_loaded.emit(model.rowCount(), has_more)
+
+    def _on_failed(self, error: str) -> None:
+        """加载失败或被取消后不再请求后续数据"""
+        self.model().set_has_more(False)
+        self.failed.emit(error)
+
+    def shutdown(self) -> None:
+        """
+        停止后台线程并关闭所有连接的查询
+
+        先中断正在执行的语句，后台线程不必等待较慢或无响应的连接返回即可退出。
+        """
+        self._loader.page_ready.disconnect(self._on_page_ready)
+        self._loader.failed.disconnect(self._on_failed)
+        self._stream.cancel()
+        self._thread.quit()
+        self._thread.wait()
+        self._stream.close()
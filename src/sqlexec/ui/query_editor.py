@@ -1,16 +1,31 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTextEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QTabWidget,
+    QPushButton, QTabWidget, QComboBox,
     QSplitter, QProgressBar, QMessageBox, QLabel
 )
 from PySide6.QtCore import Qt, QThread, Signal, QRegularExpression
 from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
 from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+import time
+from sqlexec.core.aggregate import AggregateCombiner, AggregatePlan, plan_aggregate
+from sqlexec.core.cancel import CancelScope
 from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.fanout import FanOutRunner, build_limits, limit_keys
+from sqlexec.core.history import (
+    HistoryEntry, STATUS_CANCELED, STATUS_FAILED, STATUS_SUCCESS
+)
+from sqlexec.core.merge import MergedStream, concat_results, parse_order_by
+from sqlexec.core.metrics import QueryMetrics, metrics_table, run_summary
+from sqlexec.core.result_set import ResultSet
+from sqlexec.core.script import StatementResult, summarize
+from sqlexec.ui.merged_view import MergedResultView
+from sqlexec.ui.result_view import ResultTableView
 
 if TYPE_CHECKING:
     from sqlexec.ui.main_window import MainWindow
 
+MAX_SCRIPT_RESULT_TABS = 10  # 脚本中每个连接最多显示的查询结果标签页数
+
 
 class SQLSyntaxHighlighter(QSyntaxHighlighter):
     """SQL语法高亮器"""
@@ -105,9 +120,10 @@ class SQLSyntaxHighlighter(QSyntaxHighlighter):
         # 处理多行注释
         self.setCurrentBlockState(0)
 
+        # PySide6 传入的 text 是 Python 字符串，使用正则匹配查找注释的起始位置
         start_index = 0
         if self.previousBlockState() != 1:
-            start_index = text.indexOf(self.comment_start_expression)
+            start_index = self.comment_start_expression.match(text).capturedStart()
 
         while start_index >= 0:
             match = self.comment_end_expression.match(text, start_index)
@@ -122,45 +138,165 @@ class SQLSyntaxHighlighter(QSyntaxHighlighter):
 
             self.setFormat(start_index, comment_length,
                            self.multi_line_comment_format)
-            start_index = text.indexOf(
-                self.comment_start_expression, start_index + comment_length)
+            start_index = self.comment_start_expression.match(
+                text, start_index + comment_length).capturedStart()
 
 
 class QueryExecutor(QThread):
-    """查询执行器"""
-    finished = Signal(bool, str, list)  # 成功标志，错误信息，结果列表
+    """查询执行器
+
+    每个连接完成后立即发出 result_ready 或 error 信号，某个连接失败不影响其他连接，
+    所有连接结束后发出 finished 信号。调用 :meth:`cancel` 中断所有连接上正在执行的语句。
+    各连接的分阶段耗时统计在结束后由 :meth:`run_metrics` 获取，并写入指标文件。
+    """
+    finished = Signal(bool, str, list)  # 成功标志，错误信息，成功连接的(标签, ResultSet)列表
     progress = Signal(int, int)  # 当前进度，总数
+    result_ready = Signal(int, list)  # 连接序号，该连接的(标签, ResultSet)列表
+    error = Signal(int, str, str)  # 连接序号，连接别名，错误信息
+
+    # 某个连接失败时是否停止执行其他连接
+    stop_on_error = False
 
-    def __init__(self, db_manager: DatabaseManager, connections: List[str], query: str):
+    def __init__(self, db_manager: DatabaseManager, connections: List[str], query: str,
+                 max_workers: int = 1, group_limits: Optional[Dict[str, int]] = None,
+                 split_scripts: bool = False, host_limits: Optional[Dict[str, int]] = None):
         super().__init__()
         self.db_manager: DatabaseManager = db_manager
         self.connections: List[str] = connections
         self.query: str = query
+        self.max_workers: int = max_workers
+        self.group_limits: Dict[str, int] = group_limits or {}
+        self.host_limits: Dict[str, int] = host_limits or {}  # 各数据库服务器的并发上限
+        # 为True时多条语句的脚本逐条执行，每个连接返回执行摘要和各查询的结果
+        self.split_scripts: bool = split_scripts
+        self.scope = CancelScope()
+        self.metrics: Dict[str, QueryMetrics] = {}  # 本次执行各连接的统计
+        self._runner = FanOutRunner(self.max_workers, build_limits(self.group_limits, self.host_limits))
+
+    def cancel(self) -> None:
+        """取消查询：中断正在执行的语句，不再开始其他连接，可以在任意线程中调用"""
+        self._runner.stop()
+        self.scope.cancel()
+
+    def _limit_keys(self, alias: str) -> List[str]:
+        """获取连接所属组和服务器的限流键"""
+        return limit_keys(self.db_manager.get_connection_info(alias) or {})
 
     def run(self) -> None:
         """执行查询"""
         total = len(self.connections)
-        results: List[Tuple[str, List[Dict[str, Any]]]] = []
-
-        for i, alias in enumerate(self.connections, 1):
-            self.progress.emit(i, total)
-            success, rows, error = self.db_manager.execute_query(
-                alias, self.query)
-
-            if not success:
-                self.finished.emit(False, f"在 {alias} 上执行失败: {error}", [])
-                return
-
-            # 将结果与连接别名一起保存
-            results.append((alias, rows))
-
-        self.finished.emit(True, "", results)
+        completed = 0
+        failures: List[Tuple[int, str, str]] = []
+        results: Dict[int, List[Tuple[str, ResultSet]]] = {}
+
+        runner = self._runner
+
+        def on_done(index: int, alias: str, outcome: Tuple[bool, Any, str]) -> None:
+            nonlocal completed
+            completed += 1
+            success, result, error = outcome
+            if success and not (failures and self.stop_on_error):
+                try:
+                    self._on_result(alias, result, completed, total)
+                except ValueError as e:
+                    success, error = False, str(e)
+            if success:
+                # 脚本返回多个结果
+                results[index] = result if isinstance(result, list) else [(alias, result)]
+                self.result_ready.emit(index, results[index])
+            else:
+                failures.append((index, alias, error))
+                self.error.emit(index, alias, error)
+                if self.stop_on_error:
+                    runner.stop()
+            self.progress.emit(completed, total)
+
+        self.progress.emit(0, total)
+        runner.run(self.connections, self._execute, self._limit_keys, on_done)
+
+        # 结果顺序与选中的连接一致
+        collected: List[Tuple[str, ResultSet]] = [
+            entry for index in sorted(results) for entry in results[index]
+        ]
+        self.db_manager.metrics.flush()
+        if self.scope.cancelled:
+            self.finished.emit(False, f"查询已取消，{len(results)}/{total} 个连接已完成", collected)
+            return
+        if failures:
+            # 按连接顺序报告第一个失败的连接
+            _, alias, error = min(failures)
+            message = f"在 {alias} 上执行失败: {error}"
+            if len(failures) > 1:
+                message = f"{len(failures)} 个连接执行失败，{message}"
+            self.finished.emit(False, message, collected)
+            return
+        self.finished.emit(True, "", collected)
+
+    def run_metrics(self) -> List[QueryMetrics]:
+        """已开始执行的连接的统计，按选中连接的顺序排列"""
+        return [self.metrics[alias] for alias in self.connections if alias in self.metrics]
+
+    def _execute(self, alias: str) -> Tuple[bool, Any, str]:
+        """在一个连接上执行查询，在工作线程中运行"""
+        metrics = self.metrics[alias] = QueryMetrics(alias)
+        if self.split_scripts:
+            statements = self.db_manager.split_script(alias, self.query)
+            if len(statements) > 1:
+                success, items, error = self.db_manager.execute_script(
+                    alias, statements, scope=self.scope, metrics=metrics)
+                return success, self._script_results(alias, items), error
+        return self.db_manager.execute_query(alias, self.query, scope=self.scope, metrics=metrics)
+
+    @staticmethod
+    def _script_results(alias: str, items: List[StatementResult]) -> List[Tuple[str, ResultSet]]:
+        """脚本的执行摘要和返回行的语句的结果，结果标签为“别名 #语句序号”"""
+        results = [(f"{alias} 脚本", summarize(items))]
+        for item in items:
+            if item.result is not None and len(results) <= MAX_SCRIPT_RESULT_TABS:
+                results.append((f"{alias} #{item.index}", item.result))
+        return results
+
+    def _on_result(self, alias: str, result: Optional[ResultSet], completed: int, total: int) -> None:
+        """单个连接执行成功后调用，在执行线程中运行"""
+
+
+class AggregateExecutor(QueryExecutor):
+    """分布式聚合执行器
+
+    在各连接上执行改写后的部分聚合语句，每个连接完成后立即合并到全局结果，
+    只有各连接按分组汇总后的少量行会传回本地。
+    """
+    aggregated = Signal(object, int, int)  # 当前的全局结果 ResultSet，已完成数，总数
+
+    # 缺少任何一个连接的部分结果时全局聚合都不正确
+    stop_on_error = True
+
+    def __init__(self, db_manager: DatabaseManager, connections: List[str], plan: AggregatePlan,
+                 max_workers: int = 1, group_limits: Optional[Dict[str, int]] = None,
+                 host_limits: Optional[Dict[str, int]] = None):
+        super().__init__(db_manager, connections, plan.query, max_workers, group_limits,
+                         host_limits=host_limits)
+        self.combiner = AggregateCombiner(plan)
+
+    def _on_result(self, alias: str, result: Optional[ResultSet], completed: int, total: int) -> None:
+        """合并一个连接的部分聚合结果"""
+        self.combiner.add(result, self.db_manager.connections.get(alias, {}).get("type", ""))
+        self.aggregated.emit(self.combiner.result(), completed, total)
 
 
 class QueryEditor(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent  # 类型: MainWindow
+        self._result_mode = "separate"  # 本次查询的结果显示方式
+        self._aggregate_table: Optional[ResultTableView] = None  # 分布式聚合的结果表格
+        self._merged_table: Optional[MergedResultView] = None  # 按 ORDER BY 归并的合并结果表格
+        # 各连接结果标签页的排序键（连接序号, 结果序号），标签页按选中连接的顺序排列
+        self._tab_keys: Dict[QWidget, Tuple[int, int]] = {}
+        self._pending_history: Optional[HistoryEntry] = None  # 本次执行尚未保存的历史记录
+        self._history_started = 0.0
+        # 合并结果表格尚未保存的历史记录，第一页加载完成或失败时由对应的表格保存
+        self._merged_history: Dict[QWidget, HistoryEntry] = {}
         self._init_ui()
 
     def _init_ui(self):
@@ -187,10 +323,33 @@ class QueryEditor(QWidget):
         button_layout = QHBoxLayout()
         self.run_btn = QPushButton("执行查询")
         self.run_btn.clicked.connect(self._run_query)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.setToolTip("中断所有连接上正在执行的查询")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self._cancel_query)
         self.clear_btn = QPushButton("清除")
         self.clear_btn.clicked.connect(self._clear_query)
+        self.export_btn = QPushButton("导出...")
+        self.export_btn.setToolTip("在选中的连接上执行查询，并将结果流式写入文件")
+        self.export_btn.clicked.connect(self._export_query)
+        self.history_btn = QPushButton("历史...")
+        self.history_btn.setToolTip("搜索执行过的查询 (Ctrl+H)")
+        self.history_btn.clicked.connect(self.show_history)
+        # 结果显示方式：每个连接一个标签页，或合并为一个结果
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("分别显示", "separate")
+        self.mode_combo.addItem("合并结果", "merge")
+        self.mode_combo.addItem("分布式聚合", "aggregate")
+        self.mode_combo.setToolTip(
+            "合并结果：增加来源连接列，带 ORDER BY 的查询按全局顺序合并\n"
+            "分布式聚合：各连接先按分组聚合，本地合并 COUNT/SUM/MIN/MAX/AVG"
+        )
         button_layout.addWidget(self.run_btn)
+        button_layout.addWidget(self.cancel_btn)
         button_layout.addWidget(self.clear_btn)
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.history_btn)
+        button_layout.addWidget(self.mode_combo)
         button_layout.addStretch()
         query_layout.addLayout(button_layout)
 
@@ -236,96 +395,341 @@ class QueryEditor(QWidget):
             QMessageBox.warning(self, "错误", "请先选择至少一个数据库连接")
             return
 
+        # 清空所有结果标签页
+        self._clear_results()
+
+        settings = self.main_window.settings
+        self._start_history(query, selected_conns)
+        self._result_mode = self.mode_combo.currentData()
+        if self._result_mode == "merge" and parse_order_by(query):
+            # 带 ORDER BY 的合并查询以流式 k 路归并分页加载
+            self._open_merged_view(selected_conns, query)
+            return
+
+        if self._result_mode == "aggregate":
+            try:
+                plan = plan_aggregate(query)
+            except ValueError as e:
+                self.status_bar.setText(f"无法分布式聚合: {e}")
+                self.status_bar.setStyleSheet("color: red; padding: 5px;")
+                self._finish_history(STATUS_FAILED, error=f"无法分布式聚合: {e}")
+                return
+            self.executor = AggregateExecutor(
+                self.main_window.db_manager,
+                selected_conns,
+                plan,
+                max_workers=settings.execution.max_workers,
+                group_limits=settings.get_group_worker_limits(),
+                host_limits=settings.get_host_limits()
+            )
+            self._aggregate_table = ResultTableView()
+            self.result_tabs.addTab(self._aggregate_table, "聚合结果")
+            self.executor.aggregated.connect(self._on_aggregated)
+        else:
+            # 创建查询执行器，分别显示时脚本逐条执行并显示每条语句的结果
+            self.executor = QueryExecutor(
+                self.main_window.db_manager,
+                selected_conns,
+                query,
+                max_workers=settings.execution.max_workers,
+                group_limits=settings.get_group_worker_limits(),
+                split_scripts=self._result_mode == "separate",
+                host_limits=settings.get_host_limits()
+            )
+
         # 禁用运行按钮，显示进度条
         self.run_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
 
-        # 清空所有结果标签页
-        self.result_tabs.clear()
-
-        # 创建并启动查询执行器
-        self.executor = QueryExecutor(
-            self.main_window.db_manager,
-            selected_conns,
-            query
-        )
         self.executor.finished.connect(self._handle_query_result)
         self.executor.progress.connect(self._update_progress)
+        self.executor.result_ready.connect(self._on_result_ready)
+        self.executor.error.connect(self._on_connection_error)
         self.executor.start()
 
-    def _handle_query_result(self, success: bool, error: str, results: List[Dict]):
-        """处理查询结果"""
+    def _cancel_query(self):
+        """取消正在执行的查询"""
+        self.cancel_btn.setEnabled(False)
+        self.status_bar.setText("正在取消...")
+        self.status_bar.setStyleSheet("padding: 5px;")
+        if self._merged_table is not None:
+            self._merged_table.cancel()
+        else:
+            self.executor.cancel()
+
+    def _export_query(self):
+        """导出查询结果"""
+        query = self.query_edit.toPlainText().strip()
+        if not query:
+            return
+
+        selected_conns = self.main_window.sidebar.get_selected_connections()
+        if not selected_conns:
+            QMessageBox.warning(self, "错误", "请先选择至少一个数据库连接")
+            return
+
+        # 导出对话框只在使用时导入
+        from sqlexec.ui.export_dialog import ExportDialog
+        settings = self.main_window.settings
+        db_manager = self.main_window.db_manager
+        dialog = ExportDialog(
+            db_manager,
+            selected_conns,
+            query,
+            max_workers=settings.execution.max_workers,
+            limits=build_limits(settings.get_group_worker_limits(), settings.get_host_limits()),
+            keys_of=lambda alias: limit_keys(db_manager.get_connection_info(alias) or {}),
+            parent=self
+        )
+        dialog.exec()
+
+    def _open_merged_view(self, connections: List[str], query: str):
+        """打开按 ORDER BY 全局排序的合并结果"""
+        settings = self.main_window.settings
+        db_manager = self.main_window.db_manager
+        stream = MergedStream(
+            db_manager,
+            connections,
+            query,
+            max_workers=settings.execution.max_workers,
+            limits=build_limits(settings.get_group_worker_limits(), settings.get_host_limits()),
+            keys_of=lambda alias: limit_keys(db_manager.get_connection_info(alias) or {})
+        )
+        table = MergedResultView(stream)
+        table.page_loaded.connect(self._on_merged_page_loaded)
+        table.failed.connect(self._on_merged_failed)
+        self._merged_table = table
+        if self._pending_history is not None:
+            self._merged_history[table] = self._pending_history
+            self._pending_history = None
+        self.result_tabs.addTab(table, "合并结果")
+        # 关闭标签页前可以随时取消，中断各连接上的查询
+        self.cancel_btn.setEnabled(True)
+        self.status_bar.setText("正在加载合并结果...")
+        self.status_bar.setStyleSheet("padding: 5px;")
+
+    def _on_merged_page_loaded(self, rows: int, has_more: bool):
+        """合并结果加载一页后更新状态"""
+        table = self.sender()
+        if table is not None and table.ordered:
+            order = "全局排序"
+        elif table is not None and table.fallback_reason:
+            order = f"按连接顺序：{table.fallback_reason}"
+        else:
+            order = "按连接顺序"
+        if has_more:
+            more = "，滚动加载更多"
+        elif table is not None and table.truncated:
+            more = "，已达到显示上限，不再加载"
+        else:
+            more = ""
+        # 分页加载的总行数和耗时未知
+        self._finish_merged_history(table, STATUS_SUCCESS)
+        if table is not self._merged_table:
+            return  # 已经开始了新的查询
+        if not has_more:
+            self.cancel_btn.setEnabled(False)
+        self.status_bar.setText(f"已加载 {rows} 行（{order}）{more}")
+        self.status_bar.setStyleSheet("color: green; padding: 5px;")
+
+    def _on_merged_failed(self, error: str):
+        """合并结果加载失败或被取消"""
+        table = self.sender()
+        cancelled = table is not None and table.cancelled
+        self._finish_merged_history(table, STATUS_CANCELED if cancelled else STATUS_FAILED, error)
+        if table is not self._merged_table:
+            return  # 已经开始了新的查询
+        self.cancel_btn.setEnabled(False)
+        self.status_bar.setText(error)
+        self.status_bar.setStyleSheet("color: red; padding: 5px;")
+
+    def _on_aggregated(self, result: ResultSet, completed: int, total: int):
+        """显示已完成连接合并后的聚合结果"""
+        if self._aggregate_table is None:
+            return  # 标签页已关闭
+        index = self.result_tabs.indexOf(self._aggregate_table)
+        if index < 0:
+            return
+        self._aggregate_table.set_results(result)
+        label = "聚合结果" if completed == total else f"聚合结果 ({completed}/{total})"
+        self.result_tabs.setTabText(index, label)
+
+    def _on_result_ready(self, index: int, results: List[Tuple[str, ResultSet]]):
+        """一个连接执行完成后立即显示其结果"""
+        if self._result_mode != "separate":
+            return  # 合并和聚合结果在所有连接完成后显示
+        for position, (label, result_data) in enumerate(results):
+            if not result_data:
+                continue
+            table = ResultTableView()
+            self._display_results(table, result_data)
+            # 来自缓存的结果在标签上注明
+            if result_data.from_cache:
+                tab = self._insert_result_tab(table, f"{label} (缓存)", (index, position))
+                self.result_tabs.setTabToolTip(tab, "结果来自缓存")
+            else:
+                self._insert_result_tab(table, label, (index, position))
+
+    def _on_connection_error(self, index: int, alias: str, error: str):
+        """将执行失败的连接显示为错误标签页，其他连接继续执行"""
+        view = QTextEdit()
+        view.setReadOnly(True)
+        view.setPlainText(error)
+        view.setStyleSheet("color: red;")
+        tab = self._insert_result_tab(view, f"{alias} (失败)", (index, 0))
+        self.result_tabs.tabBar().setTabTextColor(tab, QColor("red"))
+        self.result_tabs.setTabToolTip(tab, error)
+
+    def _insert_result_tab(self, widget: QWidget, label: str, key: Tuple[int, int]) -> int:
+        """按连接顺序插入结果标签页，返回标签页位置"""
+        position = self.result_tabs.count()
+        for tab in range(self.result_tabs.count()):
+            other = self._tab_keys.get(self.result_tabs.widget(tab))
+            if other is not None and other > key:
+                position = tab
+                break
+        self._tab_keys[widget] = key
+        return self.result_tabs.insertTab(position, widget, label)
+
+    def _handle_query_result(self, success: bool, error: str,
+                             results: List[Tuple[str, ResultSet]]):
+        """所有连接执行结束"""
         # 恢复UI状态
         self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
         self.progress_bar.setVisible(False)
 
+        if self._result_mode == "merge" and results:
+            self._display_merged_results(results)
+        # 统计标签页放在所有结果之后
+        metrics = self.executor.run_metrics()
+        self._show_metrics(metrics)
+        if self.executor.scope.cancelled:
+            status = STATUS_CANCELED
+        else:
+            status = STATUS_SUCCESS if success else STATUS_FAILED
+        self._finish_history(status, sum(item.rows for item in metrics), error)
+        if self._result_mode == "aggregate" and success:
+            combiner = self.executor.combiner
+            self.status_bar.setText(
+                f"聚合完成：{combiner.shards} 个连接，{combiner.partial_rows} 行部分结果合并为 "
+                f"{len(combiner.result())} 行")
+            self.status_bar.setStyleSheet("color: green; padding: 5px;")
+            return
+
         if not success:
             self.status_bar.setText(error)
             self.status_bar.setStyleSheet("color: red; padding: 5px;")
+        elif self._result_mode == "separate":
+            summary = run_summary(metrics)
+            self.status_bar.setText(f"查询成功，{summary}" if summary else "查询成功")
+            self.status_bar.setStyleSheet("color: green; padding: 5px;")
+
+    def _start_history(self, query: str, connections: List[str]):
+        """开始记录一次执行，关闭查询历史时不记录"""
+        self._pending_history = None
+        if self.main_window.settings.general.history_enabled:
+            self._pending_history = HistoryEntry(query, list(connections))
+            self._history_started = time.perf_counter()
+
+    def _finish_history(self, status: str, rows: Optional[int] = None, error: str = ""):
+        """保存本次执行的历史记录，每次执行只保存一次"""
+        entry = self._pending_history
+        if entry is None:
+            return
+        self._pending_history = None
+        entry.duration_ms = (time.perf_counter() - self._history_started) * 1000
+        self._save_history(entry, status, rows, error)
+
+    def _finish_merged_history(self, table: QWidget, status: str, error: str = ""):
+        """保存合并结果表格对应的历史记录，分页加载的总行数和耗时未知"""
+        entry = self._merged_history.pop(table, None)
+        if entry is not None:
+            self._save_history(entry, status, error=error)
+
+    def _save_history(self, entry: HistoryEntry, status: str, rows: Optional[int] = None,
+                      error: str = ""):
+        """写入一条历史记录"""
+        entry.status = status
+        entry.rows = rows
+        entry.error = error
+        self.main_window.history.add(entry)
+
+    def show_history(self):
+        """打开查询历史，选中的语句载入编辑器"""
+        # 历史对话框只在使用时导入
+        from sqlexec.ui.history_dialog import HistoryDialog
+        dialog = HistoryDialog(self.main_window.history, self)
+        if dialog.exec() and dialog.selected_query is not None:
+            self.query_edit.setPlainText(dialog.selected_query)
+            self.query_edit.setFocus()
+
+    def _show_metrics(self, metrics: List[QueryMetrics]):
+        """在最后一个标签页显示各连接的耗时统计，状态栏提示中显示各连接的耗时"""
+        self.status_bar.setToolTip("\n".join(item.summary() for item in metrics))
+        if not metrics:
+            return
+        table = ResultTableView()
+        self._display_results(table, metrics_table(metrics))
+        tab = self.result_tabs.addTab(table, "执行统计")
+        self.result_tabs.setTabToolTip(tab, "各连接的连接、执行、读取和转换耗时，以及返回的行数和数据量")
+
+    def _display_merged_results(self, results: List[Tuple[str, ResultSet]]):
+        """将各连接的结果按连接顺序拼接后显示在一个标签页中"""
+        try:
+            merged = concat_results(results)
+        except ValueError as e:
+            self.status_bar.setText(str(e))
+            self.status_bar.setStyleSheet("color: red; padding: 5px;")
             return
 
-        # 显示结果
-        if results:
-            for alias, result_data in results:
-                if result_data:
-                    # 创建新的结果表格
-                    table = QTableWidget()
-                    self._display_results(table, result_data)
-                    # 添加到标签页
-                    self.result_tabs.addTab(table, alias)
-
-            self.status_bar.setText(f"查询成功")
-            self.status_bar.setStyleSheet("color: green; padding: 5px;")
-        else:
-            self.status_bar.setText("查询执行成功")
-            self.status_bar.setStyleSheet("color: green; padding: 5px;")
+        table = ResultTableView()
+        self._display_results(table, merged)
+        self.result_tabs.addTab(table, "合并结果")
+        self.status_bar.setText(f"查询成功，共 {len(merged)} 行")
+        self.status_bar.setStyleSheet("color: green; padding: 5px;")
 
-    def _display_results(self, table: QTableWidget, results: List[Dict]):
+    def _display_results(self, table: ResultTableView, results: ResultSet):
         """在表格中显示结果"""
         if not results:
             return
 
-        # 设置列
-        columns = list(results[0].keys())
-        table.setColumnCount(len(columns))
-        table.setHorizontalHeaderLabels(columns)
-
-        # 设置行
-        table.setRowCount(len(results))
-
-        # 填充数据
-        for row, data in enumerate(results):
-            for col, key in enumerate(columns):
-                value = data[key]
-                # 确保正确处理编码
-                if isinstance(value, bytes):
-                    try:
-                        value = value.decode('utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            value = value.decode('gbk')
-                        except UnicodeDecodeError:
-                            value = str(value)
-                elif value is None:
-                    value = ''
-                else:
-                    value = str(value)
-
-                item = QTableWidgetItem(value)
-                table.setItem(row, col, item)
-
-        # 调整列宽
-        table.resizeColumnsToContents()
+        # 单元格内容由模型按需读取，列宽根据采样行计算
+        table.set_results(results)
 
     def _close_result_tab(self, index: int):
         """关闭结果标签页"""
+        widget = self.result_tabs.widget(index)
         self.result_tabs.removeTab(index)
+        self._release_result_widget(widget)
+
+    def _clear_results(self):
+        """关闭所有结果标签页"""
+        while self.result_tabs.count():
+            self._close_result_tab(0)
+
+    def _release_result_widget(self, widget: QWidget):
+        """释放结果表格，合并结果需要先停止后台加载"""
+        self._tab_keys.pop(widget, None)
+        if isinstance(widget, MergedResultView):
+            widget.shutdown()
+            # 第一页加载完成前关闭，记为取消
+            self._finish_merged_history(widget, STATUS_CANCELED)
+            if widget is self._merged_table:
+                self._merged_table = None
+                self.cancel_btn.setEnabled(False)
+        if widget is self._aggregate_table:
+            # 聚合仍在执行时，后续的合并结果不再显示
+            self._aggregate_table = None
+        widget.deleteLater()
 
     def _clear_query(self):
         """清除查询"""
         self.query_edit.clear()
-        self.result_tabs.clear()
+        self._clear_results()
         self.status_bar.clear()
+        self.status_bar.setToolTip("")
 
     def _update_progress(self, current, total):
         """更新进度条"""
@@ -0,0 +1,139 @@
+from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from typing import List, Any, Optional
+
+from sqlexec.core.result_set import ResultSet
+
+PAGE_SIZE = 1000  # 分页加载时每页的行数
+SAMPLE_ROWS = 200  # 计算列宽时采样的行数
+MAX_COLUMN_WIDTH = 400  # 自动列宽的上限
+COLUMN_PADDING = 16  # 列宽额外留白
+
+
+class ResultTableModel(QAbstractTableModel):
+    """查询结果数据模型
+
+    只保存对结果数据的引用，单元格的显示文本在视图请求时才计算，
+    因此无论结果有多大，模型本身都不会额外创建逐个单元格的对象。
+    结果也可以是写入临时文件的 :class:`SpilledResultSet`，按需读取所在的页。
+
+    结果需要分页加载时，调用 :meth:`set_has_more` 标记还有数据，
+    视图滚动到底部时模型发出 ``fetch_requested`` 信号，
+    数据到达后通过 :meth:`append_results` 追加。
+    """
+    fetch_requested = Signal(int)  # 请求加载的行数
+
+    def __init__(self, results: Optional[ResultSet] = None, parent=None):
+        super().__init__(parent)
+        self._result: ResultSet = ResultSet([])
+        self._has_more = False
+        self._fetching = False
+        if results is not None:
+            self.set_results(results)
+
+    def set_results(self, results: ResultSet) -> None:
+        """设置结果数据"""
+        self.beginResetModel()
+        self._result = results if results is not None else ResultSet([])
+        self._fetching = False
+        self.endResetModel()
+
+    def append_results(self, results: ResultSet) -> None:
+        """追加分页加载的数据"""
+        self._fetching = False
+        if not len(results):
+            return
+        first = len(self._result)
+        self.beginInsertRows(QModelIndex(), first, first + len(results) - 1)
+        self._result.extend(results)
+        self.endInsertRows()
+
+    def set_has_more(self, has_more: bool) -> None:
+        """标记是否还有未加载的数据"""
+        self._has_more = has_more
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if self.canFetchMore(parent):
+            self._fetching = True
+            self.fetch_requested.emit(PAGE_SIZE)
+
+    @property
+    def columns(self) -> List[str]:
+        """列名列表"""
+        return self._result.columns
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._result)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._result.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.format_value(self._result.value(index.row(), index.column()))
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.DisplayRole) -> Any:
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._result.columns[section]
+        return str(section + 1)
+
+    @staticmethod
+    def format_value(value: Any) -> str:
+        """将单元格的值转换为显示文本，bytes 已在查询时按连接字符集解码"""
+        if value is None:
+            return ''
+        return str(value)
+
+
+class ResultTableView(QTableView):
+    """查询结果表格
+
+    基于模型/视图实现，只绘制可见区域内的单元格；
+    行高固定，列宽根据表头和前若干行数据采样计算。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setModel(ResultTableModel(parent=self))
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectItems)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        # 固定行高，避免按内容逐行计算高度
+        vertical_header = self.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(
+            self.fontMetrics().height() + 8)
+
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+
+    def set_results(self, results: ResultSet) -> None:
+        """显示查询结果"""
+        self.model().set_results(results)
+        self.resize_columns_from_sample()
+
+    def resize_columns_from_sample(self, sample_rows: int = SAMPLE_ROWS) -> None:
+        """根据表头和采样行计算列宽"""
+        model = self.model()
+        metrics = self.fontMetrics()
+        header_metrics = self.horizontalHeader().fontMetrics()
+        rows = min(model.rowCount(), sample_rows)
+
+        for column in range(model.columnCount()):
+            width = header_metrics.horizontalAdvance(
+                str(model.headerData(column, Qt.Horizontal)))
+            for row in range(rows):
+                text = model.data(model.index(row, column))
+                width = max(width, metrics.horizontalAdvance(text))
+                if width >= MAX_COLUMN_WIDTH:
+                    break
+            self.setColumnWidth(
+                column, min(width + COLUMN_PADDING, MAX_COLUMN_WIDTH))
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from PySide6.QtWidgets import (
     QDialog, QTabWidget, QWidget, QVBoxLayout, QFormLayout,
     QLineEdit, QComboBox, QSpinBox, QCheckBox, QPushButton,
@@ -9,7 +11,6 @@ from PySide6.QtCore import Qt
 from sqlexec.config.settings import Settings, DatabaseConnection, GroupInfo
 from sqlexec.config.db_types import get_db_types, get_db_type
 from sqlexec.config.enums import Theme, Language, CloseAction
-from .add_connection_dialog import AddConnectionDialog
 
 
 class SettingsDialog(QDialog):
@@ -99,6 +100,83 @@ class SettingsDialog(QDialog):
 
         layout.addRow("关闭窗口时:", self.close_action_combo)
 
+        # 查询历史
+        self.history_check = QCheckBox()
+        self.history_check.setChecked(self.settings.general.history_enabled)
+        layout.addRow("保存查询历史:", self.history_check)
+
+        self.history_entries_spin = QSpinBox()
+        self.history_entries_spin.setRange(0, 10000000)
+        self.history_entries_spin.setSpecialValueText("不限制")
+        self.history_entries_spin.setValue(self.settings.general.history_max_entries)
+        layout.addRow("历史最多保留条数:", self.history_entries_spin)
+
+        self.history_days_spin = QSpinBox()
+        self.history_days_spin.setRange(0, 36500)
+        self.history_days_spin.setSuffix(" 天")
+        self.history_days_spin.setSpecialValueText("不限制")
+        self.history_days_spin.setValue(self.settings.general.history_retention_days)
+        layout.addRow("历史保留时间:", self.history_days_spin)
+
+        # 查询并发数
+        self.max_workers_spin = QSpinBox()
+        self.max_workers_spin.setRange(1, 256)
+        self.max_workers_spin.setValue(self.settings.execution.max_workers)
+        layout.addRow("查询最大并发数:", self.max_workers_spin)
+
+        self.max_per_host_spin = QSpinBox()
+        self.max_per_host_spin.setRange(0, 256)
+        self.max_per_host_spin.setSpecialValueText("不限制")
+        self.max_per_host_spin.setToolTip("同一数据库服务器（主机:端口）上同时执行的连接数")
+        self.max_per_host_spin.setValue(self.settings.execution.max_per_host)
+        layout.addRow("每台服务器并发数:", self.max_per_host_spin)
+
+        # 结果缓存
+        self.cache_check = QCheckBox()
+        self.cache_check.setChecked(self.settings.execution.cache_enabled)
+        layout.addRow("缓存只读查询结果:", self.cache_check)
+
+        self.cache_ttl_spin = QSpinBox()
+        self.cache_ttl_spin.setRange(1, 86400)
+        self.cache_ttl_spin.setSuffix(" 秒")
+        self.cache_ttl_spin.setValue(self.settings.execution.cache_ttl)
+        layout.addRow("缓存有效期:", self.cache_ttl_spin)
+
+        self.cache_size_spin = QSpinBox()
+        self.cache_size_spin.setRange(1, 65536)
+        self.cache_size_spin.setSuffix(" MB")
+        self.cache_size_spin.setValue(self.settings.execution.cache_max_mb)
+        layout.addRow("缓存内存上限:", self.cache_size_spin)
+
+        self.memory_budget_spin = QSpinBox()
+        self.memory_budget_spin.setRange(0, 1048576)
+        self.memory_budget_spin.setSuffix(" MB")
+        self.memory_budget_spin.setSpecialValueText("不限制")
+        self.memory_budget_spin.setToolTip("查询结果超出预算后写入本地临时文件")
+        self.memory_budget_spin.setValue(self.settings.execution.memory_budget_mb)
+        layout.addRow("结果内存预算:", self.memory_budget_spin)
+
+        self.share_pools_check = QCheckBox("同一服务器上的数据库共享连接池")
+        self.share_pools_check.setToolTip(
+            "SQL Server/MySQL 上只有数据库名不同的连接共用一个连接池，\n"
+            "每次获取连接时切换数据库，减少空闲连接和建立连接的次数")
+        self.share_pools_check.setChecked(self.settings.execution.share_server_pools)
+        layout.addRow("", self.share_pools_check)
+
+        # 执行统计的指标文件，目录只在配置文件中设置
+        self.metrics_format_combo = QComboBox()
+        self.metrics_format_combo.addItem("不写入", "none")
+        self.metrics_format_combo.addItem("Prometheus 文本", "prometheus")
+        self.metrics_format_combo.addItem("JSON", "json")
+        self.metrics_format_combo.addItem("Prometheus 和 JSON", "both")
+        self.metrics_format_combo.setToolTip(
+            "每次查询后把各连接的分阶段耗时、行数和数据量写入指标文件，\n"
+            "目录由配置文件中的 metrics_directory 指定，默认为 ~/.sqlexec/metrics")
+        index = self.metrics_format_combo.findData(self.settings.execution.metrics_format)
+        if index >= 0:
+            self.metrics_format_combo.setCurrentIndex(index)
+        layout.addRow("执行统计文件:", self.metrics_format_combo)
+
         return widget
 
     def _create_database_tab(self):
@@ -108,16 +186,18 @@ class SettingsDialog(QDialog):
 
         # 数据库连接表格
         self.db_table = QTableWidget()
-        self.db_table.setColumnCount(4)
+        self.db_table.setColumnCount(5)
         self.db_table.setHorizontalHeaderLabels([
-            "名称", "别名", "类型", "连接字符串"
+            "名称", "别名", "类型", "连接字符串", "语句超时(秒)"
         ])
+        self.db_table.horizontalHeaderItem(4).setToolTip("0 表示使用所属组的设置")
         
         # 设置表格列宽自动调整
-        self.db_table.horizontalHeader().setStretchLastSection(True)  # 最后一列自动填充
         self.db_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.db_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.db_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.db_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)  # 连接字符串列自动填充
+        self.db_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
 
         # 加载现有连接
         connections = list(self.settings.connections.values())
@@ -128,6 +208,7 @@ class SettingsDialog(QDialog):
             self.db_table.setItem(i, 2, QTableWidgetItem(conn.type))
             self.db_table.setItem(
                 i, 3, QTableWidgetItem(conn.connection_string))
+            self.db_table.setItem(i, 4, QTableWidgetItem(f"{conn.statement_timeout:g}"))
 
         layout.addWidget(self.db_table)
 
@@ -162,19 +243,25 @@ class SettingsDialog(QDialog):
 
         # 组表格
         self.group_table = QTableWidget()
-        self.group_table.setColumnCount(2)
-        self.group_table.setHorizontalHeaderLabels(["名称", "描述"])
+        self.group_table.setColumnCount(5)
+        self.group_table.setHorizontalHeaderLabels(["名称", "描述", "并发上限", "启动预热", "语句超时(秒)"])
         self.group_table.currentItemChanged.connect(self._on_group_selected)
         
         # 设置表格列宽自动调整
-        self.group_table.horizontalHeader().setStretchLastSection(True)  # 描述列自动填充
         self.group_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.group_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # 描述列自动填充
+        self.group_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.group_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.group_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
 
         # 加载现有组
         self.group_table.setRowCount(len(self.settings.groups))
         for i, (name, info) in enumerate(self.settings.groups.items()):
             self.group_table.setItem(i, 0, QTableWidgetItem(name))
             self.group_table.setItem(i, 1, QTableWidgetItem(info.description))
+            self.group_table.setItem(i, 2, QTableWidgetItem(str(info.max_workers)))
+            self.group_table.setItem(i, 3, self._create_check_item(info.warm_up))
+            self.group_table.setItem(i, 4, QTableWidgetItem(f"{info.statement_timeout:g}"))
 
         left_layout.addWidget(self.group_table)
 
@@ -212,6 +299,22 @@ class SettingsDialog(QDialog):
 
         return widget
 
+    @staticmethod
+    def _parse_timeout(item: Optional[QTableWidgetItem]) -> float:
+        """读取语句超时（秒），无效输入视为不限制"""
+        try:
+            return max(0.0, float(item.text())) if item else 0.0
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _create_check_item(checked: bool) -> QTableWidgetItem:
+        """创建勾选框单元格"""
+        item = QTableWidgetItem()
+        item.setFlags((item.flags() | Qt.ItemIsUserCheckable) & ~Qt.ItemIsEditable)
+        item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+        return item
+
     def _on_group_selected(self, current, previous):
         """当选择组时更新连接列表"""
         self.connections_list.clear()
@@ -252,6 +355,7 @@ class SettingsDialog(QDialog):
 
     def _add_connection(self):
         """添加数据库连接"""
+        from .add_connection_dialog import AddConnectionDialog
         dialog = AddConnectionDialog(self)
         if dialog.exec_():
             conn_info = dialog.get_connection_info()
@@ -264,9 +368,11 @@ class SettingsDialog(QDialog):
             # 添加连接
             self.settings.connections[conn_info["alias"]] = conn_info
             self.db_table.insertRow(self.db_table.rowCount())
-            for i, (key, value) in enumerate(conn_info.items()):
+            columns = ("name", "alias", "type", "connection_string")
+            for i, key in enumerate(columns):
                 self.db_table.setItem(
-                    self.db_table.rowCount() - 1, i, QTableWidgetItem(str(value)))
+                    self.db_table.rowCount() - 1, i, QTableWidgetItem(str(conn_info[key])))
+            self.db_table.setItem(self.db_table.rowCount() - 1, 4, QTableWidgetItem("0"))
             self.db_table.resizeColumnsToContents()
 
     def _remove_connection(self):
@@ -326,6 +432,9 @@ class SettingsDialog(QDialog):
         # 更新表格
         self.group_table.setItem(row, 0, QTableWidgetItem(name))
         self.group_table.setItem(row, 1, QTableWidgetItem(description))
+        self.group_table.setItem(row, 2, QTableWidgetItem("0"))
+        self.group_table.setItem(row, 3, self._create_check_item(False))
+        self.group_table.setItem(row, 4, QTableWidgetItem("0"))
         
         # 立即更新settings对象
         self.settings.groups[name] = GroupInfo(
@@ -352,16 +461,33 @@ class SettingsDialog(QDialog):
 
         # 更新关闭动作
         self.settings.general.close_action = self.close_action_combo.currentData()
+        self.settings.general.history_enabled = self.history_check.isChecked()
+        self.settings.general.history_max_entries = self.history_entries_spin.value()
+        self.settings.general.history_retention_days = self.history_days_spin.value()
+
+        # 更新执行设置
+        self.settings.execution.max_workers = self.max_workers_spin.value()
+        self.settings.execution.max_per_host = self.max_per_host_spin.value()
+        self.settings.execution.cache_enabled = self.cache_check.isChecked()
+        self.settings.execution.cache_ttl = self.cache_ttl_spin.value()
+        self.settings.execution.cache_max_mb = self.cache_size_spin.value()
+        self.settings.execution.memory_budget_mb = self.memory_budget_spin.value()
+        self.settings.execution.share_server_pools = self.share_pools_check.isChecked()
+        self.settings.execution.metrics_format = self.metrics_format_combo.currentData()
 
         # 更新数据库连接
         new_connections = {}
         for row in range(self.db_table.rowCount()):
             alias = self.db_table.item(row, 1).text()
+            # 连接池设置只在配置文件中编辑，保留原有设置
+            old = self.settings.connections.get(alias)
             conn = DatabaseConnection(
                 name=self.db_table.item(row, 0).text(),
                 alias=alias,
                 type=self.db_table.item(row, 2).text(),
-                connection_string=self.db_table.item(row, 3).text()
+                connection_string=self.db_table.item(row, 3).text(),
+                statement_timeout=self._parse_timeout(self.db_table.item(row, 4)),
+                pool=old.pool if isinstance(old, DatabaseConnection) else None
             )
             new_connections[alias] = conn
         self.settings.connections = new_connections
@@ -372,11 +498,22 @@ class SettingsDialog(QDialog):
             name = self.group_table.item(row, 0).text()
             if name:  # 只添加有名称的组
                 description = self.group_table.item(row, 1).text()
-                # 保持原有的连接列表，如果是新组则创建空集合
-                connections = self.settings.groups.get(
-                    name, GroupInfo(name, "")).connections
+                # 保持原有的连接列表和连接池设置，如果是新组则创建空集合
+                old = self.settings.groups.get(name, GroupInfo(name, ""))
+                connections = old.connections
+                # 并发上限，无效输入视为不限制
+                workers_item = self.group_table.item(row, 2)
+                try:
+                    max_workers = max(0, int(workers_item.text())) if workers_item else 0
+                except ValueError:
+                    max_workers = 0
+                warm_up_item = self.group_table.item(row, 3)
+                warm_up = bool(warm_up_item) and warm_up_item.checkState() == Qt.Checked
                 new_groups[name] = GroupInfo(
-                    name=name, description=description, connections=connections)
+                    name=name, description=description, connections=connections,
+                    max_workers=max_workers, warm_up=warm_up,
+                    statement_timeout=self._parse_timeout(self.group_table.item(row, 4)),
+                    pool=old.pool)
         self.settings.groups = new_groups
 
         super().accept()
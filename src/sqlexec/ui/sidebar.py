@@ -1,10 +1,28 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLineEdit, QTreeWidget,
-    QTreeWidgetItem, QPushButton, QMenu, QMessageBox
+    QTreeWidgetItem, QPushButton, QMenu, QMessageBox, QHeaderView
 )
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QAction
-from typing import Dict, Optional, List
+from PySide6.QtCore import Qt, Signal, QThread
+from PySide6.QtGui import QAction, QColor
+from typing import Callable, Dict, Optional, List
+
+from sqlexec.core.health import HealthChecker, HealthResult
+
+
+class HealthCheckWorker(QThread):
+    """后台健康检查"""
+    checked = Signal(object)  # 单个连接的检查结果 HealthResult
+    completed = Signal(list)  # 全部检查结果
+
+    def __init__(self, checker: HealthChecker, aliases: List[str]):
+        super().__init__()
+        self.checker = checker
+        self.aliases = aliases
+
+    def run(self) -> None:
+        """执行检查"""
+        results = self.checker.check(self.aliases, self.checked.emit)
+        self.completed.emit(results)
 
 
 class Sidebar(QWidget):
@@ -17,6 +35,8 @@ class Sidebar(QWidget):
         self.search_box: QLineEdit = QLineEdit()
         self.compact_button: QPushButton = QPushButton("切换紧凑模式")
         self._compact_mode: bool = False
+        self._health: Dict[str, HealthResult] = {}  # 最近一次的健康检查结果
+        self._health_workers: List[HealthCheckWorker] = []
         self._init_ui()
 
     def _init_ui(self):
@@ -32,7 +52,11 @@ class Sidebar(QWidget):
 
         # 连接树
         self.tree = QTreeWidget()
+        self.tree.setColumnCount(2)  # 连接名称，健康状态
         self.tree.setHeaderHidden(True)
+        self.tree.header().setStretchLastSection(False)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self._show_context_menu)
         self.tree.itemDoubleClicked.connect(self._on_item_double_clicked)
@@ -87,6 +111,8 @@ class Sidebar(QWidget):
                 conn_item.setData(0, Qt.UserRole, alias)
                 conn_item.setFlags(conn_item.flags() | Qt.ItemIsUserCheckable)
                 conn_item.setCheckState(0, Qt.Unchecked)
+                if alias in self._health:
+                    self._apply_health(conn_item, self._health[alias])
 
         # 删除空的未分组
         ungrouped = group_items["未分组"]
@@ -124,6 +150,20 @@ class Sidebar(QWidget):
 
         menu = QMenu()
 
+        check_all_action = QAction("检查全部连接", self)
+        check_all_action.triggered.connect(
+            lambda: self._check_connections(self._all_aliases()))
+        menu.addAction(check_all_action)
+
+        # 如果是组
+        if not item.parent():
+            aliases = [item.child(i).data(0, Qt.UserRole)
+                       for i in range(item.childCount())]
+            check_group_action = QAction("检查组", self)
+            check_group_action.triggered.connect(
+                lambda: self._check_connections(aliases))
+            menu.addAction(check_group_action)
+
         # 如果是连接项
         if item.parent():
             alias = item.data(0, Qt.UserRole)
@@ -139,12 +179,87 @@ class Sidebar(QWidget):
         menu.exec_(self.tree.viewport().mapToGlobal(position))
 
     def _test_connection(self, alias: str):
-        """测试数据库连接"""
-        success, error = self.main_window.db_manager.test_connection(alias)
-        if success:
-            QMessageBox.information(self, "连接测试", "连接成功！")
+        """测试数据库连接，在后台执行，完成后提示结果"""
+        self._check_connections([alias], self._report_test_result)
+
+    def _report_test_result(self, results: List[HealthResult]):
+        """提示单个连接的测试结果"""
+        result = results[0]
+        if result.ok:
+            QMessageBox.information(
+                self, "连接测试", f"连接成功！\n{result.details()}")
         else:
-            QMessageBox.warning(self, "连接测试", f"连接失败：{error}")
+            QMessageBox.warning(self, "连接测试", result.details())
+
+    def _check_connections(self, aliases: List[str],
+                           on_completed: Optional[Callable[[List[HealthResult]], None]] = None
+                           ) -> HealthCheckWorker:
+        """
+        在后台并发检查连接，结果实时显示在连接树中
+
+        Args:
+            aliases: 连接别名列表
+            on_completed: 全部检查完成时的回调
+
+        Returns:
+            HealthCheckWorker: 执行检查的后台线程
+        """
+        aliases = list(dict.fromkeys(aliases))  # 去重并保持顺序
+        for alias in aliases:
+            for item in self._find_connection_items(alias):
+                item.setText(1, "检查中...")
+                item.setForeground(1, QColor("#808080"))
+
+        execution = self.main_window.settings.execution
+        checker = HealthChecker(
+            self.main_window.db_manager,
+            timeout=execution.health_check_timeout,
+            samples=execution.health_check_samples,
+            max_workers=max(execution.max_workers, 1)
+        )
+        worker = HealthCheckWorker(checker, aliases)
+        worker.checked.connect(self._on_health_checked)
+        if on_completed:
+            worker.completed.connect(on_completed)
+        worker.finished.connect(lambda: self._health_workers.remove(worker))
+        self._health_workers.append(worker)
+        worker.start()
+        return worker
+
+    def _on_health_checked(self, result: HealthResult):
+        """显示单个连接的检查结果"""
+        self._health[result.alias] = result
+        for item in self._find_connection_items(result.alias):
+            self._apply_health(item, result)
+
+    def _apply_health(self, item: QTreeWidgetItem, result: HealthResult):
+        """将检查结果应用到连接项"""
+        item.setText(1, result.summary())
+        item.setForeground(1, QColor("#2e7d32" if result.ok else "#c62828"))
+        item.setToolTip(0, result.details())
+        item.setToolTip(1, result.details())
+
+    def _find_connection_items(self, alias: str) -> List[QTreeWidgetItem]:
+        """查找连接对应的所有树节点（一个连接可能属于多个组）"""
+        items = []
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                conn_item = group_item.child(j)
+                if conn_item.data(0, Qt.UserRole) == alias:
+                    items.append(conn_item)
+        return items
+
+    def _all_aliases(self) -> List[str]:
+        """获取连接树中的所有连接"""
+        aliases = []
+        root = self.tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                aliases.append(group_item.child(j).data(0, Qt.UserRole))
+        return aliases
 
     def _remove_connection(self, alias: str):
         """删除数据库连接"""
@@ -1,5 +1,5 @@
 """SQL Exec 工具函数"""
 
-from .logger import setup_logger
+from .logger import setup_logger, TRACE
 
-__all__ = ['setup_logger']
+__all__ = ['setup_logger', 'TRACE']
@@ -0,0 +1,470 @@
+"""性能基准测试
+
+在临时目录中生成合成的 SQLite 数据库，测量执行和显示的热点路径：
+
+- ``convert.*``：:meth:`DatabaseManager.execute_query` 读取并转换长表、宽表、
+  二进制列和 NULL 较多的表
+- ``fanout.*``：:class:`QueryExecutor` 在几十到几百个数据库文件上并发执行
+- ``display.*``：:meth:`QueryEditor._display_results` 显示大结果并绘制表格（offscreen 平台）
+- ``highlight.*``：:class:`SQLSyntaxHighlighter` 高亮大型脚本
+- ``import.*``：入口模块的导入耗时，参见 :mod:`sqlexec.utils.import_budget`
+
+每项取多次运行中最快的一次。结果可以保存为 JSON 基线，之后的提交与基线比较，
+变慢超过阈值的项视为性能回退。
+
+用法::
+
+    python -m sqlexec.utils.benchmark                              # 运行并输出结果
+    python -m sqlexec.utils.benchmark --quick                      # 使用较小的数据集
+    python -m sqlexec.utils.benchmark --save baseline.json         # 保存为基线
+    python -m sqlexec.utils.benchmark --compare baseline.json      # 变慢超过阈值时退出码为 1
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.2  # 比基线慢 20% 以上视为回退
+MIN_DELTA_SECONDS = 0.005  # 绝对差值小于该值时忽略，避免极短的测量因抖动误报
+
+
+@dataclass
+class Scale:
+    """数据集规模"""
+    long_rows: int = 200_000  # 长表：5 列
+    wide_rows: int = 20_000  # 宽表：80 列
+    blob_rows: int = 50_000  # 二进制列
+    sparse_rows: int = 100_000  # 20 列，约 90% 为 NULL
+    fleet_size: int = 200  # 扇出测试的数据库文件数
+    fleet_rows: int = 500  # 每个文件的行数
+    display_rows: int = 20_000  # 显示测试的结果行数（取自宽表）
+    script_lines: int = 5_000  # 高亮测试的脚本行数
+
+
+QUICK_SCALE = Scale(long_rows=20_000, wide_rows=2_000, blob_rows=5_000, sparse_rows=10_000,
+                    fleet_size=32, fleet_rows=200, display_rows=2_000, script_lines=1_000)
+
+
+@dataclass
+class BenchmarkResult:
+    """单项测量结果，时间单位为秒"""
+    name: str
+    best: float
+    runs: List[float] = field(default_factory=list)
+    info: Dict[str, Any] = field(default_factory=dict)  # 行数、文件数等说明
+
+    @property
+    def median(self) -> float:
+        ordered = sorted(self.runs)
+        return ordered[len(ordered) // 2] if ordered else self.best
+
+
+def measure(name: str, func: Callable[[], Any], repeat: int, **info: Any) -> BenchmarkResult:
+    """
+    多次运行并记录每次的耗时
+
+    第一次运行前先执行一次预热（创建引擎、填充缓存等），不计入结果。
+
+    Args:
+        name: 测量项名称
+        func: 被测量的函数
+        repeat: 运行次数
+        info: 附加说明
+
+    Returns:
+        BenchmarkResult: 测量结果
+    """
+    func()
+    runs = []
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return BenchmarkResult(name, min(runs), runs, info)
+
+
+# ---------------------------------------------------------------- 合成数据
+
+def _random_text(rng: random.Random, low: int, high: int) -> str:
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 数据库查询结果"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def build_data(path: Path, scale: Scale, seed: int = 0) -> None:
+    """
+    生成转换和显示测试使用的数据库
+
+    Args:
+        path: 数据库文件路径
+        scale: 数据集规模
+        seed: 随机数种子，相同的种子生成相同的数据
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE long_table (id INTEGER, amount REAL, name TEXT, created TEXT, flag INTEGER)")
+        conn.executemany("INSERT INTO long_table VALUES (?, ?, ?, ?, ?)", (
+            (i, rng.uniform(-1e6, 1e6), _random_text(rng, 4, 24),
+             f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00", i % 2)
+            for i in range(scale.long_rows)))
+
+        # 宽表：整数、浮点、文本、二进制和可空列交替
+        wide_columns = [f"c{i}" for i in range(80)]
+        conn.execute(f"CREATE TABLE wide_table ({', '.join(wide_columns)})")
+
+        def wide_value(column: int) -> Any:
+            kind = column % 5
+            if kind == 0:
+                return rng.randint(-10 ** 9, 10 ** 9)
+            if kind == 1:
+                return rng.random() * 1000
+            if kind == 2:
+                return _random_text(rng, 0, 40)
+            if kind == 3:
+                return rng.randbytes(16)
+            return None if rng.random() < 0.5 else _random_text(rng, 1, 10)
+
+        conn.executemany(
+            f"INSERT INTO wide_table VALUES ({', '.join('?' * len(wide_columns))})",
+            (tuple(wide_value(c) for c in range(len(wide_columns))) for _ in range(scale.wide_rows)))
+
+        conn.execute("CREATE TABLE blob_table (id INTEGER, payload BLOB)")
+        conn.executemany("INSERT INTO blob_table VALUES (?, ?)", (
+            (i, rng.randbytes(rng.randint(64, 512))) for i in range(scale.blob_rows)))
+
+        sparse_columns = [f"s{i}" for i in range(20)]
+        conn.execute(f"CREATE TABLE sparse_table ({', '.join(sparse_columns)})")
+        conn.executemany(
+            f"INSERT INTO sparse_table VALUES ({', '.join('?' * len(sparse_columns))})",
+            (tuple(rng.randint(0, 100) if rng.random() < 0.1 else None for _ in sparse_columns)
+             for _ in range(scale.sparse_rows)))
+    conn.close()
+
+
+def build_fleet(directory: Path, scale: Scale, seed: int = 0) -> List[Path]:
+    """
+    生成扇出测试使用的多个小数据库
+
+    Args:
+        directory: 数据库文件目录
+        scale: 数据集规模
+        seed: 随机数种子
+
+    Returns:
+        List[Path]: 数据库文件
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(scale.fleet_size):
+        path = directory / f"shard{index:04d}.sqlite"
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute("CREATE TABLE items (id INTEGER, shard INTEGER, name TEXT, price REAL, "
+                         "note TEXT, data BLOB)")
+            conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)", (
+                (i, index, _random_text(rng, 4, 16), rng.uniform(0, 100),
+                 None if i % 3 else _random_text(rng, 10, 60), rng.randbytes(8))
+                for i in range(scale.fleet_rows)))
+        conn.close()
+        paths.append(path)
+    return paths
+
+
+def build_script(lines: int, seed: int = 0) -> str:
+    """生成包含关键字、函数、字符串、数字和单行/多行注释的SQL脚本"""
+    rng = random.Random(seed)
+    parts = []
+    while len(parts) < lines:
+        parts.extend([
+            f"-- 第 {len(parts)} 行的注释",
+            f"SELECT id, COUNT(*), SUM(amount), UPPER(name) AS n FROM long_table",
+            f"WHERE amount > {rng.randint(0, 1000)} AND name LIKE '%{_random_text(rng, 2, 6)}%'",
+            "/* 多行注释开始",
+            "   仍在注释中 SELECT FROM WHERE",
+            "   注释结束 */ GROUP BY id HAVING COUNT(*) > 1 ORDER BY id DESC LIMIT 100;",
+            f"UPDATE wide_table SET c2 = \"{_random_text(rng, 3, 12)}\" WHERE c0 = {rng.randint(0, 10 ** 6)};",
+        ])
+    return "\n".join(parts[:lines])
+
+
+# ---------------------------------------------------------------- 测量项
+
+def _sqlite_manager(paths: Dict[str, Path]):
+    from sqlexec.core.db_manager import DatabaseManager
+    manager = DatabaseManager()
+    for alias, path in paths.items():
+        manager.add_connection(alias, {"type": "sqlite", "connection_string": f"sqlite:///{path}"})
+    return manager
+
+
+def _execute(manager, alias: str, query: str) -> int:
+    success, result, error = manager.execute_query(alias, query)
+    if not success:
+        raise RuntimeError(f"{alias} 执行失败: {error}")
+    return len(result)
+
+
+def bench_convert(workdir: Path, scale: Scale, repeat: int) -> List[BenchmarkResult]:
+    """读取并转换各类表的全部行"""
+    manager = _sqlite_manager({"data": workdir / "data.sqlite"})
+    results = []
+    for name, table, rows in (("long", "long_table", scale.long_rows),
+                              ("wide", "wide_table", scale.wide_rows),
+                              ("blob", "blob_table", scale.blob_rows),
+                              ("sparse", "sparse_table", scale.sparse_rows)):
+        query = f"SELECT * FROM {table}"
+        results.append(measure(f"convert.{name}", lambda q=query: _execute(manager, "data", q),
+                               repeat, rows=rows))
+    manager.clear_all_connections()
+    return results
+
+
+def bench_fanout(workdir: Path, scale: Scale, repeat: int) -> List[BenchmarkResult]:
+    """在所有数据库文件上并发执行同一查询"""
+    from sqlexec.ui.query_editor import QueryExecutor
+    paths = sorted((workdir / "fleet").glob("*.sqlite"))
+    manager = _sqlite_manager({path.stem: path for path in paths})
+    aliases = [path.stem for path in paths]
+    results = []
+    for name, query, workers in (("select", "SELECT * FROM items", 8),
+                                 ("aggregate", "SELECT shard, COUNT(*), AVG(price) FROM items GROUP BY shard", 8),
+                                 ("serial", "SELECT * FROM items", 1)):
+        def run(q=query, w=workers) -> None:
+            # 直接在当前线程调用 run()，不需要事件循环
+            executor = QueryExecutor(manager, aliases, q, max_workers=w)
+            failures = []
+            executor.error.connect(lambda index, alias, error: failures.append(error))
+            executor.run()
+            if failures:
+                raise RuntimeError(f"扇出执行失败: {failures[0]}")
+        results.append(measure(f"fanout.{name}", run, repeat,
+                               connections=len(aliases), workers=workers))
+    manager.clear_all_connections()
+    return results
+
+
+def bench_display(workdir: Path, scale: Scale, repeat: int) -> List[BenchmarkResult]:
+    """在结果表格中显示宽表结果并绘制可见区域"""
+    from sqlexec.ui.query_editor import QueryEditor
+    from sqlexec.ui.result_view import ResultTableView
+    manager = _sqlite_manager({"data": workdir / "data.sqlite"})
+    success, result, error = manager.execute_query(
+        "data", f"SELECT * FROM wide_table LIMIT {scale.display_rows}")
+    if not success:
+        raise RuntimeError(error)
+    editor = QueryEditor()
+    table = ResultTableView()
+    table.resize(1600, 900)
+
+    def display() -> None:
+        editor._display_results(table, result)
+
+    def paint() -> None:
+        editor._display_results(table, result)
+        table.viewport().grab()
+
+    results = [
+        measure("display.set_results", display, repeat, rows=len(result), columns=len(result.columns)),
+        measure("display.paint", paint, repeat, rows=len(result), columns=len(result.columns)),
+    ]
+    table.deleteLater()
+    editor.deleteLater()
+    manager.clear_all_connections()
+    return results
+
+
+def bench_highlight(workdir: Path, scale: Scale, repeat: int) -> List[BenchmarkResult]:
+    """高亮大型脚本"""
+    from PySide6.QtGui import QTextDocument
+    from sqlexec.ui.query_editor import SQLSyntaxHighlighter
+    document = QTextDocument()
+    document.setPlainText(build_script(scale.script_lines))
+    highlighter = SQLSyntaxHighlighter(document)
+    return [measure("highlight.script", highlighter.rehighlight, repeat, lines=scale.script_lines)]
+
+
+def bench_import(workdir: Path, scale: Scale, repeat: int) -> List[BenchmarkResult]:
+    """入口模块的导入耗时，每个模块在独立的子进程中测量"""
+    from sqlexec.utils.import_budget import BUDGETS, measure as measure_import
+    results = []
+    for module in BUDGETS:
+        runs = [measure_import(module, 1).total_ms / 1000 for _ in range(max(1, repeat))]
+        results.append(BenchmarkResult(f"import.{module}", min(runs), runs))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[Path, Scale, int], List[BenchmarkResult]]] = {
+    "convert": bench_convert,
+    "fanout": bench_fanout,
+    "display": bench_display,
+    "highlight": bench_highlight,
+    "import": bench_import,
+}
+QT_BENCHMARKS = ("fanout", "display", "highlight")  # 需要 QApplication 的测量项
+_app = None  # QApplication 需要在进程退出前一直存在
+
+
+def prepare(workdir: Path, scale: Scale, suites: Sequence[str]) -> None:
+    """生成所选测量项需要的数据库，已存在时直接使用"""
+    if {"convert", "display"} & set(suites) and not (workdir / "data.sqlite").exists():
+        build_data(workdir / "data.sqlite", scale)
+    if "fanout" in suites and not (workdir / "fleet").exists():
+        build_fleet(workdir / "fleet", scale)
+
+
+def run_benchmarks(suites: Sequence[str], scale: Scale, repeat: int,
+                   workdir: Optional[Path] = None) -> List[BenchmarkResult]:
+    """
+    运行测量项
+
+    Args:
+        suites: 测量项名称，参见 :data:`BENCHMARKS`
+        scale: 数据集规模
+        repeat: 每项运行次数
+        workdir: 数据库目录，为None时使用临时目录并在结束后删除
+
+    Returns:
+        List[BenchmarkResult]: 测量结果
+    """
+    if any(suite in QT_BENCHMARKS for suite in suites):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        global _app
+        _app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory(prefix="sqlexec_bench_") as temp:
+        directory = workdir or Path(temp)
+        directory.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        prepare(directory, scale, suites)
+        print(f"数据准备完成，耗时 {time.perf_counter() - started:.1f} 秒: {directory}", file=sys.stderr)
+        results = []
+        for suite in suites:
+            for result in BENCHMARKS[suite](directory, scale, repeat):
+                print(f"{result.name:<32} {result.best * 1000:10.1f} ms", file=sys.stderr)
+                results.append(result)
+    return results
+
+
+# ---------------------------------------------------------------- 基线
+
+def _git_commit() -> str:
+    """当前提交，不在 git 仓库中时为空字符串"""
+    try:
+        process = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                 capture_output=True, text=True, cwd=Path(__file__).parent)
+    except OSError:
+        return ""
+    return process.stdout.strip() if process.returncode == 0 else ""
+
+
+def to_baseline(results: Sequence[BenchmarkResult], scale: Scale, repeat: int) -> Dict[str, Any]:
+    """把测量结果转换为可以保存的基线"""
+    return {
+        "version": BASELINE_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": asdict(scale),
+        "repeat": repeat,
+        "results": {result.name: {"best": result.best, "median": result.median,
+                                  "runs": result.runs, **result.info}
+                    for result in results},
+    }
+
+
+def compare(results: Sequence[BenchmarkResult], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    与基线比较并输出对比表
+
+    Args:
+        results: 本次测量结果
+        baseline: :func:`to_baseline` 生成的基线
+        threshold: 允许变慢的比例
+
+    Returns:
+        List[str]: 回退的测量项说明，为空表示没有回退
+    """
+    previous = baseline.get("results", {})
+    regressions = []
+    print(f"{'测量项':<30} {'基线(ms)':>10} {'本次(ms)':>10} {'变化':>8}")
+    for result in results:
+        old = previous.get(result.name)
+        if old is None:
+            print(f"{result.name:<32} {'-':>10} {result.best * 1000:10.1f} {'新增':>8}")
+            continue
+        change = result.best / old["best"] - 1 if old["best"] else 0.0
+        mark = ""
+        if change > threshold and result.best - old["best"] > MIN_DELTA_SECONDS:
+            mark = "  回退"
+            regressions.append(f"{result.name} 比基线慢 {change:.0%}"
+                               f"（{old['best'] * 1000:.1f} ms -> {result.best * 1000:.1f} ms）")
+        print(f"{result.name:<32} {old['best'] * 1000:10.1f} {result.best * 1000:10.1f} {change:+8.0%}{mark}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        prog="python -m sqlexec.utils.benchmark",
+        description="使用合成的 SQLite 数据库测量执行和显示的热点路径"
+    )
+    parser.add_argument("suites", nargs="*", metavar="SUITE",
+                        help=f"要运行的测量项，默认全部（{', '.join(BENCHMARKS)}）")
+    parser.add_argument("--quick", action="store_true", help="使用较小的数据集")
+    parser.add_argument("--repeat", type=int, default=5, help="每项运行次数，取最快的一次（默认 5）")
+    parser.add_argument("--workdir", help="数据库目录，指定时保留生成的数据库供下次使用")
+    parser.add_argument("--save", metavar="FILE", help="把结果保存为 JSON 基线")
+    parser.add_argument("--compare", metavar="FILE", help="与 JSON 基线比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"比基线慢多少比例视为回退（默认 {DEFAULT_THRESHOLD}）")
+    args = parser.parse_args(argv)
+    # 解码失败等警告对测量没有意义，只输出错误
+    logging.basicConfig(level=logging.ERROR)
+
+    unknown = [suite for suite in args.suites if suite not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测量项: {', '.join(unknown)}")
+    suites = args.suites or list(BENCHMARKS)
+    scale = QUICK_SCALE if args.quick else Scale()
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale"):
+            scale = Scale(**baseline["scale"])  # 使用与基线相同的规模
+
+    results = run_benchmarks(suites, scale, args.repeat,
+                             Path(args.workdir) if args.workdir else None)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(to_baseline(results, scale, args.repeat), f, ensure_ascii=False, indent=2)
+        print(f"已保存基线: {args.save}", file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"性能回退: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""导入耗时预算检查
+
+在独立的子进程中以 ``python -X importtime`` 导入各入口模块，统计导入耗时和
+加载的模块，检查是否超出预算以及是否提前加载了应当按需导入的模块。
+
+用法::
+
+    python -m sqlexec.utils.import_budget            # 输出报告
+    python -m sqlexec.utils.import_budget --check    # 超出预算时退出码为 1
+"""
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 数据库驱动和可选依赖，只应在使用时导入（MySQL 连接字符串默认使用 pymysql）
+DRIVER_MODULES = ("pymssql", "pymysql", "MySQLdb", "psycopg2", "pyarrow")
+
+
+@dataclass
+class ImportBudget:
+    """单个入口模块的导入预算"""
+    max_ms: float  # 最大导入耗时（毫秒）
+    forbidden: Tuple[str, ...] = ()  # 不允许在导入时加载的模块（含子模块）
+
+
+# 各入口模块的预算；耗时与机器相关，可以用环境变量 SQLEXEC_IMPORT_BUDGET_SCALE 放宽
+BUDGETS: Dict[str, ImportBudget] = {
+    "sqlexec.cli": ImportBudget(150, ("PySide6", "sqlalchemy") + DRIVER_MODULES),
+    "sqlexec.core": ImportBudget(30, ("PySide6", "sqlalchemy") + DRIVER_MODULES),
+    "sqlexec.ui.main_window": ImportBudget(600, (
+        "sqlalchemy",
+        "sqlexec.ui.settings_dialog",
+        "sqlexec.ui.add_connection_dialog",
+        "sqlexec.ui.export_dialog",
+        "sqlexec.ui.history_dialog",
+    ) + DRIVER_MODULES),
+}
+
+
+@dataclass
+class ImportReport:
+    """一次导入的测量结果"""
+    module: str
+    total_ms: float  # 导入入口模块的累计耗时（毫秒）
+    self_ms: Dict[str, float] = field(default_factory=dict)  # 每个模块自身的耗时（毫秒）
+
+    @property
+    def modules(self) -> List[str]:
+        """导入的所有模块"""
+        return list(self.self_ms)
+
+    def heaviest(self, count: int = 10) -> List[Tuple[str, float]]:
+        """自身耗时最多的模块"""
+        return sorted(self.self_ms.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def loaded(self, prefixes: Sequence[str]) -> List[str]:
+        """已加载的、属于给定模块或其子模块的模块"""
+        return [name for name in self.self_ms
+                if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes)]
+
+
+def parse_importtime(output: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    解析 ``-X importtime`` 的输出
+
+    Args:
+        output: 标准错误输出
+
+    Returns:
+        Tuple[Dict[str, float], Dict[str, float]]: (模块自身耗时, 模块累计耗时)，单位毫秒
+    """
+    self_ms: Dict[str, float] = {}
+    cumulative_ms: Dict[str, float] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        name = parts[2].strip()
+        self_ms[name] = int(parts[0]) / 1000
+        cumulative_ms[name] = int(parts[1]) / 1000
+    return self_ms, cumulative_ms
+
+
+def measure(module: str, runs: int = 3, python: Optional[str] = None) -> ImportReport:
+    """
+    在子进程中测量模块的导入耗时，取多次中最快的一次
+
+    Args:
+        module: 模块名
+        runs: 测量次数
+        python: Python解释器，默认为当前解释器
+
+    Returns:
+        ImportReport: 测量结果
+
+    Raises:
+        RuntimeError: 模块导入失败
+    """
+    # 子进程导入的是当前目录树中的 sqlexec，不要求已经安装
+    env = dict(os.environ)
+    source_root = str(Path(__file__).resolve().parents[2])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [source_root, env.get("PYTHONPATH")]))
+    best: Optional[ImportReport] = None
+    for _ in range(max(1, runs)):
+        process = subprocess.run(
+            [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"导入 {module} 失败:\n{process.stderr.strip()}")
+        self_ms, cumulative_ms = parse_importtime(process.stderr)
+        report = ImportReport(module, cumulative_ms.get(module, 0.0), self_ms)
+        if best is None or report.total_ms < best.total_ms:
+            best = report
+    return best
+
+
+def check(report: ImportReport, budget: ImportBudget, scale: float = 1.0) -> List[str]:
+    """
+    检查测量结果是否符合预算
+
+    Args:
+        report: 测量结果
+        budget: 预算
+        scale: 耗时预算的放宽倍数
+
+    Returns:
+        List[str]: 违反预算的说明，为空表示符合预算
+    """
+    problems = []
+    limit = budget.max_ms * scale
+    if report.total_ms > limit:
+        problems.append(f"{report.module} 导入耗时 {report.total_ms:.1f} ms，超出预算 {limit:.0f} ms")
+    loaded = report.loaded(budget.forbidden)
+    if loaded:
+        roots = sorted({name.split(".")[0] if not name.startswith("sqlexec.") else name
+                        for name in loaded})
+        problems.append(f"{report.module} 在导入时加载了应按需导入的模块: {', '.join(roots)}")
+    return problems
+
+
+def budget_scale() -> float:
+    """耗时预算的放宽倍数，由环境变量 SQLEXEC_IMPORT_BUDGET_SCALE 设置"""
+    return float(os.environ.get("SQLEXEC_IMPORT_BUDGET_SCALE", "1") or 1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        prog="python -m sqlexec.utils.import_budget",
+        description="测量入口模块的导入耗时并检查预算"
+    )
+    parser.add_argument("modules", nargs="*", help="要测量的模块，默认测量所有有预算的模块")
+    parser.add_argument("--check", action="store_true", help="超出预算时退出码为 1")
+    parser.add_argument("--runs", type=int, default=3, help="每个模块的测量次数（默认 3）")
+    parser.add_argument("--top", type=int, default=8, help="列出自身耗时最多的模块数（默认 8）")
+    args = parser.parse_args(argv)
+
+    scale = budget_scale()
+    problems: List[str] = []
+    for module in args.modules or list(BUDGETS):
+        try:
+            report = measure(module, args.runs)
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+            problems.append(str(e).splitlines()[0])
+            continue
+
+        budget = BUDGETS.get(module)
+        limit = f" / 预算 {budget.max_ms * scale:.0f} ms" if budget else ""
+        print(f"{module}: {report.total_ms:.1f} ms{limit}，加载 {len(report.modules)} 个模块")
+        for name, ms in report.heaviest(args.top):
+            print(f"    {ms:8.1f} ms  {name}")
+        if budget:
+            problems.extend(check(report, budget, scale))
+
+    for problem in problems:
+        print(f"超出预算: {problem}", file=sys.stderr)
+    return 1 if args.check and problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,21 @@ import os
 from pathlib import Path
 from typing import NoReturn
 
+# 行级跟踪日志级别，低于 DEBUG，默认关闭
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+
+def setup_logger(trace: bool = False, console_level: int = logging.INFO) -> None:
+    """
+    配置日志系统
+
+    Args:
+        trace: 是否开启行级跟踪，也可以通过环境变量 SQLEXEC_TRACE=1 开启
+        console_level: 控制台日志级别，命令行模式下只输出警告和错误
+    """
+    trace = trace or os.environ.get("SQLEXEC_TRACE") == "1"
 
-def setup_logger() -> None:
-    """配置日志系统"""
     # 创建日志目录
     log_dir = Path.home() / ".sqlexec" / "logs"
     log_dir.mkdir(parents=True, exist_ok=True)
@@ -27,7 +39,7 @@ def setup_logger() -> None:
 
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(console_level)
 
     # 创建格式化器
     formatter = logging.Formatter(
@@ -40,6 +52,12 @@ def setup_logger() -> None:
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
 
+    # 开启行级跟踪时只放开本程序的日志
+    if trace:
+        logging.getLogger("sqlexec").setLevel(TRACE)
+        file_handler.setLevel(TRACE)
+        console_handler.setLevel(TRACE)
+
     # 设置第三方库的日志级别
     logging.getLogger('sqlalchemy').setLevel(logging.WARNING)
     logging.getLogger('PySide6').setLevel(logging.WARNING)
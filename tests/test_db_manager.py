@@ -0,0 +1,34 @@
+"""数据库管理器的查询执行"""
+import time
+
+import pytest
+
+from sqlexec.core.cancel import QueryTimeout
+from sqlexec.core.db_manager import DatabaseManager
+
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+ROWS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100) SELECT x FROM c"
+
+
+@pytest.fixture
+def manager() -> DatabaseManager:
+    manager = DatabaseManager()
+    manager.add_connection("a", {"type": "sqlite", "connection_string": "sqlite://",
+                                 "statement_timeout": 0.3})
+    return manager
+
+
+def test_statement_timeout_interrupts_query(manager):
+    started = time.perf_counter()
+    with pytest.raises(QueryTimeout):
+        list(manager.stream_query("a", ENDLESS))
+    assert time.perf_counter() - started < 3
+
+
+def test_statement_timeout_ignores_time_between_batches(manager):
+    batches = manager.stream_query("a", ROWS, batch_size=10)
+    rows = len(next(batches))
+    # 调用方处理结果的时间超过语句超时，不应中断游标
+    time.sleep(0.6)
+    rows += sum(len(batch) for batch in batches)
+    assert rows == 100
@@ -0,0 +1,57 @@
+"""连接健康检查"""
+import sqlite3
+import time
+
+from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.health import HealthChecker
+
+# 不会结束的查询，只能被 interrupt() 中断
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+class HangingConnection:
+    """接受连接后执行任何语句都不再返回的 SQLite 连接"""
+
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.interrupt = self._conn.interrupt
+        self.close = self._conn.close
+
+    def cursor(self):
+        conn = self._conn
+
+        class Cursor:
+            def execute(self, statement):
+                self._cursor = conn.execute(ENDLESS)
+
+            def fetchall(self):
+                return self._cursor.fetchall()
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+
+def make_manager(monkeypatch=None) -> DatabaseManager:
+    manager = DatabaseManager()
+    manager.add_connection("a", {"type": "sqlite", "connection_string": "sqlite://"})
+    if monkeypatch is not None:
+        monkeypatch.setattr(manager, "open_raw_connection",
+                            lambda alias, timeout=None: HangingConnection())
+    return manager
+
+
+def test_probe_succeeds():
+    result = HealthChecker(make_manager(), timeout=5, samples=3).check_one("a")
+    assert result.ok, result.error
+    assert result.rtt_min_ms <= result.rtt_avg_ms
+
+
+def test_hanging_probe_times_out(monkeypatch):
+    checker = HealthChecker(make_manager(monkeypatch), timeout=0.5, samples=3)
+    started = time.perf_counter()
+    result = checker.check_one("a")
+    assert not result.ok
+    assert "超时" in result.error
+    assert time.perf_counter() - started < 3
@@ -0,0 +1,15 @@
+"""入口模块的导入耗时预算
+
+每个有预算的入口模块在独立的子进程中导入，导入耗时超出预算或提前加载了
+应按需导入的模块（SQLAlchemy、数据库驱动、对话框等）时测试失败。
+较慢的机器上可以设置环境变量 SQLEXEC_IMPORT_BUDGET_SCALE 放宽耗时预算。
+"""
+import pytest
+
+from sqlexec.utils.import_budget import BUDGETS, budget_scale, check, measure
+
+
+@pytest.mark.parametrize("module", list(BUDGETS))
+def test_import_budget(module: str):
+    report = measure(module, runs=3)
+    assert check(report, BUDGETS[module], budget_scale()) == []
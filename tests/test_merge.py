@@ -0,0 +1,102 @@
+"""多连接结果的流式合并"""
+import threading
+import time
+
+import pytest
+
+from sqlexec.core.cancel import QueryCanceled
+from sqlexec.core.db_manager import DatabaseManager
+from sqlexec.core.merge import MergedStream
+
+# 排序需要读完所有行，第一批数据永远不会返回
+ENDLESS = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+           "SELECT x FROM c ORDER BY x")
+
+
+def numbers(start: int, step: int, count: int) -> str:
+    return (f"WITH RECURSIVE c(x) AS (SELECT {start} UNION ALL SELECT x + {step} FROM c "
+            f"WHERE x < {start + step * (count - 1)}) SELECT x FROM c ORDER BY x")
+
+
+@pytest.fixture
+def manager(tmp_path) -> DatabaseManager:
+    # 第一批数据在并发线程中读取，之后在调用方线程中读取，不能使用内存数据库
+    manager = DatabaseManager()
+    for alias in ("a", "b"):
+        manager.add_connection(alias, {"type": "sqlite",
+                                       "connection_string": f"sqlite:///{tmp_path / alias}.db"})
+    return manager
+
+
+class PerAliasQuery(MergedStream):
+    """每个连接执行不同的查询，模拟各分片的数据不同"""
+
+    def __init__(self, db_manager, queries, **kwargs):
+        super().__init__(db_manager, list(queries), numbers(0, 1, 1), **kwargs)
+        real = db_manager.stream_query
+        db_manager.stream_query = lambda alias, query, *args, **kw: real(
+            alias, queries[alias], *args, **kw)
+
+
+def test_ordered_merge(manager):
+    stream = PerAliasQuery(manager, {"a": numbers(0, 2, 50), "b": numbers(1, 2, 50)}, batch_size=7)
+    page = stream.fetch(1000)
+    stream.close()
+    assert stream.ordered
+    assert list(page.column(1)) == list(range(100))
+    assert list(page.column(0))[:4] == ["a", "b", "a", "b"]
+
+
+def test_cancel_interrupts_open(manager):
+    stream = PerAliasQuery(manager, {"a": numbers(0, 1, 10), "b": ENDLESS})
+    errors = []
+
+    def fetch():
+        try:
+            stream.fetch(10)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=fetch, daemon=True)
+    thread.start()
+    time.sleep(0.3)
+    stream.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert isinstance(errors[0], QueryCanceled)
+
+
+def test_fetch_after_cancel_raises(manager):
+    stream = PerAliasQuery(manager, {"a": numbers(0, 1, 10), "b": numbers(0, 1, 10)}, batch_size=2)
+    assert len(stream.fetch(3)) == 3
+    stream.cancel()
+    with pytest.raises(QueryCanceled):
+        stream.fetch(3)
+    stream.close()
+
+
+def test_first_batches_respect_limits(manager):
+    manager.add_connection("c", {"type": "sqlite",
+                                 "connection_string": manager.connections["a"]["connection_string"]})
+    running, peak = [0], [0]
+    lock = threading.Lock()
+    real = manager.stream_query
+
+    def stream_query(alias, query, *args, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        batches = real(alias, query, *args, **kwargs)
+        first = next(batches)
+        with lock:
+            running[0] -= 1
+        yield first
+        yield from batches
+
+    manager.stream_query = stream_query
+    stream = MergedStream(manager, ["a", "b", "c"], numbers(0, 1, 3), batch_size=10,
+                          limits={"group:g": 1}, keys_of=lambda alias: ["group:g"])
+    assert len(stream.fetch(100)) == 9
+    stream.close()
+    assert peak[0] == 1
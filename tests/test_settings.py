@@ -0,0 +1,18 @@
+"""设置的加载"""
+from sqlexec.config.settings import Settings
+
+
+def test_unknown_keys_are_ignored():
+    settings = Settings.from_dict({
+        "version": 2,
+        "general": {"history_enabled": False, "removed_option": 1},
+        "execution": {"max_workers": 3, "max_wokers": 5, "future_option": True},
+        "connections": [{
+            "name": "a", "alias": "a", "type": "sqlite", "connection_string": "sqlite://",
+            "pool": {"pool_size": 2, "unknown": 1},
+        }],
+        "groups": {},
+    })
+    assert settings.general.history_enabled is False
+    assert settings.execution.max_workers == 3
+    assert settings.connections["a"].pool.pool_size == 2
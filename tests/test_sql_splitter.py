@@ -0,0 +1,60 @@
+"""SQL 脚本拆分"""
+import pytest
+
+from sqlexec.core.sql_splitter import needs_split, split_statements
+
+
+def texts(script: str, dialect: str):
+    return [statement.text for statement in split_statements(script, dialect)]
+
+
+def test_semicolons_in_strings_and_comments():
+    script = "SELECT 'a;b' -- c;d\nFROM t; /* e; */ SELECT 2;"
+    assert texts(script, "") == ["SELECT 'a;b' -- c;d\nFROM t", "SELECT 2"]
+
+
+def test_mssql_go_batches_with_repeat():
+    statements = split_statements("DECLARE @a INT; SELECT @a\nGO\nINSERT INTO t VALUES (1)\nGO 5\n", "mssql")
+    assert [(s.text, s.line, s.repeat) for s in statements] == [
+        ("DECLARE @a INT; SELECT @a", 1, 1),
+        ("INSERT INTO t VALUES (1)", 3, 5),
+    ]
+
+
+@pytest.mark.parametrize("dialect", ["mssql", "postgresql"])
+def test_nested_block_comments(dialect):
+    assert texts("/* a /* b */ ; */ SELECT 1", dialect) == ["SELECT 1"]
+
+
+def test_mysql_block_comments_do_not_nest():
+    assert texts("/* a /* b */ SELECT 1; SELECT 2", "mysql") == ["SELECT 1", "SELECT 2"]
+
+
+def test_mysql_delimiter():
+    script = "DELIMITER //\nCREATE PROCEDURE p() BEGIN SELECT 1; END//\nDELIMITER ;\nCALL p();"
+    assert texts(script, "mysql") == ["CREATE PROCEDURE p() BEGIN SELECT 1; END", "CALL p()"]
+
+
+def test_postgresql_dollar_quoted_body():
+    script = "CREATE FUNCTION f() RETURNS int AS $$ SELECT 1; $$ LANGUAGE sql; SELECT f();"
+    assert texts(script, "postgresql") == [
+        "CREATE FUNCTION f() RETURNS int AS $$ SELECT 1; $$ LANGUAGE sql", "SELECT f()"]
+
+
+def test_sqlite_trigger_body():
+    script = "CREATE TRIGGER tr AFTER INSERT ON t BEGIN UPDATE t SET a = 1; END; SELECT 1;"
+    assert texts(script, "sqlite") == [
+        "CREATE TRIGGER tr AFTER INSERT ON t BEGIN UPDATE t SET a = 1; END", "SELECT 1"]
+
+
+@pytest.mark.parametrize("script, dialect, expected", [
+    ("SELECT 1", "mssql", False),
+    ("SELECT 1;", "mssql", False),
+    ("  SELECT 1;  ", "postgresql", False),
+    ("SELECT 1\nGO\n", "mssql", True),
+    ("INSERT INTO t VALUES (1)\nGO 5", "mssql", True),
+    ("DELIMITER //\nCREATE PROCEDURE p() BEGIN SELECT 1; END//\nDELIMITER ;", "mysql", True),
+    ("SELECT 1; SELECT 2", "sqlite", True),
+])
+def test_needs_split(script, dialect, expected):
+    assert needs_split(script, split_statements(script, dialect)) is expected